@@ -0,0 +1,129 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Benchmarks.EmbedderBenchmark import SENTENCES
+from platypus.Core.Vectorizer               import Embedder, ChunkVectorizer
+from platypus.Core.Extractor                import PDFExtractor
+from platypus.Core.Codec                    import EncodeEmbedding
+from platypus.Utils.Log                     import ConfigureLogging
+
+import argparse
+
+"""
+    Paper-like texts of _NumParagraphs paragraphs of a few sentences each
+
+    Returns:
+        list of str
+"""
+def SyntheticTexts(_NumTexts: int, _NumParagraphs: int = 40, _Seed: int = 0) -> list:
+
+    Generator   = Foundation.np.random.default_rng(_Seed)
+    Texts       = []
+
+    for i in range(_NumTexts):
+
+        Paragraphs = [" ".join(SENTENCES[j] for j in Generator.integers(0, len(SENTENCES), Generator.integers(3, 9)))
+                      for _ in range(_NumParagraphs)]
+        Texts.append(f"Paper {i}\n\n" + "\n\n".join(Paragraphs))
+
+    return Texts
+
+"""
+    Text of every PDF of _Directory
+"""
+def PDFTexts(_Directory: str) -> list:
+
+    Texts = []
+
+    for Name in sorted(Foundation.os.listdir(_Directory)):
+
+        if not Name.lower().endswith(".pdf"):
+            continue
+
+        Extractor = PDFExtractor(Foundation.os.path.join(_Directory, Name), False, _Stream = True)
+        Texts.append(Extractor.Text())
+        Extractor.Close()
+
+    return Texts
+
+"""
+    Chunks & encodes _Texts with every chunk mode & measures the number of
+    chunks, the chunking & encoding time and the size of the stored Embeddings
+
+    Args:
+        _Model      : Embedder of the chunks, its tokenizer measures the "tokens" mode.
+        _Texts      : Texts to chunk, one per document.
+        _Modes      : Chunk modes to compare.
+        _Codec      : Codec the Embeddings are stored with in ArxivVectorized.
+        _BatchSize  : Chunks per forward pass.
+
+    Returns:
+        list of dicts {Mode, ChunkSize, Chunks, ChunksPerDocument, ChunkSeconds, EncodeSeconds, BytesPerDocument}
+"""
+def BenchmarkChunking(_Model: Embedder, _Texts: list, _Modes: list,
+                      _Codec: str = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC,
+                      _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE) -> list:
+
+    Results = []
+
+    for Mode in _Modes:
+
+        Vectorizer  = ChunkVectorizer(_Model, False, _Mode = Mode)
+
+        StartTime   = Foundation.time.perf_counter()
+        Chunks      = [Vectorizer.Chunk(Text) for Text in _Texts]
+        ChunkTime   = Foundation.time.perf_counter() - StartTime
+
+        StartTime   = Foundation.time.perf_counter()
+        Embeddings  = Vectorizer.EncodeChunks([Chunk for TextChunks in Chunks for Chunk in TextChunks], _BatchSize)
+        EncodeTime  = Foundation.time.perf_counter() - StartTime
+
+        Offsets     = Foundation.np.cumsum([0] + [len(TextChunks) for TextChunks in Chunks])
+        # Size of the whole stored BSON document, as Mongo stores it
+        NumBytes    = sum(len(Foundation.bson.encode({"_id": f"{i:010d}", **EncodeEmbedding(Embeddings[Begin:End], _Codec)}))
+                          for i, (Begin, End) in enumerate(zip(Offsets[:-1], Offsets[1:])))
+
+        Results.append({
+            "Mode"              : Mode,
+            "ChunkSize"         : Vectorizer.ChunkSize,
+            "Chunks"            : int(Offsets[-1]),
+            "ChunksPerDocument" : Offsets[-1] / max(len(_Texts), 1),
+            "ChunkSeconds"      : ChunkTime,
+            "EncodeSeconds"     : EncodeTime,
+            "BytesPerDocument"  : NumBytes / max(len(_Texts), 1)
+        })
+
+    return Results
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Chunks / encode time / stored bytes of the chunk modes of ChunkVectorizer")
+    Parser.add_argument("--model", default = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL)
+    Parser.add_argument("--backend", choices = Foundation.PLATYPUS_EMBEDDER_BACKENDS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDER_BACKEND)
+    Parser.add_argument("--pdfs", default = None, help = "directory of PDFs, synthetic texts are used otherwise")
+    Parser.add_argument("--documents", type = int, default = 32, help = "number of synthetic texts")
+    Parser.add_argument("--modes", nargs = "+", choices = Foundation.PLATYPUS_CHUNK_MODES, default = list(Foundation.PLATYPUS_CHUNK_MODES))
+    Parser.add_argument("--codec", choices = Foundation.PLATYPUS_EMBEDDING_CODECS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC)
+    Parser.add_argument("--batch-size", type = int, default = Foundation.PLATYPUS_ENCODE_BATCH_SIZE)
+    Parser.add_argument("--threads", type = int, default = None)
+    Args = Parser.parse_args()
+
+    Texts   = PDFTexts(Args.pdfs) if Args.pdfs else SyntheticTexts(Args.documents)
+    Model   = Embedder(Args.model, Args.backend, Args.threads)
+
+    print(f"[Platypus][Benchmark]: {Model.Identity}, {len(Texts)} documents, max sequence length {Model.STModel.max_seq_length}")
+
+    Results = BenchmarkChunking(Model, Texts, Args.modes, Args.codec, Args.batch_size)
+
+    for Result in Results:
+        print(f"[Platypus][Benchmark]: {Result['Mode']:<10} size {Result['ChunkSize']:4d}  {Result['Chunks']:7d} chunks "
+              f"({Result['ChunksPerDocument']:7.1f}/doc)  chunk {Result['ChunkSeconds']:7.2f}s  encode {Result['EncodeSeconds']:7.2f}s  "
+              f"{Result['BytesPerDocument'] / 1024:8.1f} KiB/doc")
+
+    # Reductions relative to the first mode
+    for Result in Results[1:]:
+        print(f"[Platypus][Benchmark]: {Result['Mode']} vs {Results[0]['Mode']}: "
+              f"{Results[0]['Chunks'] / max(Result['Chunks'], 1):.1f}x fewer chunks, "
+              f"{Results[0]['EncodeSeconds'] / max(Result['EncodeSeconds'], 1e-9):.1f}x faster encoding, "
+              f"{Results[0]['BytesPerDocument'] / max(Result['BytesPerDocument'], 1e-9):.1f}x less storage")
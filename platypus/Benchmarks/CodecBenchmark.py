@@ -0,0 +1,124 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Codec import EncodeEmbedding, DecodeEmbeddings
+from platypus.Utils.Log  import ConfigureLogging
+
+import argparse
+
+"""
+    Synthetic chunk Embeddings, the chunks of a document are scattered around
+    a document topic so pooled vectors have meaningful neighbours
+
+    Returns:
+        list of float32 (chunks x _Dimension) matrices
+"""
+def SyntheticEmbeddings(_NumDocuments: int, _MeanChunks: int, _Dimension: int, _Seed: int = 0) -> list:
+
+    Generator   = Foundation.np.random.default_rng(_Seed)
+    Topics      = Generator.standard_normal((max(_NumDocuments // 20, 1), _Dimension)).astype(Foundation.np.float32)
+    Embeddings  = []
+
+    for Topic in Topics[Generator.integers(0, len(Topics), _NumDocuments)]:
+
+        Chunks = Topic + Generator.standard_normal((max(1, int(Generator.poisson(_MeanChunks))), _Dimension)).astype(Foundation.np.float32)
+        Chunks /= Foundation.np.linalg.norm(Chunks, axis = 1, keepdims = True)
+        Embeddings.append(Chunks)
+
+    return Embeddings
+
+"""
+    Normalized mean pooled vector of every document
+"""
+def PoolDocuments(_Embeddings, _Counts):
+
+    Offsets = Foundation.np.concatenate(([0], Foundation.np.cumsum(_Counts)[:-1]))
+    Means   = Foundation.np.ascontiguousarray(Foundation.np.add.reduceat(_Embeddings, Offsets, axis = 0), dtype = Foundation.np.float32)
+    Foundation.faiss.normalize_L2(Means)
+
+    return Means
+
+"""
+    Stores _Embeddings with every codec & measures its size, decode speed and
+    the retrieval quality of its pooled document vectors against float32
+
+    Args:
+        _Embeddings : list of float32 (chunks x dimension) matrices, one per document.
+        _Codecs     : Codecs to compare, float32 is the reference.
+        _K          : Number of neighbours per query.
+        _NumQueries : Number of documents used as queries.
+        _BatchSize  : Documents decoded per DecodeEmbeddings call.
+
+    Returns:
+        list of dicts {Codec, BytesPerDocument, DecodeDocsPerSecond, DecodeMBPerSecond, MaxAbsError, Recall@K}
+"""
+def BenchmarkCodecs(_Embeddings: list, _Codecs: list, _K: int = 10, _NumQueries: int = 1000,
+                    _BatchSize: int = Foundation.PLATYPUS_VECTORIZED_CURSOR_BATCH_SIZE) -> list:
+
+    Generator   = Foundation.np.random.default_rng(0)
+    Queries     = Generator.choice(len(_Embeddings), min(_NumQueries, len(_Embeddings)), replace = False)
+    Reference   = None
+    Results     = []
+
+    for Codec in ["float32"] + [Codec for Codec in _Codecs if Codec != "float32"]:
+
+        Documents   = [EncodeEmbedding(Embeddings, Codec) for Embeddings in _Embeddings]
+        # Size of the whole stored BSON document, as Mongo stores & sends it
+        NumBytes    = sum(len(Foundation.bson.encode({"_id": f"{i:010d}", **Document})) for i, Document in enumerate(Documents))
+
+        StartTime   = Foundation.time.perf_counter()
+        Decoded     = [DecodeEmbeddings(Documents[Begin:Begin + _BatchSize]) for Begin in range(0, len(Documents), _BatchSize)]
+        Seconds     = Foundation.time.perf_counter() - StartTime
+
+        Embeddings  = Foundation.np.concatenate([Embeddings for Embeddings, _ in Decoded])
+        Counts      = Foundation.np.concatenate([Counts for _, Counts in Decoded])
+        Pooled      = PoolDocuments(Embeddings, Counts)
+
+        Index       = Foundation.faiss.IndexFlatIP(Pooled.shape[1])
+        Index.add(Pooled)
+        # Queries are the float32 pooled vectors, so only the stored side is quantized
+        _, Found    = Index.search(Reference["Pooled"][Queries] if Reference else Pooled[Queries], _K + 1)
+
+        if Reference is None:
+            Reference = {"Pooled": Pooled, "Found": Found, "Embeddings": Embeddings}
+
+        Recall = Foundation.np.mean([len(set(Row) & set(Expected)) / len(Expected) for Row, Expected in zip(Found.tolist(), Reference["Found"].tolist())])
+
+        Results.append({
+            "Codec"                 : Codec,
+            "BytesPerDocument"      : NumBytes / len(Documents),
+            "DecodeDocsPerSecond"   : len(Documents) / max(Seconds, 1e-9),
+            "DecodeMBPerSecond"     : sum(len(Document["WholeEmbedding"]) for Document in Documents) / 2**20 / max(Seconds, 1e-9),
+            "MaxAbsError"           : float(Foundation.np.abs(Embeddings - Reference["Embeddings"]).max()),
+            f"Recall@{_K}"          : float(Recall)
+        })
+
+    return Results
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Size / decode throughput / retrieval quality of the ArxivVectorized storage codecs")
+    Parser.add_argument("--codecs", nargs = "+", default = list(Foundation.PLATYPUS_EMBEDDING_CODECS))
+    Parser.add_argument("--documents", type = int, default = 5000)
+    Parser.add_argument("--chunks", type = int, default = 100, help = "mean chunks per synthetic document")
+    Parser.add_argument("--dimension", type = int, default = 384)
+    Parser.add_argument("--mongo", action = "store_true", help = "use the first --documents of ArxivVectorized instead of synthetic ones")
+    Parser.add_argument("--queries", type = int, default = 1000)
+    Parser.add_argument("--k", type = int, default = 10)
+    Args = Parser.parse_args()
+
+    if Args.mongo:
+        from platypus.Core.Database import MongoDBManager
+        DBManager   = MongoDBManager(False)
+        Stored      = list(DBManager.DB[DBManager.CollectionArxivPDFVectorized].find({}, limit = Args.documents))
+        Embeddings  = [DecodeEmbeddings([Document])[0] for Document in Stored]
+    else:
+        Embeddings  = SyntheticEmbeddings(Args.documents, Args.chunks, Args.dimension)
+
+    print(f"[Platypus][Benchmark]: {len(Embeddings)} documents, {sum(len(E) for E in Embeddings)} chunks, k = {Args.k}")
+
+    for Result in BenchmarkCodecs(Embeddings, Args.codecs, Args.k, Args.queries):
+        print(f"[Platypus][Benchmark]: {Result['Codec']:<8} {Result['BytesPerDocument'] / 1024:8.1f} KB/doc  "
+              f"{Result['DecodeDocsPerSecond']:10.0f} docs/s  {Result['DecodeMBPerSecond']:8.0f} MB/s  "
+              f"max |err| {Result['MaxAbsError']:.2e}  recall@{Args.k} {Result[f'Recall@{Args.k}']:.4f}")
@@ -0,0 +1,142 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Vectorizer import Embedder, EncodingEngine, CosineAgreement
+from platypus.Utils.Log       import ConfigureLogging
+
+import argparse
+
+# Chunk-like sentences, repeated to reach --sentences
+SENTENCES = [
+    "We propose a new network architecture based solely on attention mechanisms.",
+    "Product quantization splits vectors into subspaces & quantizes each one separately.",
+    "The sample complexity of learning sparse linear classifiers under adversarial label noise",
+    "Retrieval augmented models are evaluated on long context question answering over scientific papers.",
+    "Graph neural networks aggregate features from the neighbourhood of every node.",
+    "We derive a tight regret bound for the contextual bandit problem with linear payoffs.",
+]
+
+"""
+    Loads _ModelName on every backend & measures its load time, encoding
+    throughput and cosine agreement with the torch backend
+
+    Args:
+        _ModelName  : Sentence Transformer model name or path.
+        _Backends   : Backends to compare, torch is the reference.
+        _Sentences  : Sentences to encode.
+        _Threads    : Number of CPU threads, None keeps the default.
+        _BatchSize  : Sentences per forward pass.
+        _Repeats    : Timed passes over _Sentences (after one warm up pass).
+
+    Returns:
+        list of dicts {Backend, LoadSeconds, SentencesPerSecond, MeanCosine, MinCosine}
+"""
+def BenchmarkEmbedders(_ModelName: str, _Backends: list, _Sentences: list, _Threads: int = None,
+                       _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE, _Repeats: int = 3) -> list:
+
+    Reference   = None
+    Results     = []
+
+    for Backend in ["torch"] + [Backend for Backend in _Backends if Backend != "torch"]:
+
+        Model = Embedder(_ModelName, Backend, _Threads)
+        Model.STModel.encode(_Sentences[:_BatchSize], batch_size = _BatchSize)
+
+        StartTime   = Foundation.time.perf_counter()
+
+        for _ in range(_Repeats):
+            Model.STModel.encode(_Sentences, batch_size = _BatchSize)
+
+        Seconds     = Foundation.time.perf_counter() - StartTime
+
+        if Reference is None:
+            Reference = Model
+
+        Agreement = CosineAgreement(Model, Reference, _Sentences, _BatchSize)
+
+        Results.append({
+            "Backend"               : Backend,
+            "LoadSeconds"           : Model.LoadSeconds,
+            "SentencesPerSecond"    : len(_Sentences) * _Repeats / max(Seconds, 1e-9),
+            "MeanCosine"            : Agreement["Mean"],
+            "MinCosine"             : Agreement["Min"]
+        })
+
+    return Results
+
+"""
+    Encodes _Sentences with one STModel.encode call in their order, then with
+    an EncodingEngine of every number of _Workers
+
+    Args:
+        _ModelName  : Sentence Transformer model name or path.
+        _Backend    : Backend of the model.
+        _Sentences  : Sentences to encode, of mixed lengths.
+        _Workers    : Worker counts to compare.
+        _BatchSize  : Sentences per bucket & forward pass.
+
+    Returns:
+        list of dicts {Encoder, SentencesPerSecond, MaxAbsDifference}
+"""
+def BenchmarkEncodingEngine(_ModelName: str, _Backend: str, _Sentences: list, _Workers: list,
+                            _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE) -> list:
+
+    Model       = Embedder(_ModelName, _Backend)
+    Model.STModel.encode(_Sentences[:_BatchSize], batch_size = _BatchSize)
+
+    StartTime   = Foundation.time.perf_counter()
+    Reference   = Foundation.np.asarray(Model.STModel.encode(_Sentences, batch_size = _BatchSize), dtype = Foundation.np.float32)
+    Seconds     = Foundation.time.perf_counter() - StartTime
+    Results     = [{"Encoder": "encode", "SentencesPerSecond": len(_Sentences) / max(Seconds, 1e-9), "MaxAbsDifference": 0.0}]
+
+    for Workers in _Workers:
+
+        Engine = EncodingEngine(Model, Workers, _BatchSize)
+
+        try:
+            # Warm up, the workers are spawned & load the model here
+            Engine.Encode(_Sentences[:_BatchSize * Workers])
+            Engine.Sentences, Engine.Seconds = 0, 0.0
+
+            Embeddings = Engine.Encode(_Sentences)
+        finally:
+            Engine.Close()
+
+        Results.append({
+            "Encoder"               : f"engine x{Workers}",
+            "SentencesPerSecond"    : Engine.SentencesPerSecond(),
+            "MaxAbsDifference"      : float(Foundation.np.abs(Embeddings - Reference).max())
+        })
+
+    return Results
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Load time / sentences per sec / agreement of the Embedder backends on CPU")
+    Parser.add_argument("--model", default = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL)
+    Parser.add_argument("--backends", nargs = "+", choices = Foundation.PLATYPUS_EMBEDDER_BACKENDS, default = list(Foundation.PLATYPUS_EMBEDDER_BACKENDS))
+    Parser.add_argument("--sentences", type = int, default = 1024)
+    Parser.add_argument("--batch-size", type = int, default = Foundation.PLATYPUS_ENCODE_BATCH_SIZE)
+    Parser.add_argument("--repeats", type = int, default = 3)
+    Parser.add_argument("--threads", type = int, default = None)
+    Parser.add_argument("--workers", type = int, nargs = "*", default = [], help = "also compare the EncodingEngine with these worker counts")
+    Args = Parser.parse_args()
+
+    # Sentences are made distinct so no backend benefits from repeated inputs
+    Sentences = [f"{SENTENCES[i % len(SENTENCES)]} ({i})" for i in range(Args.sentences)]
+
+    print(f"[Platypus][Benchmark]: {Args.model}, {Args.sentences} sentences, batch size {Args.batch_size}")
+
+    for Result in BenchmarkEmbedders(Args.model, Args.backends, Sentences, Args.threads, Args.batch_size, Args.repeats):
+        print(f"[Platypus][Benchmark]: {Result['Backend']:<6} load {Result['LoadSeconds']:6.2f}s  "
+              f"{Result['SentencesPerSecond']:9.1f} sentences/sec  cosine mean {Result['MeanCosine']:.4f} min {Result['MinCosine']:.4f}")
+
+    if Args.workers:
+
+        # Mixed lengths, from one sentence to a paragraph
+        Mixed = [" ".join(Sentences[i:i + 1 + i % 8]) for i in range(Args.sentences)]
+
+        for Result in BenchmarkEncodingEngine(Args.model, Args.backends[0], Mixed, Args.workers, Args.batch_size):
+            print(f"[Platypus][Benchmark]: {Result['Encoder']:<10} {Result['SentencesPerSecond']:9.1f} sentences/sec  "
+                  f"max abs difference {Result['MaxAbsDifference']:.2e}")
@@ -0,0 +1,58 @@
+import argparse
+import json
+import subprocess
+import sys
+
+# Dependencies that take seconds to import, none should be pulled in by a search-only import
+HEAVY_MODULES = ["torch", "transformers", "sentence_transformers", "streamlit", "langchain_text_splitters",
+                 "huggingface_hub", "faiss", "pymongo", "fitz", "numpy", "requests"]
+
+# Runs in a fresh interpreter, so nothing is already imported
+_PROBE = """
+import json, sys, time
+Start = time.perf_counter()
+import {Module}
+Seconds = time.perf_counter() - Start
+print(json.dumps({{"Seconds": Seconds, "Loaded": [Name for Name in {Heavy!r} if Name in sys.modules]}}))
+"""
+
+"""
+    Imports _Module in _Repeats fresh interpreters
+
+    Returns:
+        dict {Module, BestSeconds, Loaded} where Loaded are the heavy modules it imported
+"""
+def BenchmarkImport(_Module: str, _Repeats: int = 5) -> dict:
+
+    Seconds = []
+    Loaded  = []
+
+    for _ in range(_Repeats):
+
+        Output  = subprocess.run([sys.executable, "-c", _PROBE.format(Module = _Module, Heavy = HEAVY_MODULES)],
+                                 capture_output = True, text = True, check = True).stdout
+        Result  = json.loads(Output.strip().splitlines()[-1])
+        Seconds.append(Result["Seconds"])
+        Loaded  = Result["Loaded"]
+
+    return {"Module": _Module, "BestSeconds": min(Seconds), "Loaded": Loaded}
+
+if __name__ == "__main__":
+
+    Parser = argparse.ArgumentParser(description = "Cold import time of platypus modules")
+    Parser.add_argument("--modules", nargs = "+", default = ["platypus.Utils.Foundation", "platypus.Core.Indexer",
+                                                             "platypus.Core.MetadataStore", "platypus.Core.Vectorizer"])
+    Parser.add_argument("--repeats", type = int, default = 5)
+    Parser.add_argument("--budget", type = float, default = 1.0, help = "fail if any import takes longer (seconds)")
+    Args = Parser.parse_args()
+
+    OverBudget = False
+
+    for Result in [BenchmarkImport(Module, Args.repeats) for Module in Args.modules]:
+
+        print(f"[Platypus][Benchmark]: {Result['Module']:<32} {Result['BestSeconds'] * 1000:8.1f} ms  "
+              f"heavy modules loaded: {', '.join(Result['Loaded']) or 'none'}")
+
+        OverBudget |= Result["BestSeconds"] > Args.budget
+
+    sys.exit(1 if OverBudget else 0)
@@ -0,0 +1,115 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Indexer import CreateIndex
+from platypus.Utils.Log    import ConfigureLogging
+
+import argparse
+
+"""
+    Reads every vector of a saved FAISS Index back into a float32 matrix
+"""
+def ReadIndexVectors(_IndexPath: str):
+
+    Index = Foundation.faiss.read_index(_IndexPath)
+
+    if isinstance(Index, Foundation.faiss.IndexIDMap):
+        Index = Foundation.faiss.downcast_index(Index.index)
+
+    # IVF Indices need a direct map before they can reconstruct by position
+    if hasattr(Index, "make_direct_map"):
+        Index.make_direct_map()
+
+    return Index.reconstruct_n(0, Index.ntotal)
+
+"""
+    Builds one Index per spec on the same _Vectors and measures it against
+    the exact Flat Index
+
+    Args:
+        _Vectors            : Normalized float32 corpus, shape (N, Dimension).
+        _Queries            : Normalized float32 queries, shape (Q, Dimension).
+        _Specs              : Keys of PLATYPUS_FAISS_INDEX_SPECS or faiss.index_factory strings.
+        _K                  : Number of neighbours per query.
+        _SearchParameters   : Query time knobs applied to every Index they fit.
+
+    Returns:
+        list of dicts {Spec, BuildSeconds, MemoryMB, Recall@K, P50ms, P99ms}
+"""
+def BenchmarkIndexSpecs(_Vectors, _Queries, _Specs: list, _K: int = 10, _SearchParameters: dict = None):
+
+    IDs             = Foundation.np.arange(len(_Vectors), dtype = Foundation.np.int64)
+    Exact           = CreateIndex("Flat", _Vectors)
+    Exact.add_with_ids(_Vectors, IDs)
+    _, ExactLabels  = Exact.search(_Queries, _K)
+    Results         = []
+
+    for Spec in _Specs:
+
+        StartTime   = Foundation.time.perf_counter()
+        Index       = CreateIndex(Spec, _Vectors)
+        Index.add_with_ids(_Vectors, IDs)
+        BuildTime   = Foundation.time.perf_counter() - StartTime
+
+        for Name, Value in (_SearchParameters or {}).items():
+            try:
+                Foundation.faiss.ParameterSpace().set_index_parameter(Index, Name, Value)
+            except Exception:
+                pass
+
+        # One query at a time, as the search path sees them
+        Labels      = Foundation.np.empty((len(_Queries), _K), dtype = Foundation.np.int64)
+        Latencies   = Foundation.np.empty(len(_Queries))
+
+        for i in range(len(_Queries)):
+            StartTime       = Foundation.time.perf_counter()
+            _, Labels[i]    = Index.search(_Queries[i:i + 1], _K)
+            Latencies[i]    = Foundation.time.perf_counter() - StartTime
+
+        Recall = Foundation.np.mean([len(Foundation.np.intersect1d(Labels[i], ExactLabels[i])) / _K for i in range(len(_Queries))])
+
+        Results.append({
+            "Spec"          : Spec,
+            "BuildSeconds"  : BuildTime,
+            "MemoryMB"      : Foundation.faiss.serialize_index(Index).nbytes / 2**20,
+            f"Recall@{_K}"  : float(Recall),
+            "P50ms"         : float(Foundation.np.percentile(Latencies, 50) * 1e3),
+            "P99ms"         : float(Foundation.np.percentile(Latencies, 99) * 1e3),
+        })
+
+    return Results
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Recall@k / latency / memory of FAISS Index specs against the exact Flat Index")
+    Parser.add_argument("--index", default = Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_FAISS_INDEX_FILE),
+                        help = "saved Index whose vectors form the corpus")
+    Parser.add_argument("--synthetic", type = int, default = 0, help = "use N random vectors instead of a saved Index")
+    Parser.add_argument("--dimension", type = int, default = 384, help = "dimension of --synthetic vectors")
+    Parser.add_argument("--specs", nargs = "+", default = list(Foundation.PLATYPUS_FAISS_INDEX_SPECS.keys()))
+    Parser.add_argument("--queries", type = int, default = 1000)
+    Parser.add_argument("--k", type = int, default = 10)
+    Parser.add_argument("--nprobe", type = int, default = 16)
+    Parser.add_argument("--efSearch", type = int, default = 64)
+    Args = Parser.parse_args()
+
+    Generator = Foundation.np.random.default_rng(0)
+
+    if Args.synthetic > 0:
+        Vectors = Generator.standard_normal((Args.synthetic, Args.dimension)).astype(Foundation.np.float32)
+    else:
+        Vectors = ReadIndexVectors(Args.index)
+
+    Foundation.faiss.normalize_L2(Vectors)
+
+    # Queries are perturbed corpus vectors, so they have close but not exact neighbours
+    Queries = Vectors[Generator.choice(len(Vectors), min(Args.queries, len(Vectors)), replace = False)]
+    Queries = Queries + 0.05 * Generator.standard_normal(Queries.shape).astype(Foundation.np.float32)
+    Foundation.faiss.normalize_L2(Queries)
+
+    print(f"[Platypus][Benchmark]: {len(Vectors)} vectors, {len(Queries)} queries, k = {Args.k}")
+
+    for Result in BenchmarkIndexSpecs(Vectors, Queries, Args.specs, Args.k, {"nprobe": Args.nprobe, "efSearch": Args.efSearch}):
+        print(f"[Platypus][Benchmark]: {Result['Spec']:>8} | build {Result['BuildSeconds']:7.2f}s | {Result['MemoryMB']:8.2f} MB"
+              f" | recall@{Args.k} {Result[f'Recall@{Args.k}']:.4f} | p50 {Result['P50ms']:.3f} ms | p99 {Result['P99ms']:.3f} ms")
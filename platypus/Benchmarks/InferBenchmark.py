@@ -0,0 +1,70 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Infer import InferenceEngine, SAMPLING
+from platypus.Utils.Log  import ConfigureLogging
+
+import argparse
+
+# Abstract-like prompts, repeated to reach --prompts
+PROMPTS = [
+    "We propose a new network architecture based solely on attention mechanisms, dispensing with recurrence and convolutions entirely.",
+    "We present a method for approximate nearest neighbour search on billions of vectors using product quantization & inverted files.",
+    "We study the sample complexity of learning sparse linear classifiers under adversarial label noise.",
+    "We introduce a benchmark of long context question answering over scientific papers & evaluate retrieval augmented models.",
+]
+
+"""
+    The generation of the original Infer: per prompt, a discarded 64 token
+    pass followed by the real one
+
+    Returns:
+        Number of tokens of the real passes
+"""
+def LegacyGenerate(_Engine: InferenceEngine, _Texts: list, _MaxNewTokens: int, **kwargs) -> int:
+
+    NewTokens = 0
+
+    for Text in _Texts:
+
+        Inputs = _Engine.Tokenizer(_Engine.FormatPrompt(Text), return_tensors = "pt")
+
+        with Foundation.torch.inference_mode():
+            _Engine.Model.generate(**Inputs, max_new_tokens = 64, pad_token_id = _Engine.Tokenizer.pad_token_id, **{**SAMPLING, **kwargs})
+            Tokens = _Engine.Model.generate(**Inputs, max_new_tokens = _MaxNewTokens, pad_token_id = _Engine.Tokenizer.pad_token_id, **{**SAMPLING, **kwargs})
+
+        NewTokens += Tokens.shape[1] - Inputs["input_ids"].shape[1]
+
+    return NewTokens
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Tokens/sec of Query formulation: legacy two pass vs batched single pass")
+    Parser.add_argument("--model", default = Foundation.PLATYPUS_DEFAULT_LANGUAGE_MODEL)
+    Parser.add_argument("--prompts", type = int, default = 16)
+    Parser.add_argument("--max-new-tokens", type = int, default = 128)
+    Parser.add_argument("--batch-sizes", type = int, nargs = "+", default = [1, 4, 8, 16])
+    Parser.add_argument("--threads", type = int, default = None)
+    Parser.add_argument("--legacy", action = "store_true", help = "also time the original two pass generation")
+    Args = Parser.parse_args()
+
+    Texts   = [PROMPTS[i % len(PROMPTS)] for i in range(Args.prompts)]
+    Engine  = InferenceEngine(Args.model, _Threads = Args.threads)
+    # Every prompt generates exactly --max-new-tokens, so the modes do the same useful work
+    Fixed   = {"min_new_tokens": Args.max_new_tokens}
+
+    print(f"[Platypus][Benchmark]: {Args.model}, {Args.prompts} prompts, {Args.max_new_tokens} new tokens each, "
+          f"{Foundation.torch.get_num_threads()} threads")
+
+    if Args.legacy:
+        StartTime   = Foundation.time.perf_counter()
+        NewTokens   = LegacyGenerate(Engine, Texts, Args.max_new_tokens, **Fixed)
+        Seconds     = Foundation.time.perf_counter() - StartTime
+        print(f"[Platypus][Benchmark]: legacy two pass   {Seconds:8.2f}s  {NewTokens / Seconds:8.1f} tokens/sec")
+
+    for BatchSize in Args.batch_sizes:
+        Engine.BatchSize = BatchSize
+        Engine.Generate(Texts, Args.max_new_tokens, **Fixed)
+        print(f"[Platypus][Benchmark]: batch size {BatchSize:<6}  {Engine.LastStats['Seconds']:8.2f}s  "
+              f"{Engine.LastStats['TokensPerSecond']:8.1f} tokens/sec")
@@ -0,0 +1,403 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Vectorizer   import Embedder, ChunkVectorizer
+from platypus.Core.Indexer      import FAISSIndexer
+from platypus.Core.Extractor    import PDFExtractor
+from platypus.Core.Database     import MongoDBManager
+from platypus.Utils.Log          import ConfigureLogging
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import textwrap
+import zlib
+
+# Vocabulary of the synthetic corpus
+WORDS = ("attention transformer network graph neural vector quantization retrieval index embedding sparse dense "
+         "learning model training inference benchmark dataset language vision robust adversarial bound regret "
+         "bandit convex gradient descent stochastic kernel bayesian posterior sampling diffusion generative "
+         "contrastive supervised reinforcement policy reward agent search nearest neighbour approximate recall "
+         "latency throughput memory compression pruning distillation scaling law token sequence context").split()
+
+class HashingModel(object):
+
+    """
+        Stand-in for a SentenceTransformer with the same encode interface: every
+        text is a bag of its words hashed into _Dimension buckets. It needs no
+        model download & costs little, so the suite measures Platypus rather
+        than the model.
+    """
+    def __init__(self, _Dimension: int):
+
+        self.Dimension = _Dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+
+        return self.Dimension
+
+    def encode(self, _Sentences, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs):
+
+        Embeddings = Foundation.np.zeros((len(_Sentences), self.Dimension), dtype = Foundation.np.float32)
+
+        for i, Sentence in enumerate(_Sentences):
+
+            for Word in Sentence.lower().split():
+                Hash = zlib.crc32(Word.encode())
+                Embeddings[i, Hash % self.Dimension] += 1.0 if Hash & 0x80000000 else -1.0
+
+        if normalize_embeddings:
+            Embeddings /= Foundation.np.maximum(Foundation.np.linalg.norm(Embeddings, axis = 1, keepdims = True), 1e-12)
+
+        return Embeddings
+
+class StandInEmbedder(Embedder):
+
+    """
+        Embedder backed by a HashingModel, nothing is downloaded or loaded
+    """
+    def __init__(self, _Dimension: int = 384, **kwargs):
+
+        self.STModelName    = f"platypus/hashing-{_Dimension}"
+        self.Backend        = "torch"
+        self.Identity       = self.STModelName
+        self.LoadSeconds    = 0.0
+        self.STModel        = HashingModel(_Dimension)
+        self.Args           = {"_Dimension": _Dimension}
+
+# Categories of the synthetic corpus
+CATEGORIES = ("cs.LG", "cs.CL", "cs.CV", "cs.IR", "cs.AI", "stat.ML", "math.OC", "cs.DS", "cs.NE", "eess.SP")
+# Filter of the filtered searches, matches ~7% of the synthetic corpus
+FILTER     = {"Categories": ["cs.LG"], "PublishedAfter": "2020-01-01"}
+
+"""
+    Synthetic arXiv-like records {_id, Title, Summary, URL, Categories, Published},
+    deterministic in _Seed
+"""
+def SyntheticCorpus(_NumDocuments: int, _Seed: int = 0) -> list:
+
+    Generator   = Foundation.np.random.default_rng(_Seed)
+    Documents   = []
+
+    for i in range(_NumDocuments):
+
+        ID          = f"{2400 + i // 100000}.{i % 100000:05d}"
+        Title       = " ".join(Generator.choice(WORDS, int(Generator.integers(5, 12)))).capitalize()
+        Sentences   = [" ".join(Generator.choice(WORDS, int(Generator.integers(8, 20)))).capitalize() + "."
+                       for _ in range(int(Generator.integers(4, 10)))]
+
+        Categories  = [str(Category) for Category in Generator.choice(CATEGORIES, int(Generator.integers(1, 3)), replace = False)]
+        Published   = str(Foundation.np.datetime64("2015-01-01") + int(Generator.integers(0, 3650)))
+
+        Documents.append({"_id": ID, "Title": Title, "Summary": " ".join(Sentences),
+                          "URL": Foundation.PLATYPUS_ARXIV_PDF_URL.format(ID), "Categories": Categories, "Published": Published})
+
+    return Documents
+
+"""
+    A small PDF of _Document: Title, Abstract, an Introduction heading & filler
+    pages, laid out as PDFExtractor & FindAbstract expect
+
+    Returns:
+        PDF bytes
+"""
+def SyntheticPDF(_Document: dict, _NumPages: int) -> bytes:
+
+    PDF     = Foundation.pymupdf.open()
+    Filler  = textwrap.wrap((_Document["Summary"] + " ") * 8, 90)
+
+    for Number in range(_NumPages):
+
+        Lines = [_Document["Title"], "", "Abstract"] + textwrap.wrap(_Document["Summary"], 90) + ["1", "Introduction"] if Number == 0 else []
+        PDF.new_page().insert_text((50, 60), "\n".join(Lines + Filler[:max(0, 50 - len(Lines))]), fontsize = 9)
+
+    Content = PDF.tobytes()
+    PDF.close()
+
+    return Content
+
+"""
+    Latency percentiles (ms) & throughput of a list of per call latencies (s)
+"""
+def Summarize(_Latencies: list, _ItemsPerCall: int = 1) -> dict:
+
+    Latencies = Foundation.np.asarray(_Latencies)
+
+    return {"Calls"         : len(Latencies),
+            "P50ms"         : float(Foundation.np.percentile(Latencies, 50) * 1e3),
+            "P99ms"         : float(Foundation.np.percentile(Latencies, 99) * 1e3),
+            "ItemsPerSecond": len(Latencies) * _ItemsPerCall / max(float(Latencies.sum()), 1e-9)}
+
+"""
+    ChunkVectorizer.Vectorize per document & VectorizeMeans over the whole corpus
+"""
+def BenchmarkVectorize(_Vectorizer: ChunkVectorizer, _Documents: list) -> dict:
+
+    Texts       = [Document["Title"] + Document["Summary"] for Document in _Documents]
+    Chunks      = 0
+    StartTime   = Foundation.time.perf_counter()
+
+    for Text in Texts:
+        Chunks += len(_Vectorizer.Vectorize(Text))
+
+    Seconds     = Foundation.time.perf_counter() - StartTime
+    StartTime   = Foundation.time.perf_counter()
+    _Vectorizer.VectorizeMeans(Texts)
+    MeanSeconds = Foundation.time.perf_counter() - StartTime
+
+    return {"DocsPerSecond"         : len(Texts) / max(Seconds, 1e-9),
+            "ChunksPerSecond"       : Chunks / max(Seconds, 1e-9),
+            "MeansDocsPerSecond"    : len(Texts) / max(MeanSeconds, 1e-9)}
+
+"""
+    FAISSIndexer.BuildIndices (including SaveIndices) & LoadIndices, read into
+    RAM & memory-mapped, with the Index saved in _Directory
+
+    Returns:
+        (metrics, loaded FAISSIndexer with the result caches disabled)
+"""
+def BenchmarkIndex(_Vectorizer: ChunkVectorizer, _Documents: list, _Spec: str, _Directory: str) -> tuple:
+
+    Builder     = FAISSIndexer(_Vectorizer, False, _Spec, _Directory = _Directory)
+    StartTime   = Foundation.time.perf_counter()
+    Builder.BuildIndices(_Documents)
+    BuildTime   = Foundation.time.perf_counter() - StartTime
+    Metrics     = {"BuildSeconds": BuildTime, "BuildDocsPerSecond": len(_Documents) / max(BuildTime, 1e-9)}
+
+    for Name, MemoryMap in (("LoadSeconds", False), ("LoadMMapSeconds", True)):
+
+        # Caches would turn repeated searches into lookups
+        Indexer     = FAISSIndexer(_Vectorizer, False, _Spec, _QueryCacheSize = 0, _ResultCacheSize = 0, _Directory = _Directory)
+        StartTime   = Foundation.time.perf_counter()
+
+        if not Indexer.LoadIndices(_MemoryMap = MemoryMap):
+            raise RuntimeError(f"LoadIndices failed after BuildIndices with spec {_Spec}")
+
+        Metrics[Name] = Foundation.time.perf_counter() - StartTime
+
+    return Metrics, Indexer
+
+"""
+    FAISSIndexer.Search of _Queries in batches of every _BatchSizes at every _Ks,
+    restricted to the documents matching _Filter if given
+
+    Returns:
+        dict "k=<K> batch=<B>" -> Summarize of the per batch latencies
+"""
+def BenchmarkSearch(_Indexer: FAISSIndexer, _Queries: list, _Ks: list, _BatchSizes: list, _Filter: dict = None) -> dict:
+
+    Results = {}
+
+    for K in _Ks:
+        for BatchSize in _BatchSizes:
+
+            Latencies = []
+
+            for Begin in range(0, len(_Queries) - BatchSize + 1, BatchSize):
+                StartTime = Foundation.time.perf_counter()
+                _Indexer.Search(_Queries[Begin:Begin + BatchSize], K, _Filter)
+                Latencies.append(Foundation.time.perf_counter() - StartTime)
+
+            if Latencies:
+                Results[f"k={K} batch={BatchSize}"] = Summarize(Latencies, BatchSize)
+
+    return Results
+
+"""
+    PDFExtractor (text & Abstract) of every PDF of _PDFs, given as bytes
+"""
+def BenchmarkExtract(_PDFs: list) -> dict:
+
+    Pages       = 0
+    Latencies   = []
+
+    for PDF in _PDFs:
+
+        StartTime = Foundation.time.perf_counter()
+        Extractor = PDFExtractor(PDF, False)
+        Latencies.append(Foundation.time.perf_counter() - StartTime)
+        Pages    += Extractor.Document.page_count
+        Extractor.Close()
+
+    return {**Summarize(Latencies), "PagesPerSecond": Pages / max(sum(Latencies), 1e-9)}
+
+"""
+    MongoDBManager.InsertRecords of _Documents in bulk writes of _BatchSize by
+    _Writers threads, first as new documents into an empty collection
+    (insert_many) then again (upserts updating every document)
+"""
+def BenchmarkInsert(_DBManager: MongoDBManager, _Documents: list, _BatchSize: int, _Writers: int = 1) -> dict:
+
+    _DBManager.DB[_DBManager.CollectionArxiv].delete_many({})
+    Metrics = {}
+
+    for Name, New in (("InsertDocsPerSecond", True), ("UpdateDocsPerSecond", False)):
+
+        # Every pass writes its own copies, the client may add fields to the documents it sends
+        Documents   = [dict(Document) for Document in _Documents]
+        Report      = _DBManager.InsertRecords(Documents, _DBManager.CollectionArxiv, _New = New,
+                                               _ChunkSize = _BatchSize, _Writers = _Writers)
+
+        if Report["Failed"]:
+            raise RuntimeError(f"InsertRecords failed to write {Report['Failed']} documents")
+
+        Metrics[Name] = len(_Documents) / max(Report["Seconds"], 1e-9)
+
+    if _DBManager.DB[_DBManager.CollectionArxiv].count_documents({}) != len(_Documents):
+        raise RuntimeError("InsertRecords didn't write every document")
+
+    return Metrics
+
+"""
+    Compares every timing of _Results with the same one of _Baseline. Metrics
+    ending in "PerSecond" should not drop, metrics ending in "Seconds" or "ms"
+    should not grow, by more than _Tolerance (a fraction).
+
+    Returns:
+        list of dicts {Stage, Metric, Baseline, Current, Change, Regressed}
+"""
+def CompareResults(_Results: dict, _Baseline: dict, _Tolerance: float) -> list:
+
+    Rows = []
+
+    for Stage, Metrics in _Results["Stages"].items():
+
+        Baseline = _Baseline.get("Stages", {}).get(Stage, {})
+
+        for Metric, Current in Metrics.items():
+
+            if Metric not in Baseline or not Baseline[Metric]:
+                continue
+
+            if Metric.endswith("PerSecond"):
+                HigherIsBetter = True
+            elif Metric.endswith("Seconds") or Metric.endswith("ms"):
+                HigherIsBetter = False
+            else:
+                continue
+
+            Change = Current / Baseline[Metric] - 1.0
+            Rows.append({"Stage": Stage, "Metric": Metric, "Baseline": Baseline[Metric], "Current": Current, "Change": Change,
+                         "Regressed": (-Change if HigherIsBetter else Change) > _Tolerance})
+
+    return Rows
+
+"""
+    Runs every stage on a synthetic corpus, in a temporary directory, without
+    network access
+
+    Args:
+        _Args   : Parsed arguments of the suite (see the parser below).
+
+    Returns:
+        dict {Environment, Config, Stages} where Stages maps a stage name to its metrics
+"""
+def RunSuite(_Args) -> dict:
+
+    Documents   = SyntheticCorpus(_Args.documents, _Args.seed)
+    Queries     = [Document["Title"] for Document in Documents[:_Args.queries]]
+    Model       = Embedder(_Args.model, _Args.backend) if _Args.model else StandInEmbedder(_Args.dimension)
+    Vectorizer  = ChunkVectorizer(Model, False)
+    Stages      = {}
+
+    Stages["Vectorize"] = BenchmarkVectorize(Vectorizer, Documents[:_Args.vectorize_documents])
+    print(f"[Platypus][Benchmark]: Vectorize {Stages['Vectorize']}")
+
+    with tempfile.TemporaryDirectory(prefix = "platypus-bench-") as Directory:
+
+        Stages["Index"], Indexer = BenchmarkIndex(Vectorizer, Documents, _Args.spec, Directory)
+
+        print(f"[Platypus][Benchmark]: Index {Stages['Index']}")
+
+        for Name, Metrics in BenchmarkSearch(Indexer, Queries, _Args.ks, _Args.batch_sizes).items():
+            Stages[f"Search {Name}"] = Metrics
+            print(f"[Platypus][Benchmark]: Search {Name} {Metrics}")
+
+        for Name, Metrics in BenchmarkSearch(Indexer, Queries, _Args.ks, _Args.batch_sizes, FILTER).items():
+            Stages[f"Filtered search {Name}"] = Metrics
+            print(f"[Platypus][Benchmark]: Filtered search {Name} {Metrics}")
+
+    PDFs = [SyntheticPDF(Document, _Args.pages) for Document in Documents[:_Args.pdfs]]
+    Stages["Extract"] = BenchmarkExtract(PDFs)
+    print(f"[Platypus][Benchmark]: Extract {Stages['Extract']}")
+
+    if _Args.mongo_uri:
+        Client = Foundation.pymongo.MongoClient(_Args.mongo_uri)
+    else:
+        try:
+            import mongomock
+        except ImportError:
+            mongomock = None
+            print("[Platypus][Benchmark]: Skipping InsertRecords, install mongomock or pass --mongo-uri")
+
+        Client = mongomock.MongoClient() if mongomock is not None else None
+
+    if Client is not None:
+
+        DBManager = MongoDBManager(False, _Client = Client, _DBName = _Args.mongo_db)
+
+        try:
+            Stages["InsertRecords"] = BenchmarkInsert(DBManager, Documents, _Args.insert_batch_size, _Args.insert_writers)
+        finally:
+            DBManager.DB.drop_collection(DBManager.CollectionArxiv)
+            DBManager.DB.drop_collection(DBManager.CollectionArxivPDFVectorized)
+            Client.close()
+
+        print(f"[Platypus][Benchmark]: InsertRecords {Stages['InsertRecords']}")
+
+    return {"Environment"   : {"Python": platform.python_version(), "Platform": platform.platform(),
+                               "CPUs": Foundation.os.cpu_count(), "NumPy": Foundation.np.__version__,
+                               "FAISS": Foundation.faiss.__version__,
+                               "MongoDB": "mongomock" if not _Args.mongo_uri else "mongod"},
+            "Config"        : {Name: Value for Name, Value in vars(_Args).items() if Name not in ("output", "baseline", "tolerance")},
+            "Stages"        : Stages}
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "End-to-end benchmark of Platypus on a synthetic corpus, offline")
+    Parser.add_argument("--documents", type = int, default = 2000, help = "records indexed & inserted")
+    Parser.add_argument("--vectorize-documents", type = int, default = 500, help = "records vectorized one at a time")
+    Parser.add_argument("--queries", type = int, default = 512)
+    Parser.add_argument("--ks", type = int, nargs = "+", default = [1, 10, 50])
+    Parser.add_argument("--batch-sizes", type = int, nargs = "+", default = [1, 16, 64])
+    Parser.add_argument("--spec", default = Foundation.PLATYPUS_DEFAULT_INDEX_SPEC)
+    Parser.add_argument("--pdfs", type = int, default = 50)
+    Parser.add_argument("--pages", type = int, default = 8, help = "pages per synthetic PDF")
+    Parser.add_argument("--insert-batch-size", type = int, default = 500)
+    Parser.add_argument("--insert-writers", type = int, default = 1, help = "parallel bulk writes of InsertRecords")
+    Parser.add_argument("--dimension", type = int, default = 384, help = "dimension of the stand-in embedder")
+    Parser.add_argument("--model", default = None, help = "locally cached Sentence Transformer to use instead of the stand-in")
+    Parser.add_argument("--backend", choices = Foundation.PLATYPUS_EMBEDDER_BACKENDS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDER_BACKEND)
+    Parser.add_argument("--mongo-uri", default = None, help = "local mongod to use instead of mongomock")
+    Parser.add_argument("--mongo-db", default = "PlatypusBenchmark")
+    Parser.add_argument("--seed", type = int, default = 0)
+    Parser.add_argument("--output", default = "BenchmarkResults.json")
+    Parser.add_argument("--baseline", default = None, help = "results of an earlier run to compare with")
+    Parser.add_argument("--tolerance", type = float, default = 0.2, help = "allowed relative slowdown against --baseline")
+    Args = Parser.parse_args()
+
+    # Nothing in the suite may reach the network
+    Foundation.os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    Foundation.os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    Results = RunSuite(Args)
+
+    with open(Args.output, "w") as File:
+        json.dump(Results, File, indent = 2)
+
+    print(f"[Platypus][Benchmark]: Written results to {Args.output}")
+
+    if Args.baseline is None:
+        sys.exit(0)
+
+    with open(Args.baseline) as File:
+        Rows = CompareResults(Results, json.load(File), Args.tolerance)
+
+    for Row in Rows:
+        print(f"[Platypus][Benchmark]: {Row['Stage']:<24} {Row['Metric']:<22} {Row['Baseline']:12.3f} -> {Row['Current']:12.3f} "
+              f"({Row['Change']:+7.1%}){'  REGRESSED' if Row['Regressed'] else ''}")
+
+    sys.exit(1 if any(Row["Regressed"] for Row in Rows) else 0)
@@ -0,0 +1,209 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Utils.Log import GetLogger
+
+import collections
+import hashlib
+import sqlite3
+import threading
+
+Log = GetLogger("EmbeddingCache")
+
+class EmbeddingCache(object):
+
+    """
+        Persistent Chunk Embedding Cache backed by SQLite
+
+        Entries are keyed by a hash of (Namespace, Chunk), where the Namespace
+        identifies everything else the Embedding depends on (model name, chunk
+        size & overlap). Least recently used entries are evicted once the
+        cache grows past _MaxBytes.
+
+        Attributes:
+        self.Path       =: Path of the SQLite file
+        self.MaxBytes   =: Size cap of the cache
+        self.Hits       =: Number of Chunks found in the cache
+        self.Misses     =: Number of Chunks that had to be encoded
+    """
+    def __init__(self,
+                 _Path: str = Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_EMBEDDING_CACHE_FILE),
+                 _MaxBytes: int = Foundation.PLATYPUS_EMBEDDING_CACHE_MAX_BYTES,
+                 _Debug: bool = False):
+
+        if Foundation.os.path.dirname(_Path):
+            Foundation.os.makedirs(Foundation.os.path.dirname(_Path), exist_ok = True)
+
+        self.Path       = _Path
+        self.MaxBytes   = _MaxBytes
+        self.Debug      = _Debug
+        self.Hits       = 0
+        self.Misses     = 0
+        self.Lock       = threading.Lock()
+        self.Connection = sqlite3.connect(_Path, check_same_thread = False)
+
+        with self.Connection:
+            self.Connection.execute("PRAGMA journal_mode = WAL")
+            self.Connection.execute("PRAGMA synchronous = NORMAL")
+            self.Connection.execute("CREATE TABLE IF NOT EXISTS Embeddings "
+                                    "(Key BLOB PRIMARY KEY, Vector BLOB NOT NULL, LastUsed INTEGER NOT NULL) WITHOUT ROWID")
+            self.Connection.execute("CREATE INDEX IF NOT EXISTS EmbeddingsLastUsed ON Embeddings (LastUsed)")
+
+    """
+        Cache Keys of _Chunks within _Namespace
+    """
+    @staticmethod
+    def Keys(_Namespace: str, _Chunks: list) -> list:
+
+        Namespace = _Namespace.encode("utf8") + b"\x00"
+        return [hashlib.blake2b(Namespace + Chunk.encode("utf8"), digest_size = 16).digest() for Chunk in _Chunks]
+
+    """
+        Looks up _Keys in batches, marking the found ones as recently used
+
+        Returns:
+            dict {Key: float32 vector} of the Keys found
+    """
+    def Lookup(self, _Keys: list) -> dict:
+
+        Found   = {}
+        Unique  = list(dict.fromkeys(_Keys))
+        Now     = Foundation.time.time_ns()
+
+        with self.Lock:
+
+            for Begin in range(0, len(Unique), Foundation.PLATYPUS_EMBEDDING_CACHE_BATCH_SIZE):
+
+                Batch   = Unique[Begin:Begin + Foundation.PLATYPUS_EMBEDDING_CACHE_BATCH_SIZE]
+                Rows    = self.Connection.execute(f"SELECT Key, Vector FROM Embeddings WHERE Key IN ({','.join('?' * len(Batch))})", Batch)
+
+                for Key, Vector in Rows:
+                    Found[Key] = Foundation.np.frombuffer(Vector, dtype = Foundation.np.float32)
+
+            with self.Connection:
+                self.Connection.executemany("UPDATE Embeddings SET LastUsed = ? WHERE Key = ?", [(Now, Key) for Key in Found])
+
+            Hits         = sum(Key in Found for Key in _Keys)
+            self.Hits   += Hits
+            self.Misses += len(_Keys) - Hits
+
+        return Found
+
+    """
+        Writes the Vectors of _Keys (the misses of a Lookup) to the cache,
+        then evicts the least recently used entries past MaxBytes
+    """
+    def Store(self, _Keys: list, _Vectors):
+
+        Vectors = Foundation.np.ascontiguousarray(_Vectors, dtype = Foundation.np.float32)
+        Now     = Foundation.time.time_ns()
+
+        with self.Lock:
+
+            with self.Connection:
+                self.Connection.executemany("INSERT OR REPLACE INTO Embeddings (Key, Vector, LastUsed) VALUES (?, ?, ?)",
+                                            [(Key, Vector.tobytes(), Now) for Key, Vector in zip(_Keys, Vectors)])
+
+            self.__Evict()
+
+    """
+        Deletes the least recently used entries until the used pages fit in MaxBytes
+    """
+    def __Evict(self):
+
+        PageSize    = self.Connection.execute("PRAGMA page_size").fetchone()[0]
+        PageCount   = self.Connection.execute("PRAGMA page_count").fetchone()[0]
+        FreePages   = self.Connection.execute("PRAGMA freelist_count").fetchone()[0]
+        UsedBytes   = (PageCount - FreePages) * PageSize
+
+        if UsedBytes <= self.MaxBytes:
+            return
+
+        # Drop enough rows to get ~10% under the cap, freed pages are reused by later writes
+        NumRows     = self.Connection.execute("SELECT COUNT(*) FROM Embeddings").fetchone()[0]
+        NumEvicted  = max(1, int(NumRows * (1.0 - 0.9 * self.MaxBytes / UsedBytes)))
+
+        with self.Connection:
+            self.Connection.execute("DELETE FROM Embeddings WHERE Key IN "
+                                    "(SELECT Key FROM Embeddings ORDER BY LastUsed LIMIT ?)", (NumEvicted,))
+
+        if self.Debug:
+            Log.debug(f"Evicted {NumEvicted} of {NumRows} entries ({UsedBytes / 2**20:.1f} MB > {self.MaxBytes / 2**20:.1f} MB)")
+
+    """
+        Hit & Miss counts since the cache was opened
+    """
+    def Stats(self) -> dict:
+
+        Total = self.Hits + self.Misses
+        return {"Hits": self.Hits, "Misses": self.Misses, "HitRatio": self.Hits / Total if Total else 0.0}
+
+    def Close(self):
+
+        self.Connection.close()
+
+class LRUCache(object):
+
+    """
+        Bounded, thread-safe in-memory Least Recently Used cache
+
+        Attributes:
+        self.MaxEntries =: Number of entries kept, 0 disables the cache
+        self.Hits       =: Number of Gets that found their Key
+        self.Misses     =: Number of Gets that didn't
+    """
+    def __init__(self, _MaxEntries: int):
+
+        self.MaxEntries = _MaxEntries
+        self.Hits       = 0
+        self.Misses     = 0
+        self.Entries    = collections.OrderedDict()
+        self.Lock       = threading.Lock()
+
+    """
+        Value of _Key (marking it as recently used), _Default if it isn't cached
+    """
+    def Get(self, _Key, _Default = None):
+
+        with self.Lock:
+
+            if _Key in self.Entries:
+                self.Entries.move_to_end(_Key)
+                self.Hits += 1
+                return self.Entries[_Key]
+
+            self.Misses += 1
+            return _Default
+
+    """
+        Caches _Value under _Key, evicting the least recently used entry past MaxEntries
+    """
+    def Put(self, _Key, _Value):
+
+        if self.MaxEntries <= 0:
+            return
+
+        with self.Lock:
+
+            self.Entries[_Key] = _Value
+            self.Entries.move_to_end(_Key)
+
+            while len(self.Entries) > self.MaxEntries:
+                self.Entries.popitem(last = False)
+
+    def Clear(self):
+
+        with self.Lock:
+            self.Entries.clear()
+
+    def __len__(self):
+
+        return len(self.Entries)
+
+    """
+        Hit & Miss counts since the cache was created
+    """
+    def Stats(self) -> dict:
+
+        Total = self.Hits + self.Misses
+        return {"Hits": self.Hits, "Misses": self.Misses, "HitRatio": self.Hits / Total if Total else 0.0,
+                "Entries": len(self.Entries), "MaxEntries": self.MaxEntries}
@@ -0,0 +1,96 @@
+import platypus.Utils.Foundation as Foundation
+
+"""
+    Storage codecs of the chunk Embeddings in ArxivVectorized
+
+    A stored Document records how its WholeEmbedding bytes were written:
+
+        dtype   =: storage dtype of the bytes (float32, float16 or int8)
+        shape   =: [chunks, dimension]
+        codec   =: name of the codec, missing on Documents written before codecs (float32)
+        scale   =: int8 only, per Document scale, value = int8 * scale
+
+    Decoding always yields float32, so readers don't depend on the codec.
+"""
+
+"""
+    Encodes a (chunks x dimension) Embedding matrix with _Codec
+
+    Returns:
+        dict of the fields to store {WholeEmbedding, dtype, shape, codec[, scale]}
+"""
+def EncodeEmbedding(_Embeddings, _Codec: str = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC) -> dict:
+
+    Embeddings = Foundation.np.asarray(_Embeddings, dtype = Foundation.np.float32)
+
+    if Embeddings.ndim == 1:
+        Embeddings = Embeddings.reshape(1, -1)
+
+    Fields = {"codec": _Codec}
+
+    if _Codec == "float32":
+        Stored = Embeddings
+
+    elif _Codec == "float16":
+        Stored = Embeddings.astype(Foundation.np.float16)
+
+    elif _Codec == "int8":
+        # Symmetric quantization, the largest magnitude of the Document maps onto 127
+        MaxAbs          = float(Foundation.np.abs(Embeddings).max()) if Embeddings.size else 0.0
+        Scale           = MaxAbs / 127.0 if MaxAbs > 0 else 1.0
+        Stored          = Foundation.np.clip(Foundation.np.rint(Embeddings / Scale), -127, 127).astype(Foundation.np.int8)
+        Fields["scale"] = Scale
+
+    else:
+        raise ValueError(f"Unknown embedding codec {_Codec}, expected one of {Foundation.PLATYPUS_EMBEDDING_CODECS}")
+
+    Fields.update({"WholeEmbedding": Stored.tobytes(), "dtype": str(Stored.dtype), "shape": list(Stored.shape)})
+
+    return Fields
+
+"""
+    Zero-copy view of the stored WholeEmbedding of _Document in its storage
+    dtype, shaped (chunks x dimension). Raises ValueError if it is malformed.
+"""
+def EmbeddingView(_Document: dict):
+
+    View = Foundation.np.frombuffer(_Document["WholeEmbedding"], dtype = _Document.get("dtype", "float32"))
+    View = View.reshape(_Document["shape"]) if "shape" in _Document else View
+
+    # Documents with a single chunk may have been stored as a vector
+    return View.reshape(1, -1) if View.ndim == 1 else View
+
+"""
+    float32 (chunks x dimension) Embeddings of one stored Document
+"""
+def DecodeEmbedding(_Document: dict):
+
+    Embeddings, _ = DecodeEmbeddings([_Document])
+    return Embeddings
+
+"""
+    Decodes the Embeddings of many stored Documents (of the same dimension) at once
+
+    The views of every Document are cast into one float32 matrix by a single
+    concatenate, int8 rows are then rescaled by one broadcast multiply.
+
+    Returns:
+        (float32 matrix of every chunk, int64 chunk count per Document)
+"""
+def DecodeEmbeddings(_Documents: list):
+
+    Views   = [EmbeddingView(Document) for Document in _Documents]
+    Counts  = Foundation.np.array([len(View) for View in Views], dtype = Foundation.np.int64)
+
+    if not Views:
+        return Foundation.np.empty((0, 0), dtype = Foundation.np.float32), Counts
+
+    Embeddings = Foundation.np.concatenate(Views, axis = 0, dtype = Foundation.np.float32, casting = "unsafe")
+    # Only int8 Documents are scaled, whatever other fields they carry
+    Scales     = Foundation.np.array([Document.get("scale", 1.0) if Document.get("codec") == "int8" else 1.0
+                                      for Document in _Documents], dtype = Foundation.np.float32)
+
+    if (Scales != 1.0).any():
+        Embeddings *= Foundation.np.repeat(Scales, Counts)[:, None]
+
+    return Embeddings, Counts
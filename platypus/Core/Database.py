@@ -1,5 +1,12 @@
 import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
 from platypus.Core.Vectorizer import ChunkVectorizer
+from platypus.Utils.Log       import GetLogger
+from concurrent.futures       import ThreadPoolExecutor
+
+import datetime
+
+Log = GetLogger("MongoDB")
 
 class MongoDBManager(object):
 
@@ -7,94 +14,216 @@ class MongoDBManager(object):
         Initializes MongoDB Database Handle
 
         Attributes:
-        self.Client =: pymongo.MongoClient
-        self.DB     =: Handle to Valid Database
+        self.Client         =: pymongo.MongoClient
+        self.DB             =: Handle to Valid Database
+        self.DBName         =: Name of the Database
+        self.Collections    =: Names of the collections known to exist (refreshed on a miss)
+
+        Args:
+            _Debug          : Debug Flag.
+            _Client         : MongoClient to use (e.g. a mongomock.MongoClient), one is created from Env if None.
+            _DBName         : Database name, Env.DBName if None.
+            _MaxPoolSize    : Maximum number of connections of the created MongoClient.
+            _WriteConcern   : Write concern of the Database, e.g. {"w": 1, "j": False}, the server default if None.
     """
     def __init__(self, 
-                 _Debug: bool, **kwargs):
+                 _Debug: bool,
+                 _Client = None,
+                 _DBName: str = None,
+                 _MaxPoolSize: int = Foundation.PLATYPUS_MONGO_MAX_POOL_SIZE,
+                 _WriteConcern: dict = None, **kwargs):
         
-        self.Debug    = _Debug
+        self.Debug          = _Debug
+        self.DBName         = _DBName or Foundation.Env.DBName
+        self.Client         = None
+        self.DB             = None
+        self.Collections    = set()
 
-        # Local DB URI
-        uri = f"mongodb://{Foundation.Env.DBHost}:{Foundation.Env.DBPort}/?appName={Foundation.Env.DBName}"
-        
         try:
 
             # Connect to MongoDB Client
-            self.Client = Foundation.pymongo.MongoClient(uri)
+            if _Client is not None:
+                self.Client = _Client
+            else:
+                # Local DB URI
+                uri = f"mongodb://{Foundation.Env.DBHost}:{Foundation.Env.DBPort}/?appName={self.DBName}"
+                self.Client = Foundation.pymongo.MongoClient(uri, maxPoolSize = _MaxPoolSize)
 
             if self.Client is not None:
 
                 # Connect to Database
-                self.DB = self.Client[Foundation.Env.DBName]
+                if _WriteConcern is not None:
+                    self.DB = self.Client.get_database(self.DBName, write_concern = Foundation.pymongo.WriteConcern(**_WriteConcern))
+                else:
+                    self.DB = self.Client[self.DBName]
 
                 # Check Connection
                 try:
 
                     self.Client.admin.command('ping')
-                    print(f"[Platypus][MongoDB]: Successfully connected to MongoDB!, using DB ({self.DBName})")
+                    Log.info(f"Successfully connected to MongoDB!, using DB ({self.DBName})")
                     
                 except Exception as e:
-                    print(f"[Platypus][MongoDB]: Connection failed: {e}")
+                    Log.error(f"Connection failed: {e}")
 
         except Exception as e:
-            print(f"[Platypus][MongoDB]: Client Creation Failed! {e}")
+            Log.error(f"Client Creation Failed! {e}")
         
         # Named Collections in Database
         self.CollectionArxiv                = "Arxiv"
         self.CollectionArxivPDFVectorized   = "ArxivVectorized"
+        # Written by the Dedup job, created when it first runs
+        self.CollectionArxivDuplicates      = "ArxivDuplicates"
+
+        if self.DB is None:
+            return
 
         # Create Collection if they don't exist
-        if self.CollectionArxiv not in self.DB.list_collection_names():
+        if not self.HasCollection(self.CollectionArxiv):
 
             self.DB.create_collection(self.CollectionArxiv)
             self.DB.create_collection(self.CollectionArxivPDFVectorized)
+            self.Collections.update((self.CollectionArxiv, self.CollectionArxivPDFVectorized))
             
             if self.Debug:
-                print(f"[Platypus][MongoDB]: Created Collection ({self.CollectionArxiv}) in {Foundation.Env.DBName}")
-                print(f"[Platypus][MongoDB]: Created Collection ({self.CollectionArxivPDFVectorized}) in {Foundation.Env.DBName}")
+                Log.debug(f"Created Collection ({self.CollectionArxiv}) in {self.DBName}")
+                Log.debug(f"Created Collection ({self.CollectionArxivPDFVectorized}) in {self.DBName}")
+
+    """
+        Whether _Collection exists, list_collection_names() is only called
+        for names not seen before
+    """
+    def HasCollection(self, _Collection: str) -> bool:
+
+        if _Collection not in self.Collections:
+            self.Collections = set(self.DB.list_collection_names())
+
+        return _Collection in self.Collections
     
     """
         Inserts a Set of Records into Initialized DB
 
+        Documents are sent in unordered bulk writes of _ChunkSize, so a failed
+        document doesn't stop the others, by _Writers threads at once. Every
+        written document is stamped with UpdatedAt (UTC), which the LiveIndexer
+        follows.
+
         Args:
             _Documents:list =: Must be a valid List containing documents
             _Collection:str =: Must be one of the attribute Collection<CollectionName> in Manager    
+            _New:bool       =: Documents are known to be new, they are inserted with insert_many
+                               instead of upserted (existing _ids fail & are left unchanged)
+            _ChunkSize:int  =: Number of documents per bulk write
+            _Writers:int    =: Number of bulk writes sent in parallel
+
+        Returns:
+            dict {Inserted, Modified, Failed, Seconds, DocsPerSec}
     """
-    def InsertRecords(self, _Documents:list, _Collection:str):
+    def InsertRecords(self, _Documents:list, _Collection:str,
+                      _New: bool = False,
+                      _ChunkSize: int = Foundation.PLATYPUS_MONGO_WRITE_CHUNK_SIZE,
+                      _Writers: int = Foundation.PLATYPUS_MONGO_WRITERS) -> dict:
+
+        Report = {"Inserted": 0, "Modified": 0, "Failed": 0, "Seconds": 0.0, "DocsPerSec": 0.0}
 
         if len(_Documents) <= 0:
-            print("[Platypus][MongoDB]: PARAM(_Documents) must be at least of length  1!")
-        
-        if self.DB is not None:
+            Log.warning("PARAM(_Documents) must be at least of length  1!")
+            return Report
+
+        if self.DB is None:
+            Log.warning(f"There was no Database Initialized!")
+            return Report
+
+        if not self.HasCollection(_Collection):
+            Log.warning(f"There was no Collection {_Collection} in {self.DB.name}!")
+            return Report
+
+        Collection  = self.DB[_Collection]
+        Write       = self.__InsertChunk if _New else self.__UpsertChunk
+        Chunks      = [_Documents[Begin:Begin + _ChunkSize] for Begin in range(0, len(_Documents), _ChunkSize)]
+        StartTime   = Foundation.time.perf_counter()
+
+        # pymongo clients are thread safe, every writer borrows its own pooled connection
+        if _Writers > 1 and len(Chunks) > 1:
+            with ThreadPoolExecutor(min(_Writers, len(Chunks))) as Writers:
+                Results = list(Writers.map(lambda _Chunk: Write(Collection, _Chunk), Chunks))
+        else:
+            Results = [Write(Collection, Chunk) for Chunk in Chunks]
 
-            if _Collection in self.DB.list_collection_names():
+        Report["Seconds"]       = Foundation.time.perf_counter() - StartTime
+        Report["Inserted"]      = sum(Inserted for Inserted, _, _ in Results)
+        Report["Modified"]      = sum(Modified for _, Modified, _ in Results)
+        Report["Failed"]        = sum(Failed for _, _, Failed in Results)
+        Report["DocsPerSec"]    = (len(_Documents) - Report["Failed"]) / max(Report["Seconds"], 1e-9)
 
-                Collection = self.DB[_Collection]
+        if self.Debug:
+            Log.debug(f"Inserted {Report['Inserted']}, Modified {Report['Modified']}, Failed {Report['Failed']} in {Collection.name} "
+                      f"({Report['DocsPerSec']:.0f} docs/sec)")
 
-                # Try inserting the Documents
-                try:
-                    # Store the Operations in list
-                    Operations = [Foundation.pymongo.UpdateOne(
-                                            filter = {"_id"   : _Document["_id"]},
-                                            update = {"$set"  : _Document},
-                                            upsert = True)
-                                            for _Document in _Documents]
-                    # bulk_write them
-                    result = Collection.bulk_write(Operations)
-                    
-                    if self.Debug:
-                        print(f"[Platypus][MongoDB]: Inserted {result.upserted_count} into {Collection.name}")
-                        print(f"[Platypus][MongoDB]: Modified {result.modified_count} in {Collection.name}")
+        return Report
 
-                except Exception as e:
-                    print(f"[Platypus][MongoDB]: bulk_write Failed, Reason: {e}")
-            
-            else:
-                print(f"[Platypus][MongoDB]: There was no Collection {_Collection} in {self.DB.name}!")
+    """
+        Upserts (_id filter, $set of the document) a chunk in one unordered bulk_write
 
-        else:
-            print(f"[Platypus][MongoDB]: There was no Database Initialized!")
+        Returns:
+            (Inserted, Modified, Failed)
+    """
+    def __UpsertChunk(self, _Collection, _Chunk: list) -> tuple:
+
+        Now         = datetime.datetime.now(datetime.timezone.utc)
+        Operations  = [Foundation.pymongo.UpdateOne(
+                                filter = {"_id"   : _Document["_id"]},
+                                update = {"$set"  : {**_Document, "UpdatedAt": Now}},
+                                upsert = True)
+                                for _Document in _Chunk]
+
+        try:
+            with Metrics.Timer("bulk_write_seconds"):
+                Result = _Collection.bulk_write(Operations, ordered = False)
+
+            Counts = (Result.upserted_count, Result.modified_count, 0)
+
+        except Foundation.pymongo.errors.BulkWriteError as e:
+            Counts = (e.details.get("nUpserted", 0), e.details.get("nModified", 0), len(e.details.get("writeErrors", [])))
+            Log.error(f"bulk_write into {_Collection.name} had {Counts[2]} failures: {e.details.get('writeErrors', [])[:1]}")
+
+        except Exception as e:
+            Counts = (0, 0, len(_Chunk))
+            Log.error(f"bulk_write Failed, Reason: {e}")
+
+        Metrics.Increment("bulk_write_operations_total", len(_Chunk))
+        Metrics.Increment("bulk_write_failures_total", Counts[2])
+
+        return Counts
+
+    """
+        Inserts a chunk of new documents in one unordered insert_many
+
+        Returns:
+            (Inserted, Modified, Failed)
+    """
+    def __InsertChunk(self, _Collection, _Chunk: list) -> tuple:
+
+        Now = datetime.datetime.now(datetime.timezone.utc)
+
+        try:
+            with Metrics.Timer("bulk_write_seconds"):
+                Result = _Collection.insert_many([{**_Document, "UpdatedAt": Now} for _Document in _Chunk], ordered = False)
+
+            Counts = (len(Result.inserted_ids), 0, 0)
+
+        except Foundation.pymongo.errors.BulkWriteError as e:
+            Counts = (e.details.get("nInserted", 0), 0, len(e.details.get("writeErrors", [])))
+            Log.error(f"insert_many into {_Collection.name} had {Counts[2]} failures: {e.details.get('writeErrors', [])[:1]}")
+
+        except Exception as e:
+            Counts = (0, 0, len(_Chunk))
+            Log.error(f"insert_many Failed, Reason: {e}")
+
+        Metrics.Increment("bulk_write_operations_total", len(_Chunk))
+        Metrics.Increment("bulk_write_failures_total", Counts[2])
+
+        return Counts
 
 """
     Vectorized MongoDB Manager!
@@ -1,71 +1,172 @@
 import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Utils.Log import GetLogger
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing    import cpu_count, get_context
+
+import io
+
+Log = GetLogger("PDFExtractor")
+
+"""
+    Opens a PDF from a path or from its bytes
+"""
+def OpenPDF(_Source):
+
+    if isinstance(_Source, (bytes, bytearray, memoryview)):
+        return Foundation.pymupdf.open(stream = bytes(_Source), filetype = "pdf")
+
+    return Foundation.pymupdf.open(_Source)
+
+"""
+    Extracts the text of pages [_Begin, _End) of a PDF, runs in the extraction
+    process pool (pymupdf Documents can't be shared between threads)
+"""
+def ExtractPageRange(_Source, _Begin: int, _End: int) -> list:
+
+    with OpenPDF(_Source) as Document:
+        return [Document[Number].get_text() for Number in range(_Begin, _End)]
+
+"""
+    Finds the Abstract in one pass over _Lines: the lines after the first one
+    containing "Abstract", up to (excluding) the line before the first one
+    containing "Introduction". Stops reading at "Introduction", so with a
+    stream of lines the rest of the document is never extracted.
+
+    Returns:
+        Abstract with the lines stripped & joined
+"""
+def FindAbstract(_Lines) -> str:
+
+    Buffer      = []
+    Started     = False
+
+    for Line in _Lines:
+
+        if not Started and "Abstract" in Line:
+            Started = True
+            Buffer  = []
+            continue
+
+        if "Introduction" in Line:
+            # The line before the heading is its section number
+            Buffer = Buffer[:-1]
+            break
+
+        Buffer.append(Line)
+
+    return "".join(Line.strip() for Line in Buffer if Line.strip() != "")
 
 class PDFExtractor(object):
 
     """
         PDFExtractor(object)
 
-        Constructs an PDF Extractor Object
+        Extracts the text & Abstract of a PDF in memory
+
+        Pages of PDFs with at least _ParallelPages pages are extracted by a
+        process pool, in ranges of PLATYPUS_EXTRACT_PAGES_PER_TASK pages.
 
         Attributes:
-        self.FilePath =: Stores the File path
-        self.Document =: Stores pymupdf Object
-        self
+        self.FilePath       =: Path of the PDF, None if it was given as bytes
+        self.Document       =: pymupdf Document
+        self.ExtractedText  =: Lines of the text, every page ends with a form feed (None if _Stream)
+        self.Abstract       =: Abstract of the PDF (None if _Stream, see FindAbstract & Lines)
+
+        Args:
+            _Source         : Path of the PDF or its bytes.
+            _Debug          : Debug Flag.
+            _Stream         : Don't extract on construction, use Pages / Lines to stream the text.
+            _Executor       : ProcessPoolExecutor to reuse for parallel extraction, one is created if None.
     """
-    def __init__(self, 
-                 _FilePath: str, 
-                 _Debug: bool):
-        
+    def __init__(self,
+                 _Source,
+                 _Debug: bool,
+                 _Stream: bool = False,
+                 _ParallelPages: int = Foundation.PLATYPUS_EXTRACT_PARALLEL_PAGES,
+                 _Executor: ProcessPoolExecutor = None):
+
         # Sanity checks
-        if _FilePath is None:
-            print("[Platypus][PDFExtractor]: PARAMETER(_FilePath) is empty!")
+        if _Source is None:
+            Log.warning("PARAMETER(_Source) is empty!")
 
-        if _FilePath[-4:-1] != ".pdf":
-            print(f"[Platypus][PDFExtractor]: Supported File Types are only PDF!")
+        if isinstance(_Source, str) and not _Source.lower().endswith(".pdf"):
+            Log.warning(f"Supported File Types are only PDF!")
 
-        self.FilePath   = _FilePath
-        self.Document   = Foundation.pymupdf.open(self.FilePath)
-        self.Debug      = _Debug
+        self.Source         = _Source
+        self.FilePath       = _Source if isinstance(_Source, str) else None
+        self.Document       = OpenPDF(_Source)
+        self.Debug          = _Debug
+        self.ParallelPages  = _ParallelPages
+        self.Executor       = _Executor
+        self.ExtractedText  = None
+        self.Abstract       = None
 
         # Debug info
         if self.Debug:
-            print(f"[Platypus][PDFExtractor]: File To Check: {self.FilePath}")
+            Log.debug(f"File To Check: {self.FilePath or f'<{len(_Source)} bytes>'} ({self.Document.page_count} pages)")
 
-        # Create intermediate directory
-        Foundation.os.makedirs(Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY, exist_ok = True)
-        
-        IntDirPath = Foundation.os.path.join(Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY, Foundation.PLATYPUS_TEMP_EXTRACTED_FILE)
+        if _Stream:
+            return
 
-        # Write to intermediate file
-        with open(IntDirPath, "wb") as File:
+        with Metrics.Timer("parse_seconds"):
+            self.ExtractedText  = list(self.Lines())
+            self.Abstract       = FindAbstract(self.ExtractedText)
 
-            for page in self.Document:
-                
-                File.write(page.get_text().encode("utf8"))
-                File.write(bytes((12,)))
+        Metrics.Increment("parsed_pages_total", self.Document.page_count)
 
-        # Read written data from intermediate file
-        with open(Foundation.os.path.join(self.IntDirName, self.ExtractedTextIntFileName), "r") \
-            as File:
+        if self.Debug:
+            Log.debug("Text & Abstract Extraction Successfull")
 
-            self.ExtractedText = File.readlines()
+    """
+        Yields the text of every page in order, the pages of large PDFs are
+        extracted by a process pool while the consumer reads the earlier ones
+    """
+    def Pages(self):
 
-        # Remove the temp file
-        Foundation.os.remove(IntDirPath)
+        NumPages = self.Document.page_count
 
-        # ----- Extract abstract -----
-        AbstractBeginIndex  = None
-        AbstractEndIndex    = None
+        if NumPages < self.ParallelPages:
+            for Page in self.Document:
+                yield Page.get_text()
+            return
 
-        for i in range(len(self.ExtractedText)):
-            
-            if AbstractBeginIndex is None and "Abstract" in self.ExtractedText[i].strip():
-                AbstractBeginIndex = i + 1
-            if AbstractEndIndex is None and "Introduction" in self.ExtractedText[i].strip():
-                AbstractEndIndex = i - 1
-            
-        self.Abstract = self.ExtractedText[AbstractBeginIndex:AbstractEndIndex]    
-        self.Abstract = "".join([line.strip() for line in self.Abstract if line.strip() != ""])
+        Executor    = self.Executor or ProcessPoolExecutor(cpu_count(), mp_context = get_context("spawn"))
+        Step        = Foundation.PLATYPUS_EXTRACT_PAGES_PER_TASK
+        Ranges      = [(Begin, min(Begin + Step, NumPages)) for Begin in range(0, NumPages, Step)]
+        # bytes are sent to the workers once per range, a path is reopened by them
+        Source      = self.FilePath if self.FilePath is not None else bytes(self.Source)
+        Futures     = []
 
-        if self.Debug:
-            print("[Platypus][PDFExtractor]: Text & Abstract Extraction Successfull")
+        try:
+            Futures = [Executor.submit(ExtractPageRange, Source, Begin, End) for Begin, End in Ranges]
+
+            for Future in Futures:
+                yield from Future.result()
+        finally:
+            for Future in Futures:
+                Future.cancel()
+
+            if self.Executor is None:
+                Executor.shutdown(wait = False, cancel_futures = True)
+
+    """
+        Yields the lines of the text (as File.readlines() would), every page
+        ending with a form feed
+    """
+    def Lines(self):
+
+        for Text in self.Pages():
+            yield from io.StringIO(Text + "\x0c", newline = None)
+
+    """
+        Whole text of the PDF, pages separated by form feeds
+    """
+    def Text(self) -> str:
+
+        return "".join(Text + "\x0c" for Text in self.Pages())
+
+    def Close(self):
+
+        self.Document.close()
@@ -1,132 +1,1114 @@
-from platypus.Core.Vectorizer import ChunkVectorizer, Embedder
+from platypus.Core.Vectorizer     import ChunkVectorizer, Embedder
+from platypus.Core.MetadataStore  import MetadataStore, FilterColumns
+from platypus.Core.Cache          import LRUCache
+from platypus.Core.Codec          import EmbeddingView, DecodeEmbeddings
+from platypus.Utils.Log           import GetLogger
 
 import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+import hashlib
+import threading
+
+Log = GetLogger("SSIndexer")
+
+"""
+    Maps a MongoDB _id onto a stable, non negative int64 FAISS id
+"""
+def DocumentID(_ID) -> int:
+
+    Digest = hashlib.blake2b(str(_ID).encode("utf8"), digest_size = 8).digest()
+    return int.from_bytes(Digest, "little") & 0x7FFFFFFFFFFFFFFF
+
+"""
+    Hash of the embedded content of a Document (Title & Summary),
+    used to skip re-embedding unchanged Documents
+"""
+def DocumentHash(_Document: dict) -> str:
+
+    return hashlib.blake2b((_Document["Title"] + "\x00" + _Document["Summary"]).encode("utf8"), digest_size = 16).hexdigest()
+
+"""
+    Filterable Metadata of a Document (see FilterColumns): its Categories,
+    space separated, & the YYYY-MM-DD date it was Published, "" if unknown
+"""
+def FilterMetadata(_Document: dict) -> dict:
+
+    Categories = _Document.get("Categories") or ""
+
+    return {"Categories": Categories if isinstance(Categories, str) else " ".join(Categories),
+            "Published" : str(_Document.get("Published") or "")[:10]}
+
+"""
+    Canonical, hashable key of a search filter, None for no filter
+"""
+def FilterKey(_Filter: dict):
+
+    if not _Filter:
+        return None
+
+    return Foundation.json.dumps({Key: sorted(Value) if isinstance(Value, list) else Value for Key, Value in _Filter.items()}, sort_keys = True)
+
+"""
+    Resolves a named Index spec (a key of PLATYPUS_FAISS_INDEX_SPECS) or a raw
+    faiss.index_factory string into a factory string sized for _NumVectors,
+    _NumTrain (default _NumVectors) is the number of vectors it is trained on
+"""
+def ResolveIndexSpec(_Spec: str, _Dimension: int, _NumVectors: int, _NumTrain: int = None) -> str:
+
+    Factory = Foundation.PLATYPUS_FAISS_INDEX_SPECS.get(_Spec, _Spec)
+    NumTrain = _NumVectors if _NumTrain is None else _NumTrain
+    # ~4 * sqrt(N) inverted lists, keeping at least 39 training points per list
+    NList   = max(1, min(int(4 * Foundation.np.sqrt(max(_NumVectors, 1))), NumTrain // 39))
+    # ~8 dimensions per PQ sub-quantizer, PQM must divide the dimension
+    PQM     = max(M for M in range(1, max(_Dimension // 8, 1) + 1) if _Dimension % M == 0)
+
+    return Factory.format(NList = NList, PQM = PQM)
+
+"""
+    IVF Index of _Index (itself or under a pre-transform like OPQ), None if it has none
+"""
+def InvertedFileIndex(_Index):
+
+    try:
+        return Foundation.faiss.extract_index_ivf(_Index)
+    except RuntimeError:
+        return None
+
+"""
+    Whether _Index stores its vectors under their FAISS ids: an IVF Index keeps
+    them in its inverted lists, any other Index is wrapped in an IDMap2. An
+    IDMap2 over an IVF Index isn't, its id map is compacted by remove_ids while
+    the inverted lists keep the old positions.
+"""
+def IsKeyed(_Index) -> bool:
+
+    if isinstance(_Index, Foundation.faiss.IndexIDMap2):
+        return InvertedFileIndex(_Index.index) is None
+
+    return _Index is not None and InvertedFileIndex(_Index) is not None
+
+"""
+    FAISS ids of every vector of a keyed _Index, in storage order
+"""
+def StoredIDs(_Index):
+
+    if isinstance(_Index, Foundation.faiss.IndexIDMap2):
+        return Foundation.faiss.vector_to_array(_Index.id_map)
+
+    Lists   = InvertedFileIndex(_Index).invlists
+    IDs     = [Foundation.faiss.rev_swig_ptr(Lists.get_ids(List), Lists.list_size(List)).copy()
+               for List in range(Lists.nlist) if Lists.list_size(List) > 0]
+
+    return Foundation.np.concatenate(IDs) if IDs else Foundation.np.empty(0, dtype = Foundation.np.int64)
+
+"""
+    Creates an _id keyed FAISS Index for _Spec (see IsKeyed) and, if it needs
+    training, trains it on a random sample of at most _TrainSampleSize rows of
+    _Vectors. _NumVectors is the final size of the Index if _Vectors are only its first rows.
+"""
+def CreateIndex(_Spec: str, _Vectors, _TrainSampleSize: int = Foundation.PLATYPUS_INDEX_TRAIN_SAMPLE_SIZE, _NumVectors: int = None):
+
+    Dimension   = _Vectors.shape[1]
+    NumVectors  = max(len(_Vectors), _NumVectors or 0)
+    Factory     = ResolveIndexSpec(_Spec, Dimension, NumVectors, min(len(_Vectors), _TrainSampleSize))
+    Index       = Foundation.faiss.index_factory(Dimension, Factory, Foundation.faiss.METRIC_L2)
+
+    # IVF Indices add & remove by id natively
+    if InvertedFileIndex(Index) is None:
+        Index = Foundation.faiss.index_factory(Dimension, "IDMap2," + Factory, Foundation.faiss.METRIC_L2)
+
+    if not Index.is_trained:
+
+        Sample = _Vectors
+
+        if len(_Vectors) > _TrainSampleSize:
+            Sample = _Vectors[Foundation.np.sort(Foundation.np.random.default_rng(0).choice(len(_Vectors), _TrainSampleSize, replace = False))]
+
+        Index.train(Foundation.np.ascontiguousarray(Sample))
+
+    return Index
 
 class FAISSIndexer(object):
 
-    def __init__(self, 
-                 _Vectorizer: ChunkVectorizer, 
-                 _Debug: bool, **kwargs):
-        
+    """
+        Args:
+            _Vectorizer         : ChunkVectorizer used to Embed Documents & queries, None for an
+                                  Index built with BuildIndicesFromVectorized & searched by vector.
+            _Debug              : Debug Flag.
+            _IndexSpec          : Key of PLATYPUS_FAISS_INDEX_SPECS or a faiss.index_factory string.
+            _SearchParameters   : Query time knobs, e.g. {"nprobe": 16} or {"efSearch": 64}.
+            _QueryCacheSize     : Number of normalized query Embeddings kept by Search, 0 disables it.
+            _ResultCacheSize    : Number of (query, K) results kept by Search, 0 disables it.
+            _Directory          : Directory the Index, Metadata & deltas are saved in & loaded from.
+    """
+    def __init__(self,
+                 _Vectorizer: ChunkVectorizer,
+                 _Debug: bool,
+                 _IndexSpec: str = Foundation.PLATYPUS_DEFAULT_INDEX_SPEC,
+                 _SearchParameters: dict = None,
+                 _QueryCacheSize: int = Foundation.PLATYPUS_QUERY_CACHE_SIZE,
+                 _ResultCacheSize: int = Foundation.PLATYPUS_RESULT_CACHE_SIZE,
+                 _Directory: str = Foundation.PLATYPUS_UTILS_DIRECTORY, **kwargs):
+
         # Embedder
-        self.EmbeddingEngine    = _Vectorizer.ChunkEmbedder
-        # Indexer
-        self.FAISSIndex         = Foundation.faiss.IndexFlatL2(self.EmbeddingEngine.STModel.get_sentence_embedding_dimension())
+        self.EmbeddingEngine    = _Vectorizer.ChunkEmbedder if _Vectorizer is not None else None
+        # Indexer, vectors are keyed by DocumentID(_id), created & trained once there are vectors
+        self.FAISSIndex         = None
+        self.IndexSpec          = _IndexSpec
+        self.SearchParameters   = dict(_SearchParameters or {})
         # ChunkVectorizer
         self.Vectorizer         = _Vectorizer
         # Required Keys in Document
         self.RequiredKeys       = ["_id", "URL", "Summary", "Title"]
-        # List to store Metadata
-        self.Metadata           = []
-        # List to store Embeddings
-        self.StackedEmbeddings  = []
+        # Metadata keyed by FAISS id, a dict or a read-only MetadataStore after LoadIndices
+        self.Metadata           = {}
+        # Whether FAISSIndex is memory-mapped (read-only) from IndexPath
+        self.MemoryMapped       = False
         # Debug Flag
         self.Debug              = _Debug
+        # Generation of the Index, bumped whenever its search results may change
+        self.Version            = 0
+        # Normalized query Embeddings keyed by query, results keyed by (Version, query, K)
+        self.QueryCache         = LRUCache(_QueryCacheSize)
+        self.ResultCache        = LRUCache(_ResultCacheSize)
+        # Filtered search: ID selectors keyed by (Version, FilterKey) & (Version, FilterColumns, positions' rows, id map)
+        self.SelectorCache      = LRUCache(Foundation.PLATYPUS_SELECTOR_CACHE_SIZE)
+        self.FilterState        = None
+        # Held while the Index is searched, modified or written, so a LiveIndexer can Upsert while it is served
+        self.Lock               = threading.RLock()
+
+        self.Directory          = _Directory
+        self.IndexPath          = Foundation.os.path.join(_Directory, Foundation.PLATYPUS_FAISS_INDEX_FILE)
+        self.MetadataPath       = Foundation.os.path.join(_Directory, Foundation.PLATYPUS_METADATA_STORE)
+        # IndexMetadata.npy written by earlier versions, read if there's no MetadataStore
+        self.LegacyMetadataPath = Foundation.os.path.join(_Directory, Foundation.PLATYPUS_METADATA_FILE)
+        self.DeltaDirectory     = Foundation.os.path.join(_Directory, Foundation.PLATYPUS_DELTA_DIRECTORY)
 
         if _Debug:
-            print("[Platypus][DB]: Initialized Indexer Instance")
+            Log.debug("Initialized Indexer Instance")
 
     """
         Builds the FAISS index and collects metadata from a list of documents,
         then saves them to files.
 
+        Documents are processed in blocks of _BlockSize, every block is chunked
+        first and all of its chunks are encoded in batches of _BatchSize, then
+        reduced back to one mean vector per document. The vectors are added
+        while holding Lock, a new Index is built aside & swapped in.
+
         Args:
             _Documents: A list of document dictionaries.
                         Each dictionary is expected to have keys: "_id", "URL", "Summary", "Title".
+            _BatchSize: Number of chunks per forward pass of the Embedder.
+            _BlockSize: Number of documents chunked & encoded together.
     """
-    def BuildIndices(self, _Documents):
+    def BuildIndices(self, _Documents,
+                     _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE,
+                     _BlockSize: int = Foundation.PLATYPUS_BUILD_BLOCK_SIZE):
+
+        if self.Vectorizer is None:
+            Log.warning("BuildIndices needs a Vectorizer, use BuildIndicesFromVectorized without one!")
+            return
+
+        # Embeddings of this build only, one array per block
+        StackedEmbeddings       = []
+        StackedIDs              = []
+        StackedMetadata         = []
+        Block                   = []
+        Seen                    = set()
+        NumEmbedded             = 0
+        StartTime               = Foundation.time.perf_counter()
 
         # ----- Process Documents -----
         for i, Document in enumerate(_Documents):
 
-            # Document shouldn't be None
-            if Document is None:
-                print(f"[Platypus][SSIndexer]: Document at index({i}) is None!")
-            # Document should be a dict
-            if not isinstance(Document, dict):
-                print(f"[Platypus][SSIndexer]: Document at index({i}) is not a dict!")
-            # Document should have all the RequiredKeys
-            if not all (key in Document.keys() for key in self.RequiredKeys):
-                print(f"[Platypus][SSIndexer]: Document at index ({i}) doesn't have one or more of the {self.RequiredKeys} keys!")
-
-            # Concetenate Title & Summary
-            ConcatenatedText = Document["Title"] + Document["Summary"]
-            # Convert Title & Summary into Vectorized Chunks
-            VectorizedChunks = self.Vectorizer.Vectorize(ConcatenatedText)
-
-            if VectorizedChunks is not None:
-
-                # Average all the Chunks (IN THIS CASE it is just 2-3 vectors)
-                VectorizedChunks = Foundation.np.mean(VectorizedChunks.VectorizedChunk, axis = 0)
-                # Append the Embeddings to StackedEmbeddings
-                self.StackedEmbeddings.append(VectorizedChunks)
-                # Metadata is a dict if {"Title" & "URL"}
-                self.Metadata.append({"Title": Document["Title"], "URL": Document["URL"]})
-            
-            else:
-                print(f"[Platypus][SSIndexer]: No valid vectors generated for document at index({i}). Skipping.")
-        
+            if not self.__IsValidDocument(Document, i):
+                continue
+
+            # _id should be unique within a build
+            if Document["_id"] in Seen:
+                Log.warning(f"Document at index({i}) has a duplicate _id ({Document['_id']}). Skipping.")
+                continue
+
+            Seen.add(Document["_id"])
+            Block.append((i, Document))
+
+            if len(Block) >= _BlockSize:
+                NumEmbedded += self.__EmbedBlock(Block, _BatchSize, StackedEmbeddings, StackedIDs, StackedMetadata)
+                Block = []
+
+        if Block:
+            NumEmbedded += self.__EmbedBlock(Block, _BatchSize, StackedEmbeddings, StackedIDs, StackedMetadata)
+
+        ElapsedTime = Foundation.time.perf_counter() - StartTime
+
         if self.Debug:
-            print("[Platypus][SSIndexer]: Embedded Documents!")
+            Log.debug(f"Embedded {NumEmbedded} Documents in {ElapsedTime:.2f}s ({NumEmbedded / max(ElapsedTime, 1e-9):.2f} docs/sec)")
+
+            if self.Vectorizer is not None and self.Vectorizer.Cache is not None:
+                Log.debug(f"Embedding cache {self.Vectorizer.Cache.Stats()}")
 
         # ----- Append these Embeddings to Indexer -----
-        if not self.StackedEmbeddings:
-            print(f"[Platypus][SSIndexer]: No Embeddings were Generated to add to Index!")
+        if not StackedEmbeddings:
+            Log.warning(f"No Embeddings were Generated to add to Index!")
+            return
 
         # Vertically stack them
-        self.StackedEmbeddings = Foundation.np.vstack(self.StackedEmbeddings)
+        StackedEmbeddings   = Foundation.np.vstack(StackedEmbeddings)
+        StackedIDs          = Foundation.np.concatenate(StackedIDs)
         # Normalize the StackedEmbeddings
-        Foundation.faiss.normalize_L2(self.StackedEmbeddings)
-        # Add to Indexer
-        self.FAISSIndex.add(self.StackedEmbeddings)
-        
+        Foundation.faiss.normalize_L2(StackedEmbeddings)
+
+        with self.Lock:
+            # Indices written before vectors were keyed by _id are rebuilt from scratch
+            Rebuild = self.FAISSIndex is None or not IsKeyed(self.FAISSIndex)
+
+        # Add to Indexer (training it on a sample first if required)
+        if Rebuild:
+
+            Staging = self.__Staging()
+
+            if not Staging.__AddVectors(StackedEmbeddings, StackedIDs, StackedMetadata):
+                return
+
+            self.__Swap(Staging)
+
+        else:
+
+            with self.Lock:
+                if not self.__AddVectors(StackedEmbeddings, StackedIDs, StackedMetadata):
+                    return
+
         if self.Debug:
-            print(f"[Platypus][SSIndexer]: Index built with {self.FAISSIndex.ntotal}")
+            Log.debug(f"Index built with {self.FAISSIndex.ntotal}")
 
         # ------- Save Indices and Metadata to File -----
-        try: 
-
-            Foundation.os.makedirs(Foundation.PLATYPUS_UTILS_DIRECTORY, exist_ok=True)
-            # Save Indices & Metadata
-            Foundation.faiss.write_index(self.FAISSIndex, Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_FAISS_INDEX_FILE))
-            Foundation.np.save(Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_METADATA_FILE), self.Metadata)
-            
-            print(f"[Platypus][SSIndexer]: Written Indices & Metadata to Directory {Foundation.PLATYPUS_UTILS_DIRECTORY}")
-        
+        self.SaveIndices()
+
+    """
+        Builds the FAISS index from the full-text chunk Embeddings stored in
+        ArxivVectorized, without loading a model, then saves it.
+
+        The collection is streamed with a projection of the Embedding fields &
+        a large cursor batch size, the WholeEmbeddings of a cursor batch are
+        decoded together (as views of their BSON buffers, whatever their codec)
+        & mean pooled into one vector per document. Title & URL are
+        joined from the Arxiv collection per block & vectors are added to the
+        Index a block at a time, so memory is bounded by the block. Trained
+        Index specs first buffer up to PLATYPUS_INDEX_TRAIN_SAMPLE_SIZE vectors
+        to train on. The Index is built aside & swapped in once complete, the
+        current one keeps being searched meanwhile.
+
+        Args:
+            _DBManager  : MongoDBManager holding the Arxiv & ArxivVectorized collections.
+            _BatchSize  : Cursor batch size (Documents per round trip).
+            _BlockSize  : Number of document vectors added to the Index at once.
+
+        Returns:
+            Number of Documents Indexed
+    """
+    def BuildIndicesFromVectorized(self, _DBManager,
+                                   _BatchSize: int = Foundation.PLATYPUS_VECTORIZED_CURSOR_BATCH_SIZE,
+                                   _BlockSize: int = Foundation.PLATYPUS_BUILD_BLOCK_SIZE):
+
+        Vectorized  = _DBManager.DB[_DBManager.CollectionArxivPDFVectorized]
+        Arxiv       = _DBManager.DB[_DBManager.CollectionArxiv]
+        Cursor      = Vectorized.find({}, {"WholeEmbedding": 1, "dtype": 1, "shape": 1, "codec": 1, "scale": 1}, batch_size = _BatchSize)
+        # Used to size the inverted lists of IVF specs for the whole collection
+        NumExpected = Vectorized.estimated_document_count()
+        Staging     = self.__Staging()
+
+        Block       = []
+        Pending     = []
+        Dimension   = None
+        NumIndexed  = 0
+        NumSkipped  = 0
+        StartTime   = Foundation.time.perf_counter()
+
+        for Document in Cursor:
+
+            try:
+                Embedding = EmbeddingView(Document)
+            except Exception as e:
+                Log.warning(f"Can't decode the Embedding of {Document.get('_id')} ({e}). Skipping.")
+                NumSkipped += 1
+                continue
+
+            Dimension = Dimension or Embedding.shape[1]
+
+            if Embedding.shape[0] == 0 or Embedding.shape[1] != Dimension:
+                Log.warning(f"Embedding of {Document['_id']} has shape {Embedding.shape}, expected (n, {Dimension}). Skipping.")
+                NumSkipped += 1
+                continue
+
+            Pending.append(Document)
+
+            if len(Pending) < _BatchSize:
+                continue
+
+            # Only the pooled vectors & Hashes identifying the stored Embeddings are kept
+            Block.extend(self.__PoolVectorized(Pending))
+            Pending = []
+
+            # Untrained Indices wait for a full training sample
+            Limit = _BlockSize if Staging.FAISSIndex is not None else max(_BlockSize, Foundation.PLATYPUS_INDEX_TRAIN_SAMPLE_SIZE)
+
+            if len(Block) >= Limit:
+                NumIndexed += Staging.__AddVectorizedBlock(Block, Arxiv, NumExpected)
+                Block = []
+
+        Block.extend(self.__PoolVectorized(Pending))
+
+        if Block:
+            NumIndexed += Staging.__AddVectorizedBlock(Block, Arxiv, NumExpected)
+
+        ElapsedTime = Foundation.time.perf_counter() - StartTime
+
+        Log.info(f"Indexed {NumIndexed} stored Embeddings in {ElapsedTime:.2f}s "
+                 f"({NumIndexed / max(ElapsedTime, 1e-9):.2f} docs/sec), {NumSkipped} skipped")
+
+        if NumIndexed == 0:
+            Log.warning(f"No Embeddings were found in {_DBManager.CollectionArxivPDFVectorized} to add to Index!")
+            return 0
+
+        self.__Swap(Staging)
+        self.SaveIndices()
+
+        return NumIndexed
+
+    """
+        Embeds new or changed Documents and adds them to the Index, replacing
+        any previous vector with the same _id. Unchanged Documents (same Title
+        & Summary) are not re-embedded. The change is persisted as a small
+        delta next to the saved Index instead of rewriting it.
+
+        Args:
+            _Documents: Iterable of document dictionaries with the RequiredKeys.
+            _BatchSize: Number of chunks per forward pass of the Embedder.
+
+        Returns:
+            Number of Documents Embedded
+    """
+    def Upsert(self, _Documents, _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE):
+
+        if self.Vectorizer is None:
+            Log.warning("Upsert needs a Vectorizer to Embed Documents!")
+            return 0
+
+        if self.FAISSIndex is not None and not IsKeyed(self.FAISSIndex):
+            Log.warning("Loaded Index is not keyed by _id, rebuild it with BuildIndices before Upsert!")
+            return 0
+
+        Changed = {}
+
+        for i, Document in enumerate(_Documents):
+
+            if not self.__IsValidDocument(Document, i):
+                continue
+
+            ID      = DocumentID(Document["_id"])
+            Hash    = DocumentHash(Document)
+
+            if ID in self.Metadata and self.Metadata[ID].get("Hash") == Hash:
+                continue
+
+            # Last occurence of an _id wins
+            Changed[ID] = (i, Document)
+
+        if not Changed:
+            if self.Debug:
+                Log.debug("Upsert found no new or changed Documents")
+            return 0
+
+        StackedEmbeddings       = []
+        StackedIDs              = []
+        StackedMetadata         = []
+        Block                   = list(Changed.values())
+        NumEmbedded             = 0
+
+        for Begin in range(0, len(Block), Foundation.PLATYPUS_BUILD_BLOCK_SIZE):
+            NumEmbedded += self.__EmbedBlock(Block[Begin:Begin + Foundation.PLATYPUS_BUILD_BLOCK_SIZE], _BatchSize,
+                                             StackedEmbeddings, StackedIDs, StackedMetadata)
+
+        if not StackedEmbeddings:
+            return 0
+
+        Vectors = Foundation.np.vstack(StackedEmbeddings)
+        IDs     = Foundation.np.concatenate(StackedIDs)
+        Foundation.faiss.normalize_L2(Vectors)
+
+        # Only adding is done under the Lock, searches go on while Documents are Embedded
+        with self.Lock:
+
+            if not self.__AddVectors(Vectors, IDs, StackedMetadata):
+                return 0
+
+            self.__PersistDelta(IDs, Vectors, Foundation.np.empty(0, dtype = Foundation.np.int64))
+
+        if self.Debug:
+            Log.debug(f"Upserted {NumEmbedded} Documents, Index size: {self.FAISSIndex.ntotal}")
+
+        return NumEmbedded
+
+    """
+        Removes Documents from the Index by their MongoDB _id
+
+        Args:
+            _IDs: Iterable of MongoDB _id values.
+
+        Returns:
+            Number of Documents Removed
+    """
+    def Remove(self, _IDs):
+
+        if not IsKeyed(self.FAISSIndex):
+            Log.warning("There's no Index keyed by _id to Remove from!")
+            return 0
+
+        IDs = Foundation.np.array([ID for ID in {DocumentID(_ID) for _ID in _IDs} if ID in self.Metadata],
+                                  dtype = Foundation.np.int64)
+
+        if len(IDs) == 0:
+            return 0
+
+        with self.Lock:
+
+            if not self.__RemoveIDs(IDs):
+                return 0
+
+            Dimension = self.FAISSIndex.d
+            self.__PersistDelta(Foundation.np.empty(0, dtype = Foundation.np.int64),
+                                Foundation.np.empty((0, Dimension), dtype = Foundation.np.float32),
+                                IDs)
+
+        if self.Debug:
+            Log.debug(f"Removed {len(IDs)} Documents, Index size: {self.FAISSIndex.ntotal}")
+
+        return len(IDs)
+
+    """
+        Sets query time knobs of the Index (e.g. nprobe for IVF, efSearch for HNSW),
+        they are remembered and applied again whenever the Index is rebuilt or loaded
+
+        Args:
+            **_Parameters: faiss.ParameterSpace parameter names & values.
+    """
+    def SetSearchParameters(self, **_Parameters):
+
+        self.SearchParameters.update(_Parameters)
+
+        if self.FAISSIndex is None:
+            return
+
+        self.__Invalidate()
+
+        ParameterSpace = Foundation.faiss.ParameterSpace()
+
+        for Name, Value in self.SearchParameters.items():
+
+            try:
+                ParameterSpace.set_index_parameter(self.FAISSIndex, Name, Value)
+            except Exception:
+                if self.Debug:
+                    Log.debug(f"Search parameter {Name} doesn't apply to the {self.IndexSpec} Index, ignoring it")
+
+    """
+        Searches _Queries, answering repeated (query, K) pairs from ResultCache.
+        The remaining queries are encoded in one forward pass (minus the ones
+        in QueryCache) & searched in one call.
+
+        Args:
+            _Queries: list of natural language queries.
+            _K      : Number of results, one for every query or a list with one per query.
+            _Filter : Metadata filter (see FilterColumns), one for every query or a list with one per query.
+
+        Returns:
+            list (one per query) of lists of dicts {Title, URL, _id, Distance}, nearest first
+    """
+    def Search(self, _Queries: list, _K = Foundation.PLATYPUS_SEARCH_DEFAULT_K, _Filter = None):
+
+        with Metrics.Timer("search_seconds"):
+            Results = self.__Search(_Queries, _K, _Filter)
+
+        Metrics.Increment("search_queries_total", len(_Queries))
+
+        return Results
+
+    def __Search(self, _Queries: list, _K, _Filter):
+
+        Version = self.Version
+        Ks      = _K if isinstance(_K, list) else [_K] * len(_Queries)
+        Filters = _Filter if isinstance(_Filter, list) else [_Filter] * len(_Queries)
+        Keys    = [(Version, Query, K, FilterKey(Filter)) for Query, K, Filter in zip(_Queries, Ks, Filters)]
+        Results = [self.ResultCache.Get(Key) for Key in Keys]
+        Missing = list(dict.fromkeys(Key for Key, Result in zip(Keys, Results) if Result is None))
+
+        if Missing:
+
+            Vectors = dict(zip(Missing, self.EncodeQueries([Query for _, Query, _, _ in Missing])))
+            Groups  = {}
+            Found   = {}
+
+            for Key, Filter in zip(Keys, Filters):
+                if Key in Vectors:
+                    Groups.setdefault(Key[3], (Filter, {}))[1][Key] = None
+
+            # One search per distinct filter at its largest missing K, trimmed per query
+            for Filter, Group in Groups.values():
+
+                Group   = list(Group)
+                Rows    = self.SearchVectors(Foundation.np.vstack([Vectors[Key] for Key in Group]), max(Key[2] for Key in Group), Filter)
+                Found.update({Key: Row[:Key[2]] for Key, Row in zip(Group, Rows)})
+
+            for Key, Result in Found.items():
+                self.ResultCache.Put(Key, Result)
+
+            Results = [Found[Key] if Result is None else Result for Key, Result in zip(Keys, Results)]
+
+        # Cached rows are shared, callers get their own copies
+        return [[dict(Match) for Match in Result] for Result in Results]
+
+    """
+        Normalized float32 Embeddings of _Queries, encoding only the ones missing from QueryCache
+    """
+    def EncodeQueries(self, _Queries: list):
+
+        Cached  = [self.QueryCache.Get(Query) for Query in _Queries]
+        Missing = list(dict.fromkeys(Query for Query, Vector in zip(_Queries, Cached) if Vector is None))
+
+        if Missing:
+
+            if self.EmbeddingEngine is None:
+                raise RuntimeError("Searching by query needs a Vectorizer, use SearchVectors without one")
+
+            with Metrics.Timer("query_encode_seconds"):
+                Vectors = Foundation.np.array(self.EmbeddingEngine.STModel.encode(Missing), dtype = Foundation.np.float32)
+
+            Foundation.faiss.normalize_L2(Vectors)
+            Encoded = dict(zip(Missing, Vectors))
+
+            for Query, Vector in Encoded.items():
+                self.QueryCache.Put(Query, Vector)
+
+            Cached = [Encoded[Query] if Vector is None else Vector for Query, Vector in zip(_Queries, Cached)]
+
+        return Foundation.np.ascontiguousarray(Foundation.np.vstack(Cached), dtype = Foundation.np.float32)
+
+    """
+        Hit ratios of the query Embedding & result caches
+    """
+    def CacheStats(self) -> dict:
+
+        return {"Version": self.Version, "QueryCache": self.QueryCache.Stats(), "ResultCache": self.ResultCache.Stats()}
+
+    """
+        Searches normalized query _Vectors in one call
+
+        With a _Filter only the vectors whose Metadata matches it are searched:
+        the filter's bitmap over the Index (cached per Version) is handed to
+        FAISS as an ID selector, so non matching vectors are skipped during
+        the search instead of being filtered out of its results.
+
+        Returns:
+            list (one per vector) of lists of dicts {Title, URL, _id, Distance}, nearest first
+    """
+    def SearchVectors(self, _Vectors, _K: int = Foundation.PLATYPUS_SEARCH_DEFAULT_K, _Filter: dict = None):
+
+        with self.Lock:
+
+            if self.FAISSIndex is None or self.FAISSIndex.ntotal == 0:
+                return [[] for _ in range(len(_Vectors))]
+
+            if _Filter:
+
+                Parameters, IDMap = self.__FilterParameters(_Filter)
+
+                if IDMap is None:
+                    with Metrics.Timer("index_search_seconds"):
+                        Distances, IDs = self.FAISSIndex.search(_Vectors, _K, params = Parameters)
+
+                else:
+                    with Metrics.Timer("index_search_seconds"):
+                        # The inner Index is searched by position, positions map onto FAISS ids
+                        Distances, Positions = self.FAISSIndex.index.search(_Vectors, _K, params = Parameters)
+
+                    IDs = Foundation.np.where(Positions >= 0, IDMap[Foundation.np.maximum(Positions, 0)], -1)
+                Metrics.Increment("filtered_search_queries_total", len(_Vectors))
+
+            else:
+                with Metrics.Timer("index_search_seconds"):
+                    Distances, IDs = self.FAISSIndex.search(_Vectors, _K)
+
+            Results = []
+
+            for RowDistances, RowIDs in zip(Distances.tolist(), IDs.tolist()):
+
+                Row = []
+
+                # FAISS pads with -1 when there are fewer than _K results
+                for Distance, ID in zip(RowDistances, RowIDs):
+
+                    Metadata = self.Metadata.get(ID) if ID >= 0 else None
+
+                    if Metadata is None:
+                        continue
+
+                    Row.append({"Title": Metadata["Title"], "URL": Metadata["URL"], "_id": Metadata.get("_id"), "Distance": Distance})
+
+                Results.append(Row)
+
+        return Results
+
+    """
+        Writes the whole Index & Metadata to Directory and
+        drops the deltas they now include
+
+        Returns:
+            True if written successfully, False otherwise.
+    """
+    def SaveIndices(self):
+
+        # A LiveIndexer may be adding to the Index meanwhile
+        with self.Lock:
+
+            try:
+
+                Foundation.os.makedirs(self.Directory, exist_ok=True)
+                # Write the Index next to the one that may be memory-mapped, then swap it in
+                Foundation.faiss.write_index(self.FAISSIndex, self.IndexPath + ".tmp")
+                Foundation.os.replace(self.IndexPath + ".tmp", self.IndexPath)
+                # Save Metadata
+                MetadataStore.Write(self.MetadataPath, self.Metadata if isinstance(self.Metadata, dict) else self.Metadata.ToDict())
+
+                for DeltaPath in self.__DeltaPaths():
+                    Foundation.os.remove(DeltaPath)
+
+                if Foundation.os.path.exists(self.LegacyMetadataPath):
+                    Foundation.os.remove(self.LegacyMetadataPath)
+
+                Log.info(f"Written Indices & Metadata to Directory {self.Directory}")
+                return True
+
+            except Exception as e:
+                Log.error(f"Writing Indices & Metadata Failed! ({e})")
+                return False
+
+    """
+        Checks a Document before it is Embedded, printing the reason if it is invalid
+    """
+    def __IsValidDocument(self, _Document, _Position: int):
+
+        # Document shouldn't be None
+        if _Document is None:
+            Log.warning(f"Document at index({_Position}) is None!")
+            return False
+        # Document should be a dict
+        if not isinstance(_Document, dict):
+            Log.warning(f"Document at index({_Position}) is not a dict!")
+            return False
+        # Document should have all the RequiredKeys
+        if not all (key in _Document.keys() for key in self.RequiredKeys):
+            Log.warning(f"Document at index ({_Position}) doesn't have one or more of the {self.RequiredKeys} keys!")
+            return False
+
+        return True
+
+    """
+        Embeds a Block of (index, Document) pairs in one batched pass and
+        appends the per document means, FAISS ids & Metadata to _Embeddings, _IDs & _Metadata
+
+        Returns:
+            Number of Documents Embedded
+    """
+    def __EmbedBlock(self, _Block: list, _BatchSize: int, _Embeddings: list, _IDs: list, _Metadata: list):
+
+        # Concetenate Title & Summary
+        Texts = [Document["Title"] + Document["Summary"] for _, Document in _Block]
+        # Convert Title & Summary into Vectorized Chunks & Average them per Document
+        Means, Counts = self.Vectorizer.VectorizeMeans(Texts, _BatchSize)
+
+        for (i, _), Count in zip(_Block, Counts):
+            if Count == 0:
+                Log.warning(f"No valid vectors generated for document at index({i}). Skipping.")
+
+        Valid = Counts > 0
+
+        if Valid.any():
+
+            IDs = []
+
+            for (_, Document), Count in zip(_Block, Counts):
+
+                if Count == 0:
+                    continue
+
+                IDs.append(DocumentID(Document["_id"]))
+                # Metadata is a dict if {"Title", "URL", "_id" & "Hash"}
+                _Metadata.append({"Title": Document["Title"], "URL": Document["URL"],
+                                             "_id": Document["_id"], "Hash": DocumentHash(Document), **FilterMetadata(Document)})
+
+            # Append the Embeddings to the build's
+            _Embeddings.append(Means[Valid])
+            _IDs.append(Foundation.np.array(IDs, dtype = Foundation.np.int64))
+
+        return int(Valid.sum())
+
+    """
+        Decodes the stored Embeddings of _Documents at once & mean pools them
+
+        Returns:
+            list of (_id, pooled float32 vector, Hash of the stored Embedding)
+    """
+    def __PoolVectorized(self, _Documents: list):
+
+        if not _Documents:
+            return []
+
+        Embeddings, Counts  = DecodeEmbeddings(_Documents)
+        Offsets             = Foundation.np.concatenate(([0], Foundation.np.cumsum(Counts)[:-1]))
+        Means               = Foundation.np.add.reduceat(Embeddings, Offsets, axis = 0) / Counts[:, None].astype(Foundation.np.float32)
+
+        return [(Document["_id"], Mean, hashlib.blake2b(Document["WholeEmbedding"], digest_size = 16).hexdigest())
+                for Document, Mean in zip(_Documents, Means.astype(Foundation.np.float32))]
+
+    """
+        Adds a Block of (_id, pooled vector, Hash) from ArxivVectorized to
+        the Index, joining Title & URL from the _Arxiv collection
+
+        Returns:
+            Number of Documents Added
+    """
+    def __AddVectorizedBlock(self, _Block: list, _Arxiv, _NumExpected: int):
+
+        Vectors = Foundation.np.vstack([Vector for _, Vector, _ in _Block])
+        IDs     = Foundation.np.array([DocumentID(ID) for ID, _, _ in _Block], dtype = Foundation.np.int64)
+        Records = {Record["_id"]: Record for Record in _Arxiv.find({"_id": {"$in": [ID for ID, _, _ in _Block]}}, {"Title": 1, "URL": 1, "Categories": 1, "Published": 1})}
+        Foundation.faiss.normalize_L2(Vectors)
+
+        if self.Debug and len(Records) < len(_Block):
+            Log.debug(f"{len(_Block) - len(Records)} of {len(_Block)} stored Embeddings have no {_Arxiv.name} record")
+
+        Metadata = [{"Title": Records.get(ID, {}).get("Title", ""), "URL": Records.get(ID, {}).get("URL", ""), "_id": ID, "Hash": Hash,
+                     **FilterMetadata(Records.get(ID, {}))}
+                    for ID, _, Hash in _Block]
+
+        if self.FAISSIndex is None:
+
+            try:
+                self.FAISSIndex = CreateIndex(self.IndexSpec, Vectors, _NumVectors = _NumExpected)
+            except Exception as e:
+                Log.warning(f"Creating {self.IndexSpec} Index Failed ({e}), falling back to Flat")
+                self.FAISSIndex = CreateIndex("Flat", Vectors)
+
+            self.SetSearchParameters()
+
+        if not self.__AddVectors(Vectors, IDs, Metadata):
+            return 0
+
+        if self.Debug:
+            Log.debug(f"Added a block of {len(_Block)} stored Embeddings, Index size: {self.FAISSIndex.ntotal}")
+
+        return len(_Block)
+
+    """
+        Adds normalized _Vectors under _IDs, replacing the vectors of _IDs already
+        in the Index. The Index is created from IndexSpec on the first call.
+
+        Returns:
+            True if added successfully, False otherwise.
+    """
+    def __AddVectors(self, _Vectors, _IDs, _Metadata: list):
+
+        self.__MakeWritable()
+
+        if self.FAISSIndex is None:
+
+            try:
+                self.FAISSIndex = CreateIndex(self.IndexSpec, _Vectors)
+            except Exception as e:
+                Log.warning(f"Creating {self.IndexSpec} Index Failed ({e}), falling back to Flat")
+                self.FAISSIndex = CreateIndex("Flat", _Vectors)
+
+            self.SetSearchParameters()
+
+        Existing = Foundation.np.array([ID for ID in _IDs.tolist() if ID in self.Metadata], dtype = Foundation.np.int64)
+
+        if len(Existing) > 0 and not self.__RemoveIDs(Existing):
+            return False
+
+        with Metrics.Timer("index_add_seconds"):
+            self.FAISSIndex.add_with_ids(_Vectors, _IDs)
+
+        Metrics.Increment("index_added_vectors_total", len(_IDs))
+        self.Metadata.update(zip(_IDs.tolist(), _Metadata))
+        self.__Invalidate()
+
+        return True
+
+    """
+        Removes _IDs (all of them in the Index) from the Index & Metadata
+
+        Returns:
+            True if removed successfully, False if the Index type can't remove vectors.
+    """
+    def __RemoveIDs(self, _IDs):
+
+        self.__MakeWritable()
+
+        try:
+            self.FAISSIndex.remove_ids(_IDs)
+        except RuntimeError as e:
+            Log.warning(f"{self.IndexSpec} Index can't remove or replace vectors, rebuild it with BuildIndices! ({e})")
+            return False
+
+        for ID in _IDs.tolist():
+            self.Metadata.pop(ID, None)
+
+        self.__Invalidate()
+
+        return True
+
+    """
+        Empty FAISSIndexer of the same spec, directory & search parameters an
+        Index is built or loaded into before it is swapped in
+    """
+    def __Staging(self):
+
+        return FAISSIndexer(self.Vectorizer, self.Debug, self.IndexSpec, self.SearchParameters, 0, 0, _Directory = self.Directory)
+
+    """
+        Replaces the Index & Metadata by the ones of _Staging at once
+    """
+    def __Swap(self, _Staging):
+
+        with self.Lock:
+            self.FAISSIndex     = _Staging.FAISSIndex
+            self.Metadata       = _Staging.Metadata
+            self.MemoryMapped   = _Staging.MemoryMapped
+            self.__Invalidate()
+
+    """
+        Bumps Version & drops the cached results of the previous one
+    """
+    def __Invalidate(self):
+
+        self.Version += 1
+        self.ResultCache.Clear()
+        self.SelectorCache.Clear()
+        self.FilterState = None
+
+    """
+        FAISS search parameters restricted to the vectors matching _Filter, with
+        the Index's own nprobe / efSearch. IDMap2 wrapped Indices are searched
+        by position of their inner Index (a bitmap over the positions), IVF
+        Indices by FAISS id (a set of the matching ids).
+
+        Returns:
+            (faiss.SearchParameters, FAISS id of every position of the inner Index or None for an IVF Index)
+    """
+    def __FilterParameters(self, _Filter: dict):
+
+        if not IsKeyed(self.FAISSIndex):
+            raise RuntimeError("Filtered search needs an Index keyed by _id, rebuild it with BuildIndices")
+
+        IVF = InvertedFileIndex(self.FAISSIndex)
+
+        if self.FilterState is None:
+
+            IDMap   = None if IVF is not None else Foundation.faiss.vector_to_array(self.FAISSIndex.id_map)
+            Columns = self.Metadata.FilterColumns() if isinstance(self.Metadata, MetadataStore) else FilterColumns.FromMetadata(self.Metadata)
+            # Row of every position in the Columns, every vector has Metadata
+            self.FilterState = (Columns, None if IDMap is None else Foundation.np.searchsorted(Columns.IDs, IDMap), IDMap)
+
+        Columns, Rows, IDMap    = self.FilterState
+        Key                     = FilterKey(_Filter)
+        Cached                  = self.SelectorCache.Get(Key)
+
+        if Cached is None and IDMap is None:
+
+            # The selector keeps its own copy of the ids
+            Matching    = Foundation.np.ascontiguousarray(Columns.IDs[Columns.Mask(_Filter)], dtype = Foundation.np.int64)
+            Selector    = Foundation.faiss.IDSelectorBatch(len(Matching), Foundation.faiss.swig_ptr(Matching))
+            Cached      = (Selector, None)
+            self.SelectorCache.Put(Key, Cached)
+
+        elif Cached is None:
+
+            # One bit per position of the inner Index, the bitmap has to outlive the selector
+            Bitmap      = Foundation.np.packbits(Columns.Mask(_Filter)[Rows], bitorder = "little")
+            Selector    = Foundation.faiss.IDSelectorBitmap(len(Rows), Foundation.faiss.swig_ptr(Bitmap))
+            Cached      = (Selector, Bitmap)
+            self.SelectorCache.Put(Key, Cached)
+
+        Selector    = Cached[0]
+        Inner       = IVF if IVF is not None else Foundation.faiss.downcast_index(self.FAISSIndex.index)
+
+        if isinstance(Inner, Foundation.faiss.IndexIVF):
+            Parameters = Foundation.faiss.SearchParametersIVF(sel = Selector, nprobe = Inner.nprobe)
+        elif isinstance(Inner, Foundation.faiss.IndexHNSW):
+            Parameters = Foundation.faiss.SearchParametersHNSW(sel = Selector, efSearch = Inner.hnsw.efSearch)
+        else:
+            Parameters = Foundation.faiss.SearchParameters(sel = Selector)
+
+        # The parameters only point at the selector
+        Parameters.Selector = Selector
+
+        # An IVF Index under a pre-transform (e.g. OPQ) gets them through the transform
+        if IVF is not None and isinstance(Foundation.faiss.downcast_index(self.FAISSIndex), Foundation.faiss.IndexPreTransform):
+            IVFParameters                   = Parameters
+            Parameters                      = Foundation.faiss.SearchParametersPreTransform(index_params = IVFParameters)
+            Parameters.Selector             = Selector
+            Parameters.IndexParameters      = IVFParameters
+
+        return Parameters, IDMap
+
+    """
+        Loads a memory-mapped Index into RAM & materializes a MetadataStore,
+        before they are modified
+    """
+    def __MakeWritable(self):
+
+        if self.MemoryMapped:
+
+            self.FAISSIndex     = Foundation.faiss.read_index(self.IndexPath)
+            self.MemoryMapped   = False
+            self.SetSearchParameters()
+
+        if not isinstance(self.Metadata, dict):
+            self.Metadata = self.Metadata.ToDict()
+
+    """
+        Sorted paths of the delta files written after the last SaveIndices
+    """
+    def __DeltaPaths(self):
+
+        if not Foundation.os.path.isdir(self.DeltaDirectory):
+            return []
+
+        return sorted(Foundation.os.path.join(self.DeltaDirectory, Name)
+                      for Name in Foundation.os.listdir(self.DeltaDirectory) if Name.endswith(".npz"))
+
+    """
+        Persists an Upsert/Remove as a delta file, if there's no saved Index yet or
+        too many deltas piled up, the whole Index is written instead
+    """
+    def __PersistDelta(self, _IDs, _Vectors, _Removed):
+
+        DeltaPaths = self.__DeltaPaths()
+
+        if not Foundation.os.path.exists(self.IndexPath) or len(DeltaPaths) >= Foundation.PLATYPUS_MAX_DELTA_FILES:
+            self.SaveIndices()
+            return
+
+        try:
+
+            Foundation.os.makedirs(self.DeltaDirectory, exist_ok = True)
+
+            Sequence    = int(Foundation.os.path.basename(DeltaPaths[-1])[6:-4]) + 1 if DeltaPaths else 0
+            DeltaPath   = Foundation.os.path.join(self.DeltaDirectory, f"Delta_{Sequence:08d}.npz")
+            Metadata    = Foundation.np.empty(len(_IDs), dtype = object)
+            Metadata[:] = [self.Metadata[ID] for ID in _IDs.tolist()]
+
+            # Write then rename, so a crash never leaves a partial delta behind
+            with open(DeltaPath + ".tmp", "wb") as File:
+                Foundation.np.savez(File, IDs = _IDs, Vectors = _Vectors, Removed = _Removed, Metadata = Metadata)
+
+            Foundation.os.replace(DeltaPath + ".tmp", DeltaPath)
+
+            if self.Debug:
+                Log.debug(f"Written delta {DeltaPath} ({len(_IDs)} upserted, {len(_Removed)} removed)")
+
         except Exception as e:
-            print(f"[Platypus][SSIndexer]: Writing Indices & Metadata Failed! ({e})")
+            Log.error(f"Writing delta Failed! ({e})")
+
+    """
+        Replays the delta files on top of the loaded Index & Metadata
+    """
+    def __ReplayDeltas(self):
+
+        DeltaPaths = self.__DeltaPaths()
+
+        for DeltaPath in DeltaPaths:
+
+            with Foundation.np.load(DeltaPath, allow_pickle = True) as Delta:
+
+                IDs     = Delta["IDs"]
+                Removed = Foundation.np.array([ID for ID in Delta["Removed"].tolist() if ID in self.Metadata],
+                                              dtype = Foundation.np.int64)
+
+                if len(Removed) > 0 and not self.__RemoveIDs(Removed):
+                    raise RuntimeError(f"can't replay {DeltaPath} on this Index")
+
+                if len(IDs) > 0 and not self.__AddVectors(Delta["Vectors"], IDs, list(Delta["Metadata"])):
+                    raise RuntimeError(f"can't replay {DeltaPath} on this Index")
+
+        if self.Debug and DeltaPaths:
+            Log.debug(f"Replayed {len(DeltaPaths)} deltas")
 
     """
         Loads the FAISS index and metadata from files.
 
+        Args:
+            _MemoryMap: Memory-map the Index file read-only instead of reading it
+                        into RAM, so processes searching the same Index share its
+                        pages. Falls back to reading it if there are unsaved deltas.
+
         Returns:
             True if loaded successfully, False otherwise.
     """
-    def LoadIndices(self):
+    def LoadIndices(self, _MemoryMap: bool = False):
 
-        IndexPath       = Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_FAISS_INDEX_FILE)
-        MetadataPath    = Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_METADATA_FILE)
+        IndexPath       = self.IndexPath
+        MetadataPath    = self.MetadataPath if Foundation.os.path.isdir(self.MetadataPath) else self.LegacyMetadataPath
 
         # ----- Loading Indices -----
         if Foundation.os.path.exists(IndexPath) and Foundation.os.path.exists(MetadataPath):
-            
-            print(f"[Platypus][SSIndexer]: Loading FAISS index from {IndexPath} and metadata from {MetadataPath}...")
-            
+
+            Log.info(f"Loading FAISS index from {IndexPath} and metadata from {MetadataPath}...")
+
+            if _MemoryMap and self.__DeltaPaths():
+                Log.warning("Index has unsaved deltas, reading it into RAM instead of memory-mapping it")
+                _MemoryMap = False
+
+            # Loaded aside & swapped in, searches never see a partly loaded Index
+            Staging = self.__Staging()
+
             try:
-                self.FAISSIndex = Foundation.faiss.read_index(IndexPath)
-                self.Metadata   = Foundation.np.load(MetadataPath, allow_pickle=True).tolist()
-                
+                if _MemoryMap:
+                    # IO_FLAG_MMAP_IFC maps every Index type, IO_FLAG_MMAP only the inverted lists of IVF Indices
+                    # (the two can't be combined)
+                    MMapFlag            = getattr(Foundation.faiss, "IO_FLAG_MMAP_IFC", Foundation.faiss.IO_FLAG_MMAP)
+                    Staging.FAISSIndex  = Foundation.faiss.read_index(IndexPath, MMapFlag | Foundation.faiss.IO_FLAG_READ_ONLY)
+                else:
+                    Staging.FAISSIndex  = Foundation.faiss.read_index(IndexPath)
+
+                Staging.MemoryMapped = _MemoryMap
+
+                if MetadataPath == self.MetadataPath:
+                    Staging.Metadata = MetadataStore(MetadataPath)
+                else:
+                    Staging.Metadata = Foundation.np.load(MetadataPath, allow_pickle=True).tolist()
+
+                # Indices written before vectors were keyed by _id are positional
+                if isinstance(Staging.Metadata, list):
+                    Staging.Metadata = dict(enumerate(Staging.Metadata))
+                else:
+                    Staging.__ReplayDeltas()
+
+                Staging.SetSearchParameters()
+                self.__Swap(Staging)
+
                 if self.Debug:
-                    print("[Platypus][SSIndexer]: Index and metadata loaded successfully.")
-                    print(f"[Platypus][SSIndexer]: Loaded FAISS Index size: {self.FAISSIndex.ntotal}, Loaded Metadata size: {len(self.Metadata)}")
-                
+                    Log.debug("Index and metadata loaded successfully.")
+                    Log.debug(f"Loaded FAISS Index size: {self.FAISSIndex.ntotal}, Loaded Metadata size: {len(self.Metadata)}")
+
                 return True
 
             except Exception as e:
-                print(f"[Platypus][SSIndexer]: Error loading index or metadata: {e}")
-                self.FAISSIndex = None
-                self.Metadata = []
+                Log.error(f"Error loading index or metadata: {e}")
+                self.__Swap(self.__Staging())
                 return False
         else:
-            print(f"[Platypus][SSIndexer]: Index or metadata file not found.")
+            Log.warning(f"Index or metadata file not found.")
             return False
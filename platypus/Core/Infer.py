@@ -1,96 +1,203 @@
 import platypus.Utils.Foundation as Foundation
 
+from platypus.Utils.Log import GetLogger
+
+import threading
+
+Log = GetLogger("Infer")
+
+# System Role Prompt
+SYSTEM_ROLE = \
+"""
+You are an Smart Research Paper Analyzer, Your
+Task is to Analyze the Keywords in this Research
+Paper then Formulate the best possible Query
+that articulates the overall interest of the research
+paper. The Query should be suitable for passing directly
+into REST API like Arxiv, ResearchGate etc.
+"""
+
+# Sampling parameters of every generate call
+SAMPLING = {
+    "do_sample"     : True,
+    "top_k"         : 50,
+    "top_p"         : 0.95,
+    "temperature"   : 0.7,
+}
+
+# Engines already loaded, keyed by (model name, cache directory)
+_Engines        = {}
+_EnginesLock    = threading.Lock()
+
+class InferenceEngine(object):
+
+    """
+        Loads a causal language model & its tokenizer once & formulates Queries
+        for many prompts at a time
+
+        Prompts are chat formatted, left padded & generated in batches of
+        _BatchSize with a single generate call per batch. Use InferenceEngine.Shared
+        to reuse the engine of a model across callers.
+
+        Attributes:
+        self.ModelName  =: Name of the language model
+        self.LastStats  =: {Prompts, NewTokens, Seconds, TokensPerSecond} of the last Generate
+
+        Args:
+            _ModelName  : Hugging Face model name.
+            _CacheDir   : Directory the model is downloaded into.
+            _Threads    : Number of CPU threads used by torch, None keeps torch's default.
+            _BatchSize  : Number of prompts per generate call.
+            _Debug      : Debug Flag.
+    """
+    def __init__(self,
+                 _ModelName: str = Foundation.PLATYPUS_DEFAULT_LANGUAGE_MODEL,
+                 _CacheDir: str = Foundation.PLATYPUS_LANGUAGE_MODEL_CACHE_DIRECTORY,
+                 _Threads: int = None,
+                 _BatchSize: int = Foundation.PLATYPUS_GENERATION_BATCH_SIZE,
+                 _Debug: bool = False, **kwargs):
+
+        if _Threads is not None:
+            Foundation.torch.set_num_threads(_Threads)
+
+        self.ModelName      = _ModelName
+        self.Threads        = _Threads
+        self.BatchSize      = _BatchSize
+        self.Debug          = _Debug
+        self.LastStats      = {}
+        # generate isn't safe to run concurrently on one model
+        self.Lock           = threading.Lock()
+
+        self.Model          = Foundation.AutoModelForCausalLM.from_pretrained(_ModelName, cache_dir = _CacheDir)
+        self.Model.eval()
+        # Decoder only models must be left padded to generate a batch
+        self.Tokenizer      = Foundation.AutoTokenizer.from_pretrained(_ModelName, cache_dir = _CacheDir, padding_side = "left")
+
+        if self.Tokenizer.pad_token is None:
+            self.Tokenizer.pad_token = self.Tokenizer.eos_token
+
+        if self.Debug:
+            Log.debug(f"Loaded {_ModelName} ({Foundation.torch.get_num_threads()} threads)")
+
+    """
+        Engine of _ModelName, loaded on the first call & reused afterwards.
+        Later calls get the engine as it was loaded, their _Threads & _BatchSize
+        are ignored (with a warning if they differ).
+    """
+    @staticmethod
+    def Shared(_ModelName: str = Foundation.PLATYPUS_DEFAULT_LANGUAGE_MODEL,
+               _CacheDir: str = Foundation.PLATYPUS_LANGUAGE_MODEL_CACHE_DIRECTORY, **kwargs):
+
+        with _EnginesLock:
+
+            if (_ModelName, _CacheDir) not in _Engines:
+                _Engines[(_ModelName, _CacheDir)] = InferenceEngine(_ModelName, _CacheDir, **kwargs)
+                return _Engines[(_ModelName, _CacheDir)]
+
+            Engine  = _Engines[(_ModelName, _CacheDir)]
+            Ignored = {Key: Value for Key, Value in kwargs.items()
+                       if Key in ("_Threads", "_BatchSize") and Value != getattr(Engine, Key[1:])}
+
+            if Ignored:
+                Log.warning(f"{_ModelName} is already loaded with {Engine.Threads} threads & batch size {Engine.BatchSize}, ignoring {Ignored}")
+
+            return Engine
+
+    """
+        Chat formatted prompt asking to formulate a Query for _Text
+    """
+    def FormatPrompt(self, _Text: str) -> str:
+
+        return self.Tokenizer.apply_chat_template([{"role": "system", "content": SYSTEM_ROLE},
+                                                   {"role": "user",   "content": _Text}],
+                                                  tokenize = False, add_generation_prompt = True)
+
+    """
+        Formulates a Query for every text of _Texts, in batches of BatchSize
+        prompts with one generate call each
+
+        Args:
+            _Texts          : list of texts (e.g. abstracts) to formulate Queries for.
+            _MaxNewTokens   : Maximum number of generated tokens per Query.
+            **kwargs        : Overrides of the SAMPLING parameters.
+
+        Returns:
+            list of generated Queries, one per text
+    """
+    def Generate(self, _Texts: list, _MaxNewTokens: int = Foundation.PLATYPUS_GENERATION_MAX_NEW_TOKENS, **kwargs) -> list:
+
+        Outputs     = []
+        NewTokens   = 0
+        StartTime   = Foundation.time.perf_counter()
+
+        for Begin in range(0, len(_Texts), self.BatchSize):
+
+            Prompts = [self.FormatPrompt(Text) for Text in _Texts[Begin:Begin + self.BatchSize]]
+            Inputs  = self.Tokenizer(Prompts, return_tensors = "pt", padding = True)
+
+            with self.Lock, Foundation.torch.inference_mode():
+                Tokens = self.Model.generate(**Inputs, max_new_tokens = _MaxNewTokens,
+                                             pad_token_id = self.Tokenizer.pad_token_id, **{**SAMPLING, **kwargs})
+
+            # With left padding every prompt ends at the same position, only the new tokens are decoded
+            Generated   = Tokens[:, Inputs["input_ids"].shape[1]:]
+            NewTokens  += int((Generated != self.Tokenizer.pad_token_id).sum())
+            Outputs    += self.Tokenizer.batch_decode(Generated, skip_special_tokens = True)
+
+        Seconds         = Foundation.time.perf_counter() - StartTime
+        self.LastStats  = {"Prompts": len(_Texts), "NewTokens": NewTokens, "Seconds": Seconds,
+                           "TokensPerSecond": NewTokens / max(Seconds, 1e-9)}
+
+        if self.Debug:
+            Log.debug(f"Generated {NewTokens} tokens for {len(_Texts)} prompts in {Seconds:.2f}s "
+                      f"({self.LastStats['TokensPerSecond']:.1f} tokens/sec)")
+
+        return Outputs
+
+    """
+        Formulates a Query for _Text, yielding the text as it is generated
+    """
+    def Stream(self, _Text: str, _MaxNewTokens: int = Foundation.PLATYPUS_GENERATION_MAX_NEW_TOKENS, **kwargs):
+
+        Inputs      = self.Tokenizer([self.FormatPrompt(_Text)], return_tensors = "pt")
+        Streamer    = Foundation.TextIteratorStreamer(self.Tokenizer, skip_prompt = True, skip_special_tokens = True)
+        Errors      = []
+
+        def Run():
+            try:
+                with self.Lock, Foundation.torch.inference_mode():
+                    self.Model.generate(**Inputs, max_new_tokens = _MaxNewTokens, streamer = Streamer,
+                                        pad_token_id = self.Tokenizer.pad_token_id, **{**SAMPLING, **kwargs})
+            except Exception as e:
+                # The stream is ended so the consumer isn't left waiting, the error is raised to it below
+                Errors.append(e)
+                Streamer.end()
+
+        Generator = threading.Thread(target = Run, daemon = True)
+        Generator.start()
+
+        yield from Streamer
+
+        Generator.join()
+
+        if Errors:
+            raise Errors[0]
+
 class Infer(object):
 
+    """
+        Formulates a Query for _Query with the shared InferenceEngine of _ModelName,
+        the model is loaded by the first Infer only
+
+        Attributes:
+        self.InferredText =: Generated Query
+    """
     def __init__(self,
                  _Query : str,
                  _ModelName : str = Foundation.PLATYPUS_DEFAULT_LANGUAGE_MODEL,
-                 _CacheDir : str = "Platypus_Cache", **kwargs):
+                 _CacheDir : str = Foundation.PLATYPUS_LANGUAGE_MODEL_CACHE_DIRECTORY, **kwargs):
 
-        # Initialize Model & Tokenizer
-        self.__Model        = Foundation.AutoModelForCausalLM.from_pretrained(_ModelName, cache_dir = _CacheDir)
-        self.__Tokenizer    = Foundation.AutoTokenizer.from_pretrained(_ModelName, cache_dir = _CacheDir)
+        self.Engine         = InferenceEngine.Shared(_ModelName, _CacheDir, **kwargs)
         self.ModelName      = _ModelName
         self.Query          = _Query
-
-        # System Role Prompt
-        self.__SystemRole = \
-        """
-        You are an Smart Research Paper Analyzer, Your
-        Task is to Analyze the Keywords in this Research
-        Paper then Formulate the best possible Query
-        that articulates the overall interest of the research
-        paper. The Query should be suitable for passing directly
-        into REST API like Arxiv, ResearchGate etc.            
-        """
-        # Prompt Template from Google
-        self.Prompt = [
-            {
-                "role"      : "system",
-                "content"   : self.__SystemRole
-            },
-            {
-                "role"      : "user", 
-                "content"   : self.Query
-            }
-        ]
-
-        chat_formatted_prompt = self.__Tokenizer.apply_chat_template(
-            self.Prompt,
-            tokenize=False,
-            add_generation_prompt=True
-        )
-
-        # 2. Tokenize the formatted prompt
-        inputs = self.__Tokenizer(chat_formatted_prompt, return_tensors="pt")
-
-        # 3. Generate the response using the model's generate method
-        #    Add generation parameters here
-        output_tokens = self.__Model.generate(
-            inputs["input_ids"],
-            attention_mask=inputs["attention_mask"], # Important for batched generation if you were doing it
-            max_new_tokens=64,
-            do_sample=True,
-            top_k=50,
-            top_p=0.95,
-            temperature=0.7,
-            pad_token_id=self.__Tokenizer.eos_token_id # Use eos_token as pad_token_id
-        )
-
-        # 4. Decode the generated tokens
-        #    Decode the whole output, then potentially strip the input prompt part
-        #    Or decode starting from the first generated token index if needed
-        #    For chat models, decoding the *entire* sequence and then slicing is often easier
-        decoded_output = self.__Tokenizer.decode(output_tokens[0], skip_special_tokens=True)
-
-        # The decoded_output contains the original prompt + the generated text.
-        # We need to extract only the generated response part.
-        # A simple way is to find where the assistant turn started in the original formatted prompt
-        # and take everything after that point in the decoded output.
-        # This requires knowing the exact structure added by apply_chat_template.
-        # A more robust way is to decode the generated tokens *after* the input length.
-
-        # Let's re-generate and decode just the new tokens
-        output_tokens_only_new = self.__Model.generate(
-            inputs["input_ids"],
-            attention_mask=inputs["attention_mask"],
-            max_new_tokens=1024,
-            do_sample=True,
-            top_k=50,
-            top_p=0.95,
-            temperature=0.7,
-            pad_token_id=self.__Tokenizer.eos_token_id # Use eos_token as pad_token_id
-        )
-
-        # The output_tokens_only_new tensor includes the input tokens.
-        # To get *only* the generated part, we need to decode from the token index
-        # that corresponds to the start of the generated text.
-        # This index is simply the length of the input tokens.
-        input_length = inputs["input_ids"].shape[1]
-        generated_tokens = output_tokens_only_new[:, input_length:]
-
-        # Decode *only* the generated tokens
-        self.InferredText = self.__Tokenizer.decode(generated_tokens[0], skip_special_tokens=True)
-
-        # --- End of Manual Generation ---
-       
\ No newline at end of file
+        self.InferredText   = self.Engine.Generate([_Query])[0]
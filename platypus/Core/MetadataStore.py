@@ -0,0 +1,304 @@
+import platypus.Utils.Foundation as Foundation
+
+import shutil
+
+class MetadataStore(object):
+
+    """
+        Read-only, memory-mapped Metadata of a FAISS Index
+
+        Metadata is stored column wise in a directory, every file is memory-mapped
+        so processes searching the same Index share its pages:
+
+            IDs.npy             =: sorted int64 FAISS ids
+            <Field>.offsets.npy =: uint64 offsets (len(IDs) + 1) into <Field>.blob
+            <Field>.blob        =: utf8 values of Field concatenated in id order
+            Fields.json         =: names of the Fields
+            Filter.*            =: FilterColumns of the filterable Fields
+
+        Behaves like the read side of a dict {FAISS id: {Field: value}}.
+
+        Attributes:
+        self.Directory =: Directory of the Store
+        self.Fields    =: Names of the stored Fields
+        self.IDs       =: Memory-mapped sorted FAISS ids
+    """
+    def __init__(self, _Directory: str):
+
+        self.Directory  = _Directory
+
+        with open(Foundation.os.path.join(_Directory, "Fields.json"), "r") as File:
+            self.Fields = Foundation.json.load(File)
+
+        self.IDs        = Foundation.np.load(Foundation.os.path.join(_Directory, "IDs.npy"), mmap_mode = "r")
+        self.Offsets    = {}
+        self.Blobs      = {}
+
+        # FilterColumns, loaded on first use
+        self.Filters    = None
+
+        for Field in self.Fields:
+
+            self.Offsets[Field] = Foundation.np.load(Foundation.os.path.join(_Directory, f"{Field}.offsets.npy"), mmap_mode = "r")
+            BlobPath            = Foundation.os.path.join(_Directory, f"{Field}.blob")
+            # np.memmap can't map an empty file
+            self.Blobs[Field]   = Foundation.np.memmap(BlobPath, dtype = Foundation.np.uint8, mode = "r") \
+                                  if Foundation.os.path.getsize(BlobPath) > 0 else Foundation.np.empty(0, dtype = Foundation.np.uint8)
+
+    """
+        Writes _Metadata ({FAISS id: {Field: value}}) as a Store in _Directory,
+        replacing the previous Store only once the new one is complete
+    """
+    @staticmethod
+    def Write(_Directory: str, _Metadata: dict):
+
+        IDs     = Foundation.np.array(sorted(_Metadata.keys()), dtype = Foundation.np.int64)
+        Fields  = list(dict.fromkeys(Field for Value in _Metadata.values() for Field in Value))
+        TempDir = _Directory + ".tmp"
+
+        shutil.rmtree(TempDir, ignore_errors = True)
+        Foundation.os.makedirs(TempDir)
+
+        Foundation.np.save(Foundation.os.path.join(TempDir, "IDs.npy"), IDs)
+
+        for Field in Fields:
+
+            Values  = [str(_Metadata[ID].get(Field, "")).encode("utf8") for ID in IDs.tolist()]
+            Offsets = Foundation.np.zeros(len(Values) + 1, dtype = Foundation.np.uint64)
+            Offsets[1:] = Foundation.np.cumsum([len(Value) for Value in Values])
+
+            Foundation.np.save(Foundation.os.path.join(TempDir, f"{Field}.offsets.npy"), Offsets)
+
+            with open(Foundation.os.path.join(TempDir, f"{Field}.blob"), "wb") as File:
+                File.write(b"".join(Values))
+
+        with open(Foundation.os.path.join(TempDir, "Fields.json"), "w") as File:
+            Foundation.json.dump(Fields, File)
+
+        FilterColumns.FromMetadata(_Metadata).Save(TempDir)
+
+        # Readers already mapping the old Store keep their (unlinked) pages
+        OldDir = _Directory + ".old"
+        shutil.rmtree(OldDir, ignore_errors = True)
+
+        if Foundation.os.path.isdir(_Directory):
+            Foundation.os.replace(_Directory, OldDir)
+
+        Foundation.os.replace(TempDir, _Directory)
+        shutil.rmtree(OldDir, ignore_errors = True)
+
+    """
+        Position of a FAISS id in the Store, None if it isn't stored
+    """
+    def Position(self, _ID):
+
+        Position = int(Foundation.np.searchsorted(self.IDs, _ID))
+
+        if Position < len(self.IDs) and self.IDs[Position] == _ID:
+            return Position
+
+        return None
+
+    """
+        Value of Field at Position
+    """
+    def Value(self, _Field: str, _Position: int) -> str:
+
+        Offsets = self.Offsets[_Field]
+        return self.Blobs[_Field][int(Offsets[_Position]):int(Offsets[_Position + 1])].tobytes().decode("utf8")
+
+    def __getitem__(self, _ID):
+
+        Position = self.Position(_ID)
+
+        if Position is None:
+            raise KeyError(_ID)
+
+        return {Field: self.Value(Field, Position) for Field in self.Fields}
+
+    def __contains__(self, _ID):
+
+        return self.Position(_ID) is not None
+
+    def __len__(self):
+
+        return len(self.IDs)
+
+    def __iter__(self):
+
+        return iter(self.IDs.tolist())
+
+    def get(self, _ID, _Default = None):
+
+        Position = self.Position(_ID)
+        return _Default if Position is None else {Field: self.Value(Field, Position) for Field in self.Fields}
+
+    def keys(self):
+
+        return self.IDs.tolist()
+
+    def items(self):
+
+        return ((ID, {Field: self.Value(Field, Position) for Field in self.Fields}) for Position, ID in enumerate(self.IDs.tolist()))
+
+    """
+        Materializes the Store into a writable dict
+    """
+    def ToDict(self) -> dict:
+
+        return dict(self.items())
+
+    """
+        FilterColumns of the Store, read from its Filter.* files (stores written
+        before they existed are scanned once)
+    """
+    def FilterColumns(self):
+
+        if self.Filters is None:
+            self.Filters = FilterColumns.FromMetadata(self) if not Foundation.os.path.exists(Foundation.os.path.join(self.Directory, "Filter.Published.npy")) \
+                           else FilterColumns.Load(self.Directory)
+
+        return self.Filters
+
+class FilterColumns(object):
+
+    """
+        Compact columns of the filterable Metadata, aligned with the sorted
+        FAISS ids of the Metadata:
+
+            Published       =: int32 days since 1970-01-01, -1 if unknown
+            Categories      =: names of the categories, CategoryCodes index them
+            CategoryCodes   =: uint16 category codes of every id, concatenated in id order
+            CategoryOffsets =: int64 offsets (len(IDs) + 1) into CategoryCodes
+
+        Mask() evaluates a filter over every id at once:
+
+            {"Categories": ["cs.LG", "stat.ML"],    =: any of the categories
+             "PublishedAfter": "2020-01-01",        =: published on or after
+             "PublishedBefore": "2023-01-01"}       =: published before
+    """
+    def __init__(self, _IDs, _Published, _Categories: list, _CategoryCodes, _CategoryOffsets):
+
+        self.IDs                = _IDs
+        self.Published          = _Published
+        self.Categories         = _Categories
+        self.CategoryIndex      = {Category: Code for Code, Category in enumerate(_Categories)}
+        self.CategoryCodes      = _CategoryCodes
+        self.CategoryOffsets    = _CategoryOffsets
+
+    """
+        Columns of _Metadata ({FAISS id: {Field: value}} or a MetadataStore),
+        Categories are space separated & Published starts with YYYY-MM-DD
+    """
+    @staticmethod
+    def FromMetadata(_Metadata):
+
+        IDs         = Foundation.np.array(sorted(_Metadata.keys()), dtype = Foundation.np.int64)
+        Published   = Foundation.np.full(len(IDs), -1, dtype = Foundation.np.int32)
+        Categories  = {}
+        Codes       = []
+        Offsets     = Foundation.np.zeros(len(IDs) + 1, dtype = Foundation.np.int64)
+
+        for i, ID in enumerate(IDs.tolist()):
+
+            Value   = _Metadata[ID]
+            Date    = str(Value.get("Published", ""))[:10]
+
+            try:
+                # An empty date would parse as NaT
+                if len(Date) == 10:
+                    Published[i] = Foundation.np.datetime64(Date, "D").astype(Foundation.np.int64)
+            except ValueError:
+                pass
+
+            for Category in str(Value.get("Categories", "")).split():
+                Codes.append(Categories.setdefault(Category, len(Categories)))
+
+            Offsets[i + 1] = len(Codes)
+
+        return FilterColumns(IDs, Published, list(Categories), Foundation.np.array(Codes, dtype = Foundation.np.uint16), Offsets)
+
+    @staticmethod
+    def Load(_Directory: str):
+
+        with open(Foundation.os.path.join(_Directory, "Filter.Categories.json"), "r") as File:
+            Categories = Foundation.json.load(File)
+
+        Load = lambda _Name: Foundation.np.load(Foundation.os.path.join(_Directory, f"Filter.{_Name}.npy"), mmap_mode = "r")
+
+        return FilterColumns(Foundation.np.load(Foundation.os.path.join(_Directory, "IDs.npy"), mmap_mode = "r"),
+                             Load("Published"), Categories, Load("CategoryCodes"), Load("CategoryOffsets"))
+
+    """
+        Writes the columns next to a MetadataStore in _Directory (sharing its IDs.npy)
+    """
+    def Save(self, _Directory: str):
+
+        Foundation.np.save(Foundation.os.path.join(_Directory, "Filter.Published.npy"), self.Published)
+        Foundation.np.save(Foundation.os.path.join(_Directory, "Filter.CategoryCodes.npy"), self.CategoryCodes)
+        Foundation.np.save(Foundation.os.path.join(_Directory, "Filter.CategoryOffsets.npy"), self.CategoryOffsets)
+
+        with open(Foundation.os.path.join(_Directory, "Filter.Categories.json"), "w") as File:
+            Foundation.json.dump(self.Categories, File)
+
+    """
+        Checks _Filter before it is searched
+
+        Raises:
+            ValueError for unknown keys, Categories that aren't a list of strings or dates that aren't YYYY-MM-DD
+    """
+    @staticmethod
+    def Validate(_Filter: dict):
+
+        if not isinstance(_Filter, dict):
+            raise ValueError(f"A filter must be an object, got {_Filter!r}")
+
+        Unknown = set(_Filter) - {"Categories", "PublishedAfter", "PublishedBefore"}
+
+        if Unknown:
+            raise ValueError(f"Unknown filter keys {sorted(Unknown)}")
+
+        Categories = _Filter.get("Categories") or []
+
+        if not isinstance(Categories, list) or not all(isinstance(Category, str) for Category in Categories):
+            raise ValueError("Categories must be a list of strings")
+
+        for Key in ("PublishedAfter", "PublishedBefore"):
+
+            if not _Filter.get(Key):
+                continue
+
+            if not isinstance(_Filter[Key], str) or len(_Filter[Key]) != 10:
+                raise ValueError(f"{Key} must be a YYYY-MM-DD date")
+
+            # Raises ValueError for impossible dates
+            Foundation.np.datetime64(_Filter[Key], "D")
+
+    """
+        bool mask over IDs of the ids matching _Filter
+
+        Raises:
+            ValueError for invalid filters, see Validate
+    """
+    def Mask(self, _Filter: dict):
+
+        FilterColumns.Validate(_Filter)
+
+        Mask = Foundation.np.ones(len(self.IDs), dtype = bool)
+
+        if _Filter.get("Categories"):
+
+            Wanted  = [self.CategoryIndex[Category] for Category in _Filter["Categories"] if Category in self.CategoryIndex]
+            Hit     = Foundation.np.isin(self.CategoryCodes, Wanted)
+            Rows    = Foundation.np.repeat(Foundation.np.arange(len(self.IDs)), Foundation.np.diff(self.CategoryOffsets))
+            Any     = Foundation.np.zeros(len(self.IDs), dtype = bool)
+            Any[Rows[Hit]] = True
+            Mask   &= Any
+
+        if _Filter.get("PublishedAfter"):
+            Mask &= self.Published >= Foundation.np.datetime64(_Filter["PublishedAfter"], "D").astype(Foundation.np.int64)
+
+        if _Filter.get("PublishedBefore"):
+            Mask &= (self.Published >= 0) & (self.Published < Foundation.np.datetime64(_Filter["PublishedBefore"], "D").astype(Foundation.np.int64))
+
+        return Mask
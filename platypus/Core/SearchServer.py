@@ -0,0 +1,416 @@
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Core.Indexer      import FAISSIndexer
+from platypus.Core.MetadataStore import FilterColumns
+from platypus.Core.Vectorizer   import ChunkVectorizer, Embedder
+from platypus.Utils.Log         import GetLogger, ConfigureLogging
+from http.server                import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse               import urlparse, parse_qs
+
+import argparse
+import collections
+import queue
+import threading
+
+Log = GetLogger("SearchServer")
+
+# Tells the batching thread to exit
+_Shutdown = object()
+
+"""
+    Queries of one client request, completed by the batching thread
+"""
+class SearchRequest(object):
+
+    def __init__(self, _Queries: list, _K: int, _Filter: dict = None):
+
+        self.Queries    = _Queries
+        self.K          = _K
+        self.Filter     = _Filter
+        self.Arrived    = Foundation.time.perf_counter()
+        self.Done       = threading.Event()
+        self.Results    = None
+        self.Error      = None
+
+"""
+    Throughput & latency of the served requests, latencies are kept for the
+    last PLATYPUS_SEARCH_LATENCY_WINDOW requests
+"""
+class SearchStats(object):
+
+    def __init__(self):
+
+        self.Lock           = threading.Lock()
+        self.StartTime      = Foundation.time.perf_counter()
+        self.Requests       = 0
+        self.Queries        = 0
+        self.Batches        = 0
+        self.Errors         = 0
+        self.BatchSeconds   = 0.0
+        self.Latencies      = collections.deque(maxlen = Foundation.PLATYPUS_SEARCH_LATENCY_WINDOW)
+        self.BatchSizes     = collections.deque(maxlen = Foundation.PLATYPUS_SEARCH_LATENCY_WINDOW)
+
+    def RecordBatch(self, _Requests: list, _NumQueries: int, _BatchSeconds: float, _Failed: int):
+
+        Now = Foundation.time.perf_counter()
+
+        with self.Lock:
+
+            self.Requests       += len(_Requests)
+            self.Queries        += _NumQueries
+            self.Batches        += 1
+            self.Errors         += _Failed
+            self.BatchSeconds   += _BatchSeconds
+            self.BatchSizes.append(_NumQueries)
+            self.Latencies.extend(Now - Request.Arrived for Request in _Requests)
+
+    def Snapshot(self) -> dict:
+
+        with self.Lock:
+
+            Uptime      = Foundation.time.perf_counter() - self.StartTime
+            Latencies   = sorted(self.Latencies)
+
+            def Percentile(_Q: float) -> float:
+                return 1000 * Latencies[min(len(Latencies) - 1, int(_Q * len(Latencies)))] if Latencies else 0.0
+
+            return {
+                "UptimeSeconds"     : Uptime,
+                "Requests"          : self.Requests,
+                "Queries"           : self.Queries,
+                "Batches"           : self.Batches,
+                "Errors"            : self.Errors,
+                "QueriesPerSecond"  : self.Queries / max(Uptime, 1e-9),
+                "MeanBatchSize"     : sum(self.BatchSizes) / len(self.BatchSizes) if self.BatchSizes else 0.0,
+                "MsPerBatch"        : 1000 * self.BatchSeconds / max(self.Batches, 1),
+                "LatencyP50ms"      : Percentile(0.50),
+                "LatencyP95ms"      : Percentile(0.95),
+                "LatencyP99ms"      : Percentile(0.99)
+            }
+
+class SearchServer(object):
+
+    """
+        Long-lived local search service
+
+        The Embedder & Index are loaded once. Concurrent requests are queued &
+        a single batching thread collects them into micro-batches: the first
+        query of a batch waits at most _BatchWindow seconds for more to arrive
+        (up to _MaxBatch queries), then the whole batch goes through one
+        FAISSIndexer.Search: queries not in its caches are encoded in one
+        STModel.encode call & searched in one FAISSIndex.search call.
+
+        Endpoints:
+            GET  /search?q=<query>&k=<k>            =: results of one query, filtered by any of
+                 [&category=<c>...][&after=<YYYY-MM-DD>][&before=<YYYY-MM-DD>]
+            POST /search {"Queries": [...], "K": k} =: results of every query, filtered by an optional
+                 "Filter": {"Categories": [...], "PublishedAfter": ..., "PublishedBefore": ...}
+            GET  /stats                             =: SearchStats.Snapshot(), FAISSIndexer.CacheStats() (& LiveIndexer.Stats())
+            GET  /health                            =: {"Status": "ok", "IndexSize": n}
+            GET  /metrics[?format=json]             =: Metrics in the Prometheus text format (or a JSON Snapshot)
+
+        Args:
+            _Indexer        : FAISSIndexer with a built or loaded Index.
+            _Debug          : Debug Flag.
+            _BatchWindow    : Seconds a micro-batch waits for more queries, 0 disables waiting.
+            _MaxBatch       : Maximum number of queries in one micro-batch.
+            _LiveIndexer    : LiveIndexer of _Indexer run alongside the server, so new documents become searchable.
+    """
+    def __init__(self,
+                 _Indexer: FAISSIndexer,
+                 _Debug: bool,
+                 _Host: str = Foundation.PLATYPUS_SEARCH_SERVER_HOST,
+                 _Port: int = Foundation.PLATYPUS_SEARCH_SERVER_PORT,
+                 _BatchWindow: float = Foundation.PLATYPUS_SEARCH_BATCH_WINDOW,
+                 _MaxBatch: int = Foundation.PLATYPUS_SEARCH_MAX_BATCH,
+                 _LiveIndexer = None, **kwargs):
+
+        self.Indexer        = _Indexer
+        self.Debug          = _Debug
+        self.BatchWindow    = _BatchWindow
+        self.MaxBatch       = _MaxBatch
+        self.LiveIndexer    = _LiveIndexer
+        self.Stats          = SearchStats()
+        self.Pending        = queue.Queue()
+        self.Batcher        = threading.Thread(target = self.__BatchLoop, name = "PlatypusSearchBatcher", daemon = True)
+        self.HTTPServer     = ThreadingHTTPServer((_Host, _Port), self.__MakeHandler())
+        self.HTTPServer.daemon_threads = True
+
+    """
+        Address the server is bound to, (host, port)
+    """
+    @property
+    def Address(self):
+
+        return self.HTTPServer.server_address
+
+    """
+        Queues _Queries for the next micro-batch & blocks until they are searched
+
+        Returns:
+            list (one per query) of lists of dicts {Title, URL, _id, Distance}
+    """
+    def Submit(self, _Queries: list, _K: int = Foundation.PLATYPUS_SEARCH_DEFAULT_K, _Filter: dict = None):
+
+        Request = SearchRequest(_Queries, _K, _Filter)
+        self.Pending.put(Request)
+        Request.Done.wait()
+
+        if Request.Error is not None:
+            raise Request.Error
+
+        return Request.Results
+
+    """
+        Serves requests until Shutdown is called (from another thread)
+    """
+    def Serve(self):
+
+        self.Batcher.start()
+
+        if self.LiveIndexer is not None:
+            self.LiveIndexer.Start()
+
+        Log.info(f"Serving {self.Indexer.FAISSIndex.ntotal if self.Indexer.FAISSIndex is not None else 0} "
+                 f"vectors on http://{self.Address[0]}:{self.Address[1]} (window {self.BatchWindow * 1000:.1f} ms, max batch {self.MaxBatch})")
+
+        try:
+            self.HTTPServer.serve_forever()
+        finally:
+            self.HTTPServer.server_close()
+            self.Pending.put(_Shutdown)
+            self.Batcher.join()
+
+            if self.LiveIndexer is not None:
+                self.LiveIndexer.Shutdown()
+
+    def Shutdown(self):
+
+        self.HTTPServer.shutdown()
+
+    """
+        Collects queued requests into micro-batches & searches them
+    """
+    def __BatchLoop(self):
+
+        while True:
+
+            First = self.Pending.get()
+
+            if First is _Shutdown:
+                return
+
+            Batch       = [First]
+            NumQueries  = len(First.Queries)
+            Deadline    = First.Arrived + self.BatchWindow
+            Stop        = False
+
+            while NumQueries < self.MaxBatch:
+
+                Remaining = Deadline - Foundation.time.perf_counter()
+
+                try:
+                    # Past the window only what is already queued joins the batch
+                    Request = self.Pending.get(timeout = Remaining) if Remaining > 0 else self.Pending.get_nowait()
+                except queue.Empty:
+                    break
+
+                if Request is _Shutdown:
+                    Stop = True
+                    break
+
+                Batch.append(Request)
+                NumQueries += len(Request.Queries)
+
+            self.__SearchBatch(Batch)
+
+            if Stop:
+                return
+
+    def __SearchBatch(self, _Batch: list):
+
+        Queries     = [Query for Request in _Batch for Query in Request.Queries]
+        StartTime   = Foundation.time.perf_counter()
+
+        try:
+            self.__Search(_Batch)
+
+        except Exception as e:
+
+            # Retried one Request at a time, the error only reaches the Requests causing it
+            Log.warning(f"Searching a batch of {len(Queries)} queries Failed, retrying its {len(_Batch)} requests alone ({e})")
+
+            for Request in _Batch:
+                try:
+                    self.__Search([Request])
+                except Exception as e:
+                    Log.error(f"Searching {len(Request.Queries)} queries Failed! ({e})")
+                    Request.Error = e
+
+        Failed          = sum(Request.Error is not None for Request in _Batch)
+        BatchSeconds    = Foundation.time.perf_counter() - StartTime
+        self.Stats.RecordBatch(_Batch, len(Queries), BatchSeconds, Failed)
+
+        for Request in _Batch:
+            Request.Done.set()
+
+        if self.Debug:
+            Log.debug(f"Searched {len(_Batch)} requests ({len(Queries)} queries) in {BatchSeconds * 1000:.1f} ms")
+
+    """
+        Searches the Queries of _Requests at once & sets their Results
+    """
+    def __Search(self, _Requests: list):
+
+        # Repeated queries come from the Indexer's caches, the rest are encoded together & searched once per filter
+        Results = self.Indexer.Search([Query for Request in _Requests for Query in Request.Queries],
+                                      [Request.K for Request in _Requests for _ in Request.Queries],
+                                      [Request.Filter for Request in _Requests for _ in Request.Queries])
+        Begin   = 0
+
+        for Request in _Requests:
+            Request.Results = Results[Begin:Begin + len(Request.Queries)]
+            Begin          += len(Request.Queries)
+
+    def __MakeHandler(self):
+
+        Server = self
+
+        class SearchHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+
+                URL = urlparse(self.path)
+
+                if URL.path == "/stats":
+                    Stats = {**Server.Stats.Snapshot(), **Server.Indexer.CacheStats()}
+                    if Server.LiveIndexer is not None:
+                        Stats["LiveIndexer"] = Server.LiveIndexer.Stats()
+                    return self.__Reply(200, Stats)
+
+                if URL.path == "/metrics":
+                    if parse_qs(URL.query).get("format", [""])[0] == "json":
+                        return self.__Reply(200, Metrics.Snapshot())
+                    return self.__Reply(200, Metrics.Prometheus(), "text/plain; version=0.0.4")
+
+                if URL.path == "/health":
+                    Index = Server.Indexer.FAISSIndex
+                    return self.__Reply(200, {"Status": "ok", "IndexSize": Index.ntotal if Index is not None else 0})
+
+                if URL.path == "/search":
+                    Parameters  = parse_qs(URL.query)
+                    Filter      = {"Categories"     : [Category for Value in Parameters.get("category", []) for Category in Value.split(",") if Category],
+                                   "PublishedAfter" : Parameters.get("after", [None])[0],
+                                   "PublishedBefore": Parameters.get("before", [None])[0]}
+                    return self.__Search(Parameters.get("q", []), Parameters.get("k", [Foundation.PLATYPUS_SEARCH_DEFAULT_K])[0],
+                                         {Key: Value for Key, Value in Filter.items() if Value} or None)
+
+                self.__Reply(404, {"Error": f"Unknown path {URL.path}"})
+
+            def do_POST(self):
+
+                if urlparse(self.path).path != "/search":
+                    return self.__Reply(404, {"Error": f"Unknown path {self.path}"})
+
+                try:
+                    Body = Foundation.json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                except ValueError as e:
+                    return self.__Reply(400, {"Error": f"Invalid JSON body ({e})"})
+
+                if not isinstance(Body, dict):
+                    return self.__Reply(400, {"Error": "Expected a JSON object body"})
+
+                Queries = Body.get("Queries", [Body["Query"]] if "Query" in Body else [])
+
+                # A string would be searched as one query per character
+                if not isinstance(Queries, list):
+                    return self.__Reply(400, {"Error": "Queries must be a list of query strings"})
+
+                self.__Search(Queries, Body.get("K", Foundation.PLATYPUS_SEARCH_DEFAULT_K), Body.get("Filter") or None)
+
+            def __Search(self, _Queries, _K, _Filter = None):
+
+                try:
+                    K = int(_K)
+                except (TypeError, ValueError):
+                    return self.__Reply(400, {"Error": f"K must be an integer, got {_K!r}"})
+
+                if not _Queries or not all(isinstance(Query, str) and Query for Query in _Queries):
+                    return self.__Reply(400, {"Error": "Expected one or more non empty query strings"})
+
+                if not 1 <= K <= Foundation.PLATYPUS_SEARCH_MAX_K:
+                    return self.__Reply(400, {"Error": f"K must be within [1, {Foundation.PLATYPUS_SEARCH_MAX_K}]"})
+
+                if _Filter is not None and not isinstance(_Filter, dict):
+                    return self.__Reply(400, {"Error": "Filter must be a JSON object"})
+
+                if _Filter is not None:
+                    try:
+                        FilterColumns.Validate(_Filter)
+                    except ValueError as e:
+                        return self.__Reply(400, {"Error": f"Invalid Filter ({e})"})
+
+                try:
+                    Results = Server.Submit(list(_Queries), K, _Filter)
+                except Exception as e:
+                    return self.__Reply(500, {"Error": str(e)})
+
+                self.__Reply(200, {"Results": Results})
+
+            def __Reply(self, _Status: int, _Body, _ContentType: str = "application/json"):
+
+                Payload = (_Body if isinstance(_Body, str) else Foundation.json.dumps(_Body, default = str)).encode("utf8")
+
+                self.send_response(_Status)
+                self.send_header("Content-Type", _ContentType)
+                self.send_header("Content-Length", str(len(Payload)))
+                self.end_headers()
+                self.wfile.write(Payload)
+
+            def log_message(self, _Format, *_Args):
+
+                if Server.Debug:
+                    Log.debug(f"{self.address_string()} {_Format % _Args}")
+
+        return SearchHandler
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Serve semantic search over the saved FAISS Index")
+    Parser.add_argument("--host", default = Foundation.PLATYPUS_SEARCH_SERVER_HOST)
+    Parser.add_argument("--port", type = int, default = Foundation.PLATYPUS_SEARCH_SERVER_PORT)
+    Parser.add_argument("--window-ms", type = float, default = Foundation.PLATYPUS_SEARCH_BATCH_WINDOW * 1000)
+    Parser.add_argument("--max-batch", type = int, default = Foundation.PLATYPUS_SEARCH_MAX_BATCH)
+    Parser.add_argument("--model", default = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL)
+    Parser.add_argument("--backend", choices = Foundation.PLATYPUS_EMBEDDER_BACKENDS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDER_BACKEND)
+    Parser.add_argument("--threads", type = int, default = None)
+    Parser.add_argument("--no-mmap", action = "store_true", help = "read the Index into RAM instead of memory-mapping it")
+    Parser.add_argument("--metrics", action = "store_true", help = "record stage timings, exported by GET /metrics")
+    Parser.add_argument("--live", action = "store_true", help = "index new Arxiv documents while serving (LiveIndexer)")
+    Parser.add_argument("--debug", action = "store_true")
+    Args = Parser.parse_args()
+
+    if Args.metrics:
+        Metrics.Enable()
+
+    Indexer = FAISSIndexer(ChunkVectorizer(Embedder(Args.model, Args.backend, Args.threads), Args.debug), Args.debug)
+
+    if not Indexer.LoadIndices(_MemoryMap = not Args.no_mmap):
+        raise SystemExit("[Platypus][SearchServer]: No Index to serve, build one with FAISSIndexer.BuildIndices first")
+
+    LiveIndex = None
+
+    if Args.live:
+        from platypus.Core.Database     import MongoDBManager
+        from platypus.Utils.LiveIndexer import LiveIndexer
+        LiveIndex = LiveIndexer(Indexer, MongoDBManager(Args.debug), Args.debug)
+
+    Server = SearchServer(Indexer, Args.debug, Args.host, Args.port, Args.window_ms / 1000, Args.max_batch, LiveIndex)
+
+    try:
+        Server.Serve()
+    except KeyboardInterrupt:
+        pass
@@ -2,23 +2,206 @@ import platypus.Utils.Foundation as Foundation
 
 from platypus.Core.Vectorizer   import ChunkVectorizer
 from platypus.Core.Indexer      import FAISSIndexer
+from platypus.Core.Extractor    import PDFExtractor
+from platypus.Utils.Log         import GetLogger
+
+Log = GetLogger("Similarity")
+
+"""
+    Cosine similarities of the (squared L2 or inner product) _Distances of
+    normalized vectors returned by _Index
+"""
+def Similarities(_Index, _Distances):
+
+    if _Index.metric_type == Foundation.faiss.METRIC_INNER_PRODUCT:
+        return _Distances
+
+    return 1.0 - _Distances / 2.0
+
+class BatchAbstractDetector(object):
+
+    """
+        Screens many abstracts against an Index at once
+
+        Abstracts are given as a matrix of Embeddings (one row per abstract,
+        e.g. ChunkVectorizer.VectorizeMeans) or as PDFExtractors, whose
+        Abstracts are encoded together in one batched pass. They are then
+        searched in batches of _BatchSize rows: with _Threshold the matches are
+        every document at least that similar (one range_search), otherwise the
+        _K nearest (one search). An abstract is Flagged when its nearest match
+        is at least _Threshold, or _FlagThreshold without one, similar.
+
+        Args:
+            _Index      : FAISSIndexer with a built or loaded Index.
+            _Debug      : Debug Flag.
+            _K          : Number of nearest documents reported per abstract, without _Threshold.
+            _Threshold      : Minimum cosine similarity of a reported document, None reports the _K nearest.
+            _BatchSize      : Abstracts searched per call.
+            _FlagThreshold  : Cosine similarity an abstract is Flagged at when there's no _Threshold.
+    """
+    def __init__(self,
+                 _Index: FAISSIndexer,
+                 _Debug: bool,
+                 _K: int = Foundation.PLATYPUS_SIMILARITY_DEFAULT_K,
+                 _Threshold: float = None,
+                 _BatchSize: int = Foundation.PLATYPUS_SIMILARITY_BATCH_SIZE,
+                 _FlagThreshold: float = Foundation.PLATYPUS_SIMILARITY_THRESHOLD, **kwargs):
+
+        self.Index          = _Index
+        self.Debug          = _Debug
+        self.K              = _K
+        self.Threshold      = _Threshold
+        self.BatchSize      = _BatchSize
+        self.FlagThreshold  = _Threshold if _Threshold is not None else _FlagThreshold
+
+    """
+        Normalized float32 Embeddings of the Abstracts of _Extractors, one
+        batched pass over all their chunks
+
+        Returns:
+            (Embeddings, bool mask of the Extractors that had an Abstract)
+    """
+    def EncodeAbstracts(self, _Extractors: list):
+
+        if self.Index.Vectorizer is None:
+            raise RuntimeError("Encoding Abstracts needs an Index with a Vectorizer, pass Embeddings instead")
+
+        Abstracts       = [Extractor.Abstract or "" for Extractor in _Extractors]
+        Means, Counts   = self.Index.Vectorizer.VectorizeMeans(Abstracts)
+        Means           = Foundation.np.ascontiguousarray(Means, dtype = Foundation.np.float32)
+        Foundation.faiss.normalize_L2(Means)
+
+        return Means, Counts > 0
+
+    """
+        Searches every abstract against the Index
+
+        Args:
+            _Abstracts  : (N, d) matrix of abstract Embeddings or a list of N PDFExtractors.
+            _IDs        : Optional _id of every abstract, a document is never reported as similar to itself.
+
+        Returns:
+            list (one per abstract) of dicts {Input, Matches: [{_id, Title, URL, Similarity}], MaxSimilarity,
+            Flagged, Error}, matches most similar first. Input is the abstract's row or the Extractor's FilePath,
+            Flagged whether any match reaches the FlagThreshold.
+    """
+    def Detect(self, _Abstracts, _IDs: list = None) -> list:
+
+        if isinstance(_Abstracts, list) and _Abstracts and isinstance(_Abstracts[0], PDFExtractor):
+            Inputs              = [Extractor.FilePath if Extractor.FilePath is not None else i for i, Extractor in enumerate(_Abstracts)]
+            Vectors, Valid      = self.EncodeAbstracts(_Abstracts)
+        else:
+            Vectors             = Foundation.np.array(_Abstracts, dtype = Foundation.np.float32, ndmin = 2)
+            Foundation.faiss.normalize_L2(Vectors)
+            Inputs              = list(range(len(Vectors)))
+            Valid               = Foundation.np.ones(len(Vectors), dtype = bool)
+
+        Reports = [{"Input": Input, "Matches": [], "MaxSimilarity": None, "Flagged": False, "Error": None} for Input in Inputs]
+
+        for Report, IsValid in zip(Reports, Valid):
+            if not IsValid:
+                Report["Error"] = "No Abstract found"
+
+        Rows = Foundation.np.flatnonzero(Valid)
+
+        with self.Index.Lock:
+
+            if self.Index.FAISSIndex is None or self.Index.FAISSIndex.ntotal == 0:
+                Log.warning("There's no Index to search abstracts in!")
+                return Reports
+
+            for Begin in range(0, len(Rows), self.BatchSize):
+
+                Batch = Rows[Begin:Begin + self.BatchSize]
+
+                # One extra neighbour makes up for the abstract itself
+                Found = self.__SearchBatch(Foundation.np.ascontiguousarray(Vectors[Batch]), self.K + (_IDs is not None))
+
+                for Row, Matches in zip(Batch, Found):
+
+                    Self        = _IDs[Row] if _IDs is not None else None
+                    Matches     = [Match for Match in Matches if Self is None or Match["_id"] != Self]
+                    Matches     = Matches if self.Threshold is not None else Matches[:self.K]
+                    Report      = Reports[Row]
+
+                    Report["Matches"]       = Matches
+                    Report["MaxSimilarity"] = Matches[0]["Similarity"] if Matches else None
+                    Report["Flagged"]       = bool(Matches) and Matches[0]["Similarity"] >= self.FlagThreshold
+
+        if self.Debug:
+            Log.debug(f"Screened {len(Rows)} abstracts, {sum(Report['Flagged'] for Report in Reports)} flagged")
+
+        return Reports
+
+    """
+        Matches of every row of _Vectors, most similar first
+    """
+    def __SearchBatch(self, _Vectors, _K: int) -> list:
+
+        Index   = self.Index.FAISSIndex
+        Rows    = []
+
+        if self.Threshold is not None:
+
+            # range_search keeps distances below the radius for L2 & above it for inner product
+            Radius = self.Threshold if Index.metric_type == Foundation.faiss.METRIC_INNER_PRODUCT else 2.0 * (1.0 - self.Threshold)
+
+            try:
+                Limits, Distances, IDs = Index.range_search(_Vectors, float(Radius))
+            except RuntimeError as e:
+                # e.g. PQ codes & HNSW of older faiss, the _K nearest are filtered instead
+                Log.warning(f"{self.Index.IndexSpec} Index has no range_search ({e}), filtering the {_K} nearest")
+                Distances, IDs = Index.search(_Vectors, _K)
+                Limits         = None
+
+            if Limits is not None:
+                for Begin, End in zip(Limits[:-1], Limits[1:]):
+                    Rows.append(self.__Matches(Similarities(Index, Distances[Begin:End]), IDs[Begin:End]))
+                return Rows
+
+        else:
+            Distances, IDs = Index.search(_Vectors, _K)
+
+        for RowDistances, RowIDs in zip(Distances, IDs):
+            Rows.append(self.__Matches(Similarities(Index, RowDistances), RowIDs))
+
+        return Rows
+
+    """
+        Metadata of _IDs with their _Similarities, at least Threshold, most similar first
+    """
+    def __Matches(self, _Similarities, _IDs) -> list:
+
+        Matches = []
+
+        for Similarity, ID in zip(_Similarities.tolist(), _IDs.tolist()):
+
+            # FAISS pads with -1 when there are fewer than K results
+            Metadata = self.Index.Metadata.get(ID) if ID >= 0 else None
+
+            if Metadata is None or (self.Threshold is not None and Similarity < self.Threshold):
+                continue
+
+            Matches.append({"_id": Metadata.get("_id"), "Title": Metadata["Title"], "URL": Metadata["URL"], "Similarity": Similarity})
+
+        Matches.sort(key = lambda _Match: -_Match["Similarity"])
+
+        return Matches
 
 class AbstractBasedDetector(object):
 
+    """
+        URLs of the _K documents most similar to one abstract Embedding, see
+        BatchAbstractDetector to screen many abstracts at once
+    """
     def __init__(self,
                  _VectorizedAbstract: Foundation.np.array,
                  _Index : FAISSIndexer,
-                 _Debug: bool):
-        
+                 _Debug: bool,
+                 _K: int = Foundation.PLATYPUS_SIMILARITY_DEFAULT_K):
+
         self.Debug              = _Debug
         self.Index              = _Index
         self.VectorizerAbstract = _VectorizedAbstract
-        self.SimilarDocuments   = self.__SearchSimilarDocuments()
-        self.Report             = []
-
-    def __SearchSimilarDocuments(self):
-
-        distance, I = self.Index.FAISSIndex.search(self.VectorizerAbstract, k = 5)
-
-        for rank, index in enumerate(I[0]):
-            self.SimilarDocuments.append(self.Index.Metadata[index]["URL"])
+        self.Report             = BatchAbstractDetector(_Index, _Debug, _K).Detect(_VectorizedAbstract)[0]
+        self.SimilarDocuments   = [Match["URL"] for Match in self.Report["Matches"]]
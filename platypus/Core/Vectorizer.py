@@ -1,38 +1,403 @@
 import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Core.Cache import EmbeddingCache
+from platypus.Utils.Log  import GetLogger
+from concurrent.futures  import ProcessPoolExecutor
+from multiprocessing     import cpu_count, get_context
+
+Log = GetLogger("Vectorizer")
+
+# Embedder of an EncodingEngine worker process, loaded once by its initializer
+_WorkerEmbedder = None
 
 """
 Initializes Sentence Transformer
 
 Default Sentence Transformer is set by PLATYPUS_DEFAULT_SENTENCE_TRANSFORMER_MODEL
+
+The model runs on one of the PLATYPUS_EMBEDDER_BACKENDS, STModel.encode is the
+same for all of them:
+    torch   : PyTorch SentenceTransformer
+    int8    : PyTorch with every Linear layer dynamically quantized to int8 (CPU)
+    onnx    : ONNX Runtime on CPU, the model is exported to ONNX if it has no
+              ONNX file yet (optimum & onnxruntime must be installed)
+
+Attributes:
+self.Backend        =: Backend the model runs on
+self.Identity       =: Model name, suffixed with "@<Backend>" unless torch (Embeddings of
+                       different backends differ slightly, so caches key on this)
+self.LoadSeconds    =: Time taken to load (& quantize / export) the model
+self.Args           =: Arguments the same Embedder is created with again (e.g. by EncodingEngine workers)
+
+Args:
+    _ModelName  : Sentence Transformer model name or path.
+    _Backend    : One of PLATYPUS_EMBEDDER_BACKENDS.
+    _Threads    : Number of CPU threads of torch / ONNX Runtime, None keeps their default.
+    _ONNXFile   : ONNX file of the model to load (e.g. "onnx/model_qint8_avx512.onnx"), None for the default.
+    _Debug      : Debug Flag.
 """
 class Embedder(object):
 
     def __init__(self, 
-                 _ModelName: str = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL):
+                 _ModelName: str = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL,
+                 _Backend: str = Foundation.PLATYPUS_DEFAULT_EMBEDDER_BACKEND,
+                 _Threads: int = None,
+                 _ONNXFile: str = None,
+                 _Debug: bool = False, **kwargs):
+
+        if _Backend not in Foundation.PLATYPUS_EMBEDDER_BACKENDS:
+            raise ValueError(f"Unknown Embedder backend {_Backend}, expected one of {Foundation.PLATYPUS_EMBEDDER_BACKENDS}")
+
+        if _Threads is not None:
+            Foundation.torch.set_num_threads(_Threads)
 
         self.STModelName    = _ModelName
-        self.STModel        = Foundation.SentenceTransformer(self.STModelName)
+        self.Backend        = _Backend
+        self.Args           = {"_ModelName": _ModelName, "_Backend": _Backend, "_Threads": _Threads, "_ONNXFile": _ONNXFile}
+        self.Identity       = _ModelName if _Backend == "torch" else f"{_ModelName}@{_Backend}"
+        StartTime           = Foundation.time.perf_counter()
+
+        if _Backend == "onnx":
+
+            Options = Foundation.onnxruntime.SessionOptions()
+
+            if _Threads is not None:
+                Options.intra_op_num_threads = _Threads
+
+            ModelArgs = {"provider": "CPUExecutionProvider", "session_options": Options}
+
+            if _ONNXFile is not None:
+                ModelArgs["file_name"] = _ONNXFile
+
+            self.STModel = Foundation.SentenceTransformer(self.STModelName, device = "cpu", backend = "onnx", model_kwargs = ModelArgs)
+
+        else:
+            self.STModel = Foundation.SentenceTransformer(self.STModelName, device = "cpu" if _Backend == "int8" else None)
+
+        if _Backend == "int8":
+            # Weights are int8, activations are quantized on the fly per batch
+            Foundation.torch.ao.quantization.quantize_dynamic(self.STModel, {Foundation.torch.nn.Linear},
+                                                              dtype = Foundation.torch.qint8, inplace = True)
+
+        self.LoadSeconds    = Foundation.time.perf_counter() - StartTime
+
+        if _Debug:
+            Log.debug(f"Loaded {self.Identity} in {self.LoadSeconds:.2f}s")
+
+"""
+    Cosine similarity between the Embeddings of _Sentences by _Embedder & by
+    _Reference (usually the torch backend of the same model), warns if the
+    mean is below PLATYPUS_EMBEDDER_MIN_AGREEMENT
+
+    Returns:
+        {Mean, Min} cosine similarity over _Sentences
+"""
+def CosineAgreement(_Embedder: Embedder, _Reference: Embedder, _Sentences: list,
+                    _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE) -> dict:
+
+    Embeddings  = _Embedder.STModel.encode(_Sentences, batch_size = _BatchSize, normalize_embeddings = True)
+    Reference   = _Reference.STModel.encode(_Sentences, batch_size = _BatchSize, normalize_embeddings = True)
+    Cosines     = Foundation.np.sum(Foundation.np.asarray(Embeddings, dtype = Foundation.np.float32) *
+                                    Foundation.np.asarray(Reference, dtype = Foundation.np.float32), axis = 1)
+    Agreement   = {"Mean": float(Cosines.mean()), "Min": float(Cosines.min())}
+
+    if Agreement["Mean"] < Foundation.PLATYPUS_EMBEDDER_MIN_AGREEMENT:
+        Log.warning(f"{_Embedder.Identity} agrees with {_Reference.Identity} at a mean cosine of "
+                    f"{Agreement['Mean']:.4f} (min {Agreement['Min']:.4f}), below {Foundation.PLATYPUS_EMBEDDER_MIN_AGREEMENT}")
+
+    return Agreement
+
+"""
+    Initializer of an EncodingEngine worker, loads its Embedder once
+"""
+def _LoadWorkerEmbedder(_Class: type, _Args: dict):
+
+    global _WorkerEmbedder
+
+    _WorkerEmbedder = _Class(**_Args)
+
+"""
+    Embeddings of one bucket of _Chunks by the worker's Embedder
+"""
+def _EncodeBucket(_Chunks: list, _BatchSize: int):
+
+    return Foundation.np.asarray(_WorkerEmbedder.STModel.encode(_Chunks, batch_size = _BatchSize), dtype = Foundation.np.float32)
+
+class EncodingEngine(object):
+
+    """
+        Encodes Chunks with an Embedder, in length sorted buckets
+
+        The Chunks are sorted by length & cut into buckets of _BatchSize, so
+        every forward pass pads to a similar length. With _Workers > 1 the
+        buckets are encoded by a pool of worker processes (spawned on first
+        use), each loading its own copy of the Embedder once, with the CPU
+        threads split between them. The Embeddings are returned in the
+        original order of the Chunks.
+
+        Attributes:
+        self.Sentences  =: Chunks encoded so far
+        self.Seconds    =: Time spent encoding them
+
+        Args:
+            _Embedder   : Embedder of the Chunks, workers create it again from its class & Args.
+            _Workers    : Worker processes, 1 encodes in this process.
+            _BatchSize  : Chunks per bucket & forward pass.
+            _Threads    : CPU threads per worker, None splits the CPUs evenly.
+    """
+    def __init__(self,
+                 _Embedder: Embedder,
+                 _Workers: int = Foundation.PLATYPUS_ENCODE_WORKERS,
+                 _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE,
+                 _Threads: int = None, **kwargs):
+
+        self.Embedder   = _Embedder
+        self.Workers    = max(1, _Workers)
+        self.BatchSize  = _BatchSize
+        self.Threads    = _Threads or max(1, cpu_count() // self.Workers)
+        self.Executor   = None
+        self.Sentences  = 0
+        self.Seconds    = 0.0
+
+    """
+        Embeddings of _Chunks, one row per Chunk in their order
+
+        Params:
+            _Chunks (list)      =: Valid list containing str
+            _BatchSize (int)    =: Chunks per bucket, None for the engine's BatchSize
+    """
+    def Encode(self, _Chunks: list, _BatchSize: int = None):
+
+        BatchSize   = _BatchSize or self.BatchSize
+        Order       = Foundation.np.argsort([len(Chunk) for Chunk in _Chunks], kind = "stable")
+        Buckets     = [[_Chunks[i] for i in Order[Begin:Begin + BatchSize]] for Begin in range(0, len(_Chunks), BatchSize)]
+        StartTime   = Foundation.time.perf_counter()
+
+        if self.Workers == 1 or len(Buckets) < 2:
+            Encoded = [Foundation.np.asarray(self.Embedder.STModel.encode(Bucket, batch_size = BatchSize), dtype = Foundation.np.float32)
+                       for Bucket in Buckets]
+        else:
+            Encoded = list(self.__Pool().map(_EncodeBucket, Buckets, [BatchSize] * len(Buckets)))
+
+        Seconds     = Foundation.time.perf_counter() - StartTime
+        Dimension   = Encoded[0].shape[1] if Encoded else self.Embedder.STModel.get_sentence_embedding_dimension()
+        Embeddings  = Foundation.np.empty((len(_Chunks), Dimension), dtype = Foundation.np.float32)
+
+        # Row i of the sorted Embeddings belongs to Chunk Order[i]
+        if Encoded:
+            Embeddings[Order] = Foundation.np.concatenate(Encoded)
+
+        # The rate is exported as encoded_chunks_total / encode_seconds (see ChunkVectorizer)
+        self.Sentences  += len(_Chunks)
+        self.Seconds    += Seconds
+
+        return Embeddings
+
+    """
+        Sentences per second over every Encode call so far
+    """
+    def SentencesPerSecond(self) -> float:
+
+        return self.Sentences / max(self.Seconds, 1e-9)
+
+    """
+        Stops the worker processes, they are spawned again if needed
+    """
+    def Close(self):
+
+        if self.Executor is not None:
+            self.Executor.shutdown(wait = True, cancel_futures = True)
+            self.Executor = None
+
+    def __Pool(self) -> ProcessPoolExecutor:
+
+        if self.Executor is None:
+
+            Args = dict(self.Embedder.Args)
+
+            if "_Threads" in Args:
+                Args["_Threads"] = self.Threads
+
+            # spawn, like PDFExtractor, torch & OpenMP don't survive a fork
+            self.Executor = ProcessPoolExecutor(self.Workers, mp_context = get_context("spawn"),
+                                                initializer = _LoadWorkerEmbedder, initargs = (type(self.Embedder), Args))
+
+            Log.info(f"Started {self.Workers} encoding workers ({self.Threads} threads each)")
+
+        return self.Executor
 
 """
 Given a Text Chunk, Vectorizes using the Embedder
 """
 class ChunkVectorizer(object):
 
+    """
+        Args:
+            _Embedder   : Embedder of the Chunks.
+            _Debug      : Debug Flag.
+            _Size       : Chunk size, in characters (default PLATYPUS_CHUNK_SIZE) or, with the "tokens"
+                          _Mode, in tokens of the Embedder's tokenizer (default its max sequence length).
+            _Overlap    : Overlap of consecutive Chunks, in the same unit (default PLATYPUS_CHUNK_OVERLAP
+                          or PLATYPUS_TOKEN_CHUNK_OVERLAP).
+            _Cache      : Optional EmbeddingCache.
+            _Mode       : One of PLATYPUS_CHUNK_MODES, "tokens" packs Chunks up to the model's sequence length.
+            _Workers    : Worker processes of the EncodingEngine, see EncodingEngine.
+    """
     def __init__(self, 
                  _Embedder: Embedder,
                  _Debug: bool,
-                 _Size: int = 128,
-                 _Overlap: int= 4, **kwargs):
+                 _Size: int = None,
+                 _Overlap: int = None,
+                 _Cache: EmbeddingCache = None,
+                 _Mode: str = Foundation.PLATYPUS_DEFAULT_CHUNK_MODE,
+                 _Workers: int = Foundation.PLATYPUS_ENCODE_WORKERS, **kwargs):
         
         # Sanity Checks
         
         if not isinstance(_Embedder, Embedder):
-            print("PARAM(_Embedder) must of of type platypus.Core.Vectorizer.Embedder!")
+            Log.warning("PARAM(_Embedder) must of of type platypus.Core.Vectorizer.Embedder!")
+
+        if _Mode not in Foundation.PLATYPUS_CHUNK_MODES:
+            raise ValueError(f"Unknown chunk mode {_Mode}, expected one of {Foundation.PLATYPUS_CHUNK_MODES}")
+
+        if _Mode == "tokens" and getattr(_Embedder.STModel, "tokenizer", None) is None:
+            raise ValueError(f"Chunking by tokens needs the tokenizer of the model, {_Embedder.Identity} has none")
+
+        if _Mode == "tokens":
+            # Room for the special tokens ([CLS], [SEP], ...) the model adds around every Chunk
+            _Size       = _Size or _Embedder.STModel.max_seq_length - _Embedder.STModel.tokenizer.num_special_tokens_to_add()
+            _Overlap    = Foundation.PLATYPUS_TOKEN_CHUNK_OVERLAP if _Overlap is None else _Overlap
+        else:
+            _Size       = _Size or Foundation.PLATYPUS_CHUNK_SIZE
+            _Overlap    = Foundation.PLATYPUS_CHUNK_OVERLAP if _Overlap is None else _Overlap
 
         # Attributes Initialization
         self.ChunkEmbedder      = _Embedder
         self.ChunkSize          = _Size
         self.ChunkOverlap       = _Overlap
+        self.ChunkMode          = _Mode
+        # Length bucketed (& optionally multi-process) encoding of every Chunk
+        self.Engine             = EncodingEngine(_Embedder, _Workers)
+        # Built once on first use & reused by every Chunk call
+        self.TextSplitter       = None
+        # Optional persistent Embedding cache, keyed within everything the Embeddings depend on
+        self.Cache              = _Cache
+        self.CacheNamespace     = f"{_Embedder.Identity}|{_Size}|{_Overlap}" + ("|tokens" if _Mode == "tokens" else "")
+
+    """
+        Splits a Given Text into Chunks of ChunkSize with ChunkOverlap,
+        measured in characters or in tokens of the Embedder's tokenizer
+
+        Params:
+            _Text (str) =: Text to be Chunked
+    """
+    def Chunk(self, _Text: str):
+
+        if self.TextSplitter is None and self.ChunkMode == "tokens":
+
+            # Splits on paragraphs, lines & words as before, merging the pieces up to ChunkSize tokens
+            self.TextSplitter = Foundation.RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+                self.ChunkEmbedder.STModel.tokenizer,
+                chunk_size          = self.ChunkSize,
+                chunk_overlap       = self.ChunkOverlap,
+                add_start_index     = False)
+
+        elif self.TextSplitter is None:
+
+            # Use langchain's RecursiveCharacterTextSplitter
+            self.TextSplitter = Foundation.RecursiveCharacterTextSplitter(
+                chunk_size          = self.ChunkSize,
+                chunk_overlap       = self.ChunkOverlap,
+                length_function     = len,
+                add_start_index     = False)
+
+        with Metrics.Timer("chunk_seconds"):
+            Chunks = self.TextSplitter.split_text(_Text)
+
+        Metrics.Increment("chunks_total", len(Chunks))
+
+        return Chunks
+
+    """
+        Encodes a list of Chunks in fixed size batches, if there's a Cache
+        only the Chunks missing from it are encoded (& written back)
+
+        Params:
+            _Chunks (list)      =: Valid list containing str
+            _BatchSize (int)    =: Number of Chunks per forward pass
+    """
+    def EncodeChunks(self, _Chunks: list, _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE):
+
+        if self.Cache is None or not _Chunks:
+            return self.__Encode(_Chunks, _BatchSize)
+
+        Keys    = self.Cache.Keys(self.CacheNamespace, _Chunks)
+        Cached  = self.Cache.Lookup(Keys)
+        # Each distinct missing Chunk is encoded once
+        Missing = {Key: Chunk for Key, Chunk in zip(Keys, _Chunks) if Key not in Cached}
+
+        Metrics.Increment("embedding_cache_hits_total", len(_Chunks) - len(Missing))
+
+        if Missing:
+
+            Encoded = self.__Encode(list(Missing.values()), _BatchSize)
+            self.Cache.Store(list(Missing.keys()), Encoded)
+            Cached.update(zip(Missing.keys(), Encoded))
+
+        return Foundation.np.vstack([Cached[Key] for Key in Keys]).astype(Foundation.np.float32, copy = False)
+
+    def __Encode(self, _Chunks: list, _BatchSize: int):
+
+        with Metrics.Timer("encode_seconds"):
+            Embeddings = self.Engine.Encode(_Chunks, _BatchSize)
+
+        Metrics.Increment("encoded_chunks_total", len(_Chunks))
+
+        return Embeddings
+
+    """
+        Vectorizes a list of Texts into one mean vector per Text
+
+        All the Texts are chunked first, then every chunk is encoded in
+        batches of _BatchSize and reduced back to per Text means using the
+        segment offsets of each Text's chunks
+
+        Params:
+            _Texts (list)       =: Valid list containing str
+            _BatchSize (int)    =: Number of Chunks per forward pass
+
+        Returns:
+            (Means, Counts) =: float32 array of shape (len(_Texts), Dimension) &
+                               number of chunks per Text, Texts with 0 chunks
+                               have a zero vector
+    """
+    def VectorizeMeans(self, _Texts: list, _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE):
+
+        Chunks = []
+        Counts = Foundation.np.zeros(len(_Texts), dtype = Foundation.np.int64)
+
+        for i, Text in enumerate(_Texts):
+
+            TextChunks  = self.Chunk(Text)
+            Counts[i]   = len(TextChunks)
+            Chunks.extend(TextChunks)
+
+        Dimension   = self.ChunkEmbedder.STModel.get_sentence_embedding_dimension()
+        Means       = Foundation.np.zeros((len(_Texts), Dimension), dtype = Foundation.np.float32)
+
+        if not Chunks:
+            return Means, Counts
+
+        Embeddings  = self.EncodeChunks(Chunks, _BatchSize)
+
+        # Texts with no chunks own an empty segment, reduceat needs strictly the non-empty ones
+        Valid       = Counts > 0
+        Offsets     = Foundation.np.concatenate(([0], Foundation.np.cumsum(Counts)[:-1]))
+
+        Means[Valid] = Foundation.np.add.reduceat(Embeddings, Offsets[Valid], axis = 0) / Counts[Valid, None]
+
+        return Means, Counts
     
     """
         Vectorizes a Given list of Text
@@ -44,16 +409,16 @@ class ChunkVectorizer(object):
 
         # Sanity checks
         if len(_ExtractedText) == 0:
-            print("[Platypus][VectorizeChunk]: PARAM(_ExtractedText) cannot be empty!")
+            Log.warning("PARAM(_ExtractedText) cannot be empty!")
 
-        # Use langchain's RecursiveCharacterTextSplitter
-        TextSplitter = Foundation.RecursiveCharacterTextSplitter(
-            chunk_size          = self.ChunkSize,
-            chunk_overlap       = self.ChunkOverlap,
-            length_function     = len,
-            add_start_index     = False)
-
-        Chunks = TextSplitter.split_text(_ExtractedText)
+        Chunks = self.Chunk(_ExtractedText)
         
-        # return the encoded chunks as np.array
-        return Foundation.np.array(self.ChunkEmbedder.STModel.encode(Chunks))
\ No newline at end of file
+        # return the encoded chunks as np.array, through the Cache if there's one
+        return self.EncodeChunks(Chunks, Foundation.PLATYPUS_ENCODE_BATCH_SIZE)
+
+    """
+        Stops the encoding worker processes, if any
+    """
+    def Close(self):
+
+        self.Engine.Close()
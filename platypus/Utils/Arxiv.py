@@ -0,0 +1,136 @@
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Utils.Log import GetLogger
+from urllib.parse import quote
+
+Log = GetLogger("Arxiv")
+
+def ArxivEntriesIntoDict() -> list:
+
+    Entries = []
+
+    with open(Foundation.os.path.join(Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY, Foundation.PLATYPUS_ARXIV_RECORD_FILE)) as File:
+        
+        Entries = Foundation.json.load(File)
+
+    return Entries
+
+"""
+Parses one page of the Arxiv Atom feed
+
+Returns:
+    (Entries, TotalResults) =: list of {"Title", "Summary", "URL", "PaperID", "Categories", "Published"} &
+                               total number of results of the query (None if absent)
+"""
+def ParseArxivFeed(_Content: bytes):
+
+    Entries = []
+    Root    = Foundation.ET.fromstring(_Content)
+
+    for entry in Root.findall("{http://www.w3.org/2005/Atom}entry"):
+
+        Title = entry.find("{http://www.w3.org/2005/Atom}title").text.strip()
+        Summary = entry.find("{http://www.w3.org/2005/Atom}summary").text.strip()
+        Link = entry.find("{http://www.w3.org/2005/Atom}id").text.strip()
+        ArxivID = Link.split("/")[-1]
+        Published = entry.find("{http://www.w3.org/2005/Atom}published")
+        Entries.append({
+            "Title"     : Title,
+            "Summary"   : Summary,
+            "URL"       : Link.replace("/abs/", "/pdf/"),
+            "PaperID"   : ArxivID,
+            # e.g. ["cs.LG", "stat.ML"] & "2017-06-12T17:57:34Z"
+            "Categories": [Category.get("term") for Category in entry.findall("{http://www.w3.org/2005/Atom}category")],
+            "Published" : Published.text.strip() if Published is not None else ""
+        })
+
+    TotalResults = Root.find("{http://a9.com/-/spec/opensearch/1.1/}totalResults")
+
+    return Entries, int(TotalResults.text) if TotalResults is not None else None
+
+"""
+Searches Arxiv using the Query and Retreives _MaxResults number of Papers
+See platypus.Utils.Harvester for a concurrent, rate-limited & resumable version
+"""
+def SearchArxiv(_Query: str, _Debug: bool, _MaxResults = 1024, _BatchSize = 1024, **kwargs):
+    
+    BaseURL = "http://export.arxiv.org/api/query?"
+    Start = 0
+    Entries = []
+
+    while Start < _MaxResults:
+
+        MaxRetreivable = min(_BatchSize, _MaxResults - Start)
+        QueryURL = f"search_query=all:{quote(_Query)}&start={Start}&max_results={MaxRetreivable}"
+
+        Response = None
+
+        # Send request to arxiv for papers
+        try:
+
+            Response = Foundation.requests.get(BaseURL + QueryURL, timeout=10)
+            Response.raise_for_status()
+
+        except Foundation.requests.exceptions.RequestException as e:
+
+            Log.error(f"HTTP Request failed: {e}")
+            return []
+
+        # Parse the metadata
+        try:
+
+            BatchEntries, _ = ParseArxivFeed(Response.content)
+            Entries.extend(BatchEntries)
+
+        except Foundation.ET.ParseError as e:
+
+            Log.error(f"Failed to parse XML: {e}")
+
+        if _Debug:
+            Log.debug(f"Retreived Batch {(int)((Start / _BatchSize)+ 1)}")
+        
+        Start += _BatchSize
+        Foundation.time.sleep(1.5)
+
+    with open(Foundation.os.path.join(Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY, Foundation.PLATYPUS_ARXIV_RECORD_FILE), "w+") as File:
+        Foundation.json.dump(Entries, File)
+
+    if _Debug:
+        Log.debug(f"Successfully written ArxivEntries to {Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY}/{Foundation.PLATYPUS_ARXIV_RECORD_FILE}")
+
+def DownloadPDFArxiv(_URL:str, _Debug: bool, **kwargs):
+    
+    try:
+        with Metrics.Timer("download_seconds"):
+            # Download Content (Stream Mode)
+            Response = Foundation.requests.get(_URL, stream = True)
+            Response.raise_for_status()
+            # 
+            if not Response.content.startswith(b"%PDF"):
+                raise ValueError("[Platypus][Arxiv]: Invalid PDF header")
+
+        Metrics.Increment("downloaded_bytes_total", len(Response.content))
+
+    except Exception as e:
+        Metrics.Increment("download_failures_total")
+        Log.warning(f"Skipping {_URL} due to download/header issue: {e}")
+        return None
+
+    if _Debug:
+        Log.debug(f"Downloaded {_URL}")
+
+    try:
+        with Metrics.Timer("parse_seconds"):
+            # In-Memory PDF Processing using fitz
+            PDF     = Foundation.fitz.open(stream=Response.content, filetype="pdf")
+            Text    = "\n".join([page.get_text() for page in PDF])
+            PDF.close()
+
+        if not Text.strip():
+            raise ValueError("[Platypus][DB]: Empty text extracted from PDF")
+
+    except Exception as e:
+        Metrics.Increment("parse_failures_total")
+        Log.warning(f"Skipping {_URL} due to PDF parsing failure: {e}")
+        return None
\ No newline at end of file
@@ -1,90 +1,78 @@
-from platypus.Utils.Foundation          import requests, os, PLATYPUS_INTERMEDIATE_PATH, ArxivEntriesIntoDict, time, np
-from platypus.Core.Vectorizer           import ChunkVectorizer, Embedder
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Utils.Foundation          import requests
+from platypus.Utils.Pipeline            import IngestionPipeline, VectorizedOperation
+from platypus.Core.Vectorizer           import ChunkVectorizer
 from platypus.Core.Database             import MongoDBManager
-from pymongo import UpdateOne
-import bson
+from platypus.Utils.Log                 import GetLogger
 import fitz
-from tqdm import tqdm
-from joblib import Parallel, delayed
-from multiprocessing import cpu_count
-from functools import partial
 
-def ProcessDocument(_Document: dict, _Vectorizer: ChunkVectorizer, _Debug: bool):
+Log = GetLogger("BulkDownload")
+
+def ProcessDocument(_Document: dict, _Vectorizer: ChunkVectorizer, _Debug: bool,
+                    _Codec: str = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC):
 
     URL = _Document["URL"]
         
     try:
-        Response = requests.get(URL, stream = True)
-        Response.raise_for_status()
+        with Metrics.Timer("download_seconds"):
+            Response = requests.get(URL, stream = True)
+            Response.raise_for_status()
+
+            if not Response.content.startswith(b"%PDF"):
+                raise ValueError("[Platypus][DB]: Invalid PDF header")
 
-        if not Response.content.startswith(b"%PDF"):
-            raise ValueError("[Platypus][DB]: Invalid PDF header")
+        Metrics.Increment("downloaded_bytes_total", len(Response.content))
 
     except Exception as e:
-        print(f"[Platypus][DB]: Skipping {URL} due to download/header issue: {e}")
+        Metrics.Increment("download_failures_total")
+        Log.warning(f"Skipping {URL} due to download/header issue: {e}")
         return None
 
     # if _Debug:
         # print(f"[Platypus][DB]: Downloaded {URL}")
 
     try:
-        pdf = fitz.open(stream=Response.content, filetype="pdf")
-        text = "\n".join([page.get_text() for page in pdf])
-        pdf.close()
+        with Metrics.Timer("parse_seconds"):
+            pdf = fitz.open(stream=Response.content, filetype="pdf")
+            text = "\n".join([page.get_text() for page in pdf])
+            pdf.close()
 
         if not text.strip():
             raise ValueError("[Platypus][DB]: Empty text extracted from PDF")
 
     except Exception as e:
-        print(f"[Platypus][DB]: Skipping {URL} due to PDF parsing failure: {e}")
+        Metrics.Increment("parse_failures_total")
+        Log.warning(f"Skipping {URL} due to PDF parsing failure: {e}")
         return None    
 
     VectorizedChunk = _Vectorizer.Vectorize(text)
 
-    Document = {
-        "_id"               : os.path.basename(URL),
-        "WholeEmbedding"    : bson.Binary(VectorizedChunk.tobytes()),
-        "dtype"             : str(VectorizedChunk.dtype),
-        "shape"             : VectorizedChunk.shape
-    }
-
-    # print(f"[Platypus][DB]: Processed {URL}")
-    # time.sleep(0.5)
-
-    return UpdateOne(
-                filter = {"_id" : _Document["_id"]},
-                update = {"$set":  Document},
-                upsert = True)
-
+    if _Debug and _Vectorizer.Cache is not None:
+        Log.debug(f"Embedding cache {_Vectorizer.Cache.Stats()} after {URL}")
 
-def DownloadPDF(DBManager: MongoDBManager, _Documents: list, _Debug: bool, _BatchSize: int = 8, **kwargs):
-    Collection = DBManager.DB[DBManager.CollectionArxivPDFVectorized]
+    return VectorizedOperation(_Document, VectorizedChunk, _Codec)
 
-    total_batches = (len(_Documents) + _BatchSize - 1) // _BatchSize
-    Batch = 0
 
-    with tqdm(total=total_batches, desc="[Platypus][DB]: Downloading PDFs") as pbar:
-        while Batch < len(_Documents):
+"""
+    Downloads, parses & embeds the PDFs of _Documents and upserts their chunk
+    Embeddings into ArxivVectorized, streaming them through an IngestionPipeline
 
-            print(f"[Platypus][DB]: Starting joblib parallel with {cpu_count()} workers... (Batch = {Batch/_BatchSize + 1})")
-            
-            Results = Parallel(n_jobs=cpu_count(), backend="loky")(
-                delayed(ProcessDocument)(_Document, _Debug) for _Document in _Documents[Batch:Batch + _BatchSize]
-            )
+    Args:
+        DBManager   : MongoDBManager to write into, closed once done.
+        _Documents  : Iterable of dicts with "_id" & "URL".
+        _Vectorizer : ChunkVectorizer holding the (single) model.
+        **kwargs    : IngestionPipeline knobs (_NumFetchers, _NumParsers, _EmbedChunks, _Codec, ...).
 
-            Operations = [op for op in Results if op is not None]
+    Returns:
+        Per Stage throughput & queue depth report of the Pipeline
+"""
+def DownloadPDF(DBManager: MongoDBManager, _Documents: list, _Vectorizer: ChunkVectorizer, _Debug: bool, **kwargs):
 
-            if Operations:
-                try:
-                    result = Collection.bulk_write(Operations)
-                    print(f"[Platypus][DB]: Inserted {result.upserted_count} into {Collection.name}")
-                    print(f"[Platypus][DB]: Modified {result.modified_count} into {Collection.name}")
-                except Exception as e:
-                    print(f"[Platypus][DB]: bulk_write Failed: {e}")
-            else:
-                print("[Platypus][DB]: No valid operations generated.")
+    Pipeline    = IngestionPipeline(DBManager, _Vectorizer, _Debug, **kwargs)
+    Report      = Pipeline.Run(_Documents)
 
-            Batch += _BatchSize
-            pbar.update(1)
+    DBManager.Client.close()
 
-    DBManager.Client.close()
\ No newline at end of file
+    return Report
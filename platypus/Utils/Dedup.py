@@ -0,0 +1,348 @@
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Core.Database     import MongoDBManager
+from platypus.Core.Indexer      import FAISSIndexer, CreateIndex, DocumentID, IsKeyed, StoredIDs, InvertedFileIndex
+from platypus.Core.Similarity   import Similarities
+from platypus.Utils.Log         import GetLogger, ConfigureLogging
+
+import argparse
+
+Log = GetLogger("Dedup")
+
+class UnionFind(object):
+
+    """
+        Disjoint sets of FAISS ids, only ids that were joined are stored so
+        memory grows with the duplicates rather than the corpus
+    """
+    def __init__(self):
+
+        self.Parent = {}
+        self.Size   = {}
+
+    def Find(self, _ID: int) -> int:
+
+        Parent = self.Parent
+
+        if _ID not in Parent:
+            return _ID
+
+        # Path halving
+        while Parent[_ID] != _ID:
+            Parent[_ID] = Parent[Parent[_ID]]
+            _ID         = Parent[_ID]
+
+        return _ID
+
+    def Union(self, _A: int, _B: int) -> int:
+
+        for ID in (_A, _B):
+            if ID not in self.Parent:
+                self.Parent[ID] = ID
+                self.Size[ID]   = 1
+
+        A, B = self.Find(_A), self.Find(_B)
+
+        if A == B:
+            return A
+
+        # Union by size
+        if self.Size[A] < self.Size[B]:
+            A, B = B, A
+
+        self.Parent[B]  = A
+        self.Size[A]   += self.Size.pop(B)
+
+        return A
+
+    """
+        Members of every set with more than one id, keyed by root
+    """
+    def Groups(self) -> dict:
+
+        Groups = {}
+
+        for ID in self.Parent:
+            Groups.setdefault(self.Find(ID), []).append(ID)
+
+        return Groups
+
+"""
+    Stored vectors of positions [_Begin, _End) of an _id keyed Index & their
+    FAISS ids, _IDs are its StoredIDs (an IVF Index is read by id, see Run)
+"""
+def StoredVectors(_Index, _IDs, _Begin: int, _End: int):
+
+    if isinstance(_Index, Foundation.faiss.IndexIDMap2):
+        return _Index.index.reconstruct_n(_Begin, _End - _Begin), _IDs[_Begin:_End]
+
+    return _Index.reconstruct_batch(_IDs[_Begin:_End]), _IDs[_Begin:_End]
+
+class DedupJob(object):
+
+    """
+        Finds near-duplicate documents of an Index
+
+        The stored vectors are read back in blocks of _BatchSize & every block
+        is searched against the whole Index in one call (faiss spreads it over
+        _Threads threads), giving each vector's _K nearest neighbours. Pairs at
+        least _Threshold cosine similar are joined with union-find into groups
+        of duplicates. Memory is bounded by one block of vectors & results plus
+        the duplicate pairs, so millions of vectors can be processed.
+
+        The canonical document of a group is its smallest _id (the earliest
+        arXiv id), the others are its duplicates.
+
+        Args:
+            _Indexer    : FAISSIndexer with a loaded Index keyed by _id (it may be memory-mapped).
+            _Debug      : Debug Flag.
+            _Threshold  : Minimum cosine similarity of two duplicates.
+            _K          : Nearest neighbours searched per vector (including itself).
+            _BatchSize  : Vectors searched per call.
+            _Threads    : faiss (OpenMP) threads of Run, None keeps the default.
+    """
+    def __init__(self,
+                 _Indexer: FAISSIndexer,
+                 _Debug: bool,
+                 _Threshold: float = Foundation.PLATYPUS_DEDUP_THRESHOLD,
+                 _K: int = Foundation.PLATYPUS_DEDUP_K,
+                 _BatchSize: int = Foundation.PLATYPUS_DEDUP_BATCH_SIZE,
+                 _Threads: int = None, **kwargs):
+
+        self.Indexer    = _Indexer
+        self.Debug      = _Debug
+        self.Threshold  = _Threshold
+        self.K          = _K
+        self.BatchSize  = _BatchSize
+        self.Threads    = _Threads
+        # Groups found by Run, list of dicts {_id, Members, Size, MinSimilarity, MaxSimilarity}
+        self.Groups     = []
+
+    """
+        Builds the kNN graph of the Index & groups the duplicates
+
+        Returns:
+            dict {Vectors, Pairs, Groups, Duplicates, Seconds, VectorsPerSecond}
+    """
+    def Run(self) -> dict:
+
+        Index = self.Indexer.FAISSIndex
+
+        if not IsKeyed(Index):
+            raise RuntimeError("Dedup needs an Index keyed by _id, rebuild it with BuildIndices first")
+
+        IDs         = StoredIDs(Index)
+        IVF         = InvertedFileIndex(Index)
+        Threads     = Foundation.faiss.omp_get_max_threads()
+        Sets        = UnionFind()
+        Edges       = {}
+        StartTime   = Foundation.time.perf_counter()
+
+        # IVF Indices reconstruct by id through a hashtable direct map (their ids aren't sequential),
+        # built for the Run only
+        with self.Indexer.Lock:
+            DirectMap = IVF.direct_map.type if IVF is not None else None
+            if IVF is not None and DirectMap != Foundation.faiss.DirectMap.Hashtable:
+                IVF.set_direct_map_type(Foundation.faiss.DirectMap.Hashtable)
+
+        if self.Threads is not None:
+            Foundation.faiss.omp_set_num_threads(self.Threads)
+
+        try:
+
+            for Begin in range(0, len(IDs), self.BatchSize):
+
+                End = min(Begin + self.BatchSize, len(IDs))
+
+                with self.Indexer.Lock:
+                    Vectors, Queries    = StoredVectors(Index, IDs, Begin, End)
+                    Distances, Labels   = Index.search(Vectors, self.K)
+
+                Similar = (Similarities(Index, Distances) >= self.Threshold) & (Labels >= 0) & (Labels != Queries[:, None])
+
+                for Row, Column in zip(*Foundation.np.nonzero(Similar)):
+
+                    A, B        = int(Queries[Row]), int(Labels[Row, Column])
+                    Similarity  = float(Similarities(Index, Distances[Row, Column]))
+                    Sets.Union(A, B)
+                    # Both directions of a pair are usually found, the higher similarity is kept
+                    Edges[min(A, B), max(A, B)] = max(Similarity, Edges.get((min(A, B), max(A, B)), 0.0))
+
+                Metrics.Increment("dedup_vectors_total", End - Begin)
+
+                if self.Debug:
+                    Log.debug(f"Searched {End}/{len(IDs)} vectors, {len(Edges)} pairs so far")
+
+        finally:
+
+            Foundation.faiss.omp_set_num_threads(Threads)
+
+            with self.Indexer.Lock:
+                if IVF is not None and IVF.direct_map.type != DirectMap:
+                    IVF.set_direct_map_type(DirectMap)
+
+        self.Groups = self.__Describe(Sets, Edges)
+        Seconds     = Foundation.time.perf_counter() - StartTime
+        Duplicates  = sum(Group["Size"] - 1 for Group in self.Groups)
+
+        Log.info(f"Found {len(self.Groups)} groups ({Duplicates} duplicates) among {len(IDs)} vectors in {Seconds:.2f}s")
+
+        return {"Vectors"           : len(IDs),
+                "Pairs"             : len(Edges),
+                "Groups"            : len(self.Groups),
+                "Duplicates"        : Duplicates,
+                "Seconds"           : Seconds,
+                "VectorsPerSecond"  : len(IDs) / max(Seconds, 1e-9)}
+
+    """
+        Replaces the ArxivDuplicates collection with the Groups of the last Run
+
+        Returns:
+            InsertRecords report
+    """
+    def WriteGroups(self, _DBManager: MongoDBManager) -> dict:
+
+        Collection = _DBManager.CollectionArxivDuplicates
+
+        if not _DBManager.HasCollection(Collection):
+            _DBManager.DB.create_collection(Collection)
+            _DBManager.Collections.add(Collection)
+
+        _DBManager.DB[Collection].delete_many({})
+
+        if not self.Groups:
+            return {"Inserted": 0, "Modified": 0, "Failed": 0, "Seconds": 0.0, "DocsPerSec": 0.0}
+
+        return _DBManager.InsertRecords([dict(Group) for Group in self.Groups], Collection, _New = True)
+
+    """
+        Writes a copy of the Index without the duplicates of the last Run to _Directory
+
+        Returns:
+            FAISSIndexer of the deduplicated Index
+    """
+    def BuildDedupIndex(self, _Directory: str = Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_DEDUP_DIRECTORY)) -> FAISSIndexer:
+
+        Duplicates  = {DocumentID(Member) for Group in self.Groups for Member in Group["Members"] if Member != Group["_id"]}
+        Removed     = Foundation.np.fromiter(Duplicates, dtype = Foundation.np.int64, count = len(Duplicates))
+        Deduped     = FAISSIndexer(self.Indexer.Vectorizer, self.Debug, self.Indexer.IndexSpec,
+                                   self.Indexer.SearchParameters, _Directory = _Directory)
+
+        with self.Indexer.Lock:
+
+            # A clone of a memory-mapped Index still views the file, a private copy is read instead
+            if self.Indexer.MemoryMapped:
+                Index = Foundation.faiss.read_index(self.Indexer.IndexPath)
+            else:
+                Index = Foundation.faiss.clone_index(self.Indexer.FAISSIndex)
+
+            # Only IVF Indices (ids in the inverted lists) & IDMap2 wrapped flat codes (compacted
+            # with the id map) remove in place, the kept vectors of any other are added to a new Index
+            if self.__RemovesInPlace(Index):
+                Index.remove_ids(Removed)
+            else:
+                Index = self.__Rebuild(Duplicates)
+
+            Deduped.FAISSIndex  = Index
+            Deduped.Metadata    = {ID: Metadata for ID, Metadata in self.Indexer.Metadata.items() if ID not in Duplicates}
+
+        Deduped.SetSearchParameters()
+        Deduped.SaveIndices()
+
+        Log.info(f"Deduplicated Index has {Index.ntotal} vectors ({len(Removed)} removed)")
+
+        return Deduped
+
+    """
+        Whether remove_ids keeps every remaining vector of _Index under its FAISS id
+    """
+    def __RemovesInPlace(self, _Index) -> bool:
+
+        if isinstance(_Index, Foundation.faiss.IndexIDMap2):
+            return isinstance(Foundation.faiss.downcast_index(_Index.index), Foundation.faiss.IndexFlatCodes)
+
+        return IsKeyed(_Index)
+
+    """
+        A new Index of the stored vectors not in _Removed, added block by block
+    """
+    def __Rebuild(self, _Removed: set):
+
+        Index   = self.Indexer.FAISSIndex
+        IDs     = StoredIDs(Index)
+        Keep    = ~Foundation.np.isin(IDs, Foundation.np.fromiter(_Removed, dtype = Foundation.np.int64, count = len(_Removed)))
+        Rebuilt = None
+
+        for Begin in range(0, len(IDs), self.BatchSize):
+
+            End             = min(Begin + self.BatchSize, len(IDs))
+            Vectors, Block  = StoredVectors(Index, IDs, Begin, End)
+            Vectors, Block  = Vectors[Keep[Begin:End]], Block[Keep[Begin:End]]
+
+            if Rebuilt is None:
+                # Trained on the first block
+                Rebuilt = CreateIndex(self.Indexer.IndexSpec, Vectors, _NumVectors = int(Keep.sum()))
+
+            Rebuilt.add_with_ids(Foundation.np.ascontiguousarray(Vectors), Block)
+
+        return Rebuilt
+
+    """
+        Groups of the joined sets with their canonical _id & edge similarities
+    """
+    def __Describe(self, _Sets: UnionFind, _Edges: dict) -> list:
+
+        Metadata    = self.Indexer.Metadata
+        Similarity  = {}
+
+        for (A, _), Value in _Edges.items():
+            Root                = _Sets.Find(A)
+            Low, High           = Similarity.get(Root, (Value, Value))
+            Similarity[Root]    = (min(Low, Value), max(High, Value))
+
+        Groups = []
+
+        for Root, Members in _Sets.Groups().items():
+
+            Members = sorted(str(Metadata[ID]["_id"]) for ID in Members if ID in Metadata)
+
+            if len(Members) < 2:
+                continue
+
+            Groups.append({"_id"            : Members[0],
+                           "Members"        : Members,
+                           "Size"           : len(Members),
+                           "MinSimilarity"  : Similarity[Root][0],
+                           "MaxSimilarity"  : Similarity[Root][1]})
+
+        return sorted(Groups, key = lambda _Group: _Group["_id"])
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Group near-duplicate documents of the saved FAISS Index")
+    Parser.add_argument("--threshold", type = float, default = Foundation.PLATYPUS_DEDUP_THRESHOLD, help = "minimum cosine similarity")
+    Parser.add_argument("--k", type = int, default = Foundation.PLATYPUS_DEDUP_K)
+    Parser.add_argument("--batch-size", type = int, default = Foundation.PLATYPUS_DEDUP_BATCH_SIZE)
+    Parser.add_argument("--threads", type = int, default = None)
+    Parser.add_argument("--no-write", action = "store_true", help = "don't write the groups to MongoDB")
+    Parser.add_argument("--dedup-index", action = "store_true", help = "also write an Index without the duplicates")
+    Parser.add_argument("--debug", action = "store_true")
+    Args = Parser.parse_args()
+
+    Indexer = FAISSIndexer(None, Args.debug)
+
+    # Memory-mapped, only a block of vectors is read at a time
+    if not Indexer.LoadIndices(_MemoryMap = True):
+        raise SystemExit("[Platypus][Dedup]: No Index to deduplicate, build one with FAISSIndexer.BuildIndices first")
+
+    Job = DedupJob(Indexer, Args.debug, Args.threshold, Args.k, Args.batch_size, Args.threads)
+    Job.Run()
+
+    if not Args.no_write:
+        Job.WriteGroups(MongoDBManager(Args.debug))
+
+    if Args.dedup_index:
+        Job.BuildDedupIndex()
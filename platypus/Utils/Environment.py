@@ -0,0 +1,62 @@
+from platypus.Utils.Log import GetLogger
+
+import json
+import threading
+
+Log = GetLogger("Environment")
+
+"""
+Environment Loader, Loads Required Credentials, Variables, Tokens and API Keys
+"""
+class EnvironmentLoader(object):
+
+    def __init__(self, _Path: str = "Environment.json"):
+        with open(_Path, "r") as EnvFile:
+            EnvKeys = json.load(EnvFile)
+
+        self.DBUsername = EnvKeys["DB_USERNAME"]
+        self.DBName     = EnvKeys["DB_NAME"]
+        self.DBCluster  = EnvKeys["DB_CLUSTER"]
+        self.DBHost     = EnvKeys["DB_HOST"]
+        self.DBPort     = int(EnvKeys["DB_PORT"])
+        self.DBPassword = EnvKeys["DB_PASSWORD"]
+        self.HFToken    = EnvKeys["HF_TOKEN"]
+
+# Environment Object, loaded on first use
+_Env        = None
+_LoggedIn   = False
+_Lock       = threading.Lock()
+
+"""
+Loads Environment.json once, Foundation.Env resolves to it
+"""
+def LoadEnvironment() -> EnvironmentLoader:
+
+    global _Env
+
+    with _Lock:
+        if _Env is None:
+            _Env = EnvironmentLoader()
+
+    return _Env
+
+"""
+Logs in to Hugging Face once, before the first model is loaded. Without
+Environment.json or network access only public & cached models are usable.
+"""
+def LoginHuggingFace():
+
+    global _LoggedIn
+
+    with _Lock:
+
+        if _LoggedIn:
+            return
+
+        _LoggedIn = True
+
+    try:
+        import huggingface_hub
+        huggingface_hub.login(token = LoadEnvironment().HFToken)
+    except Exception as e:
+        Log.warning(f"Hugging Face login skipped ({e}), using public & cached models only")
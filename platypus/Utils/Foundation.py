@@ -1,156 +1,187 @@
-from sentence_transformers      import SentenceTransformer
-from urllib.parse               import quote
-from transformers               import pipeline, AutoModelForCausalLM, AutoTokenizer
-from langchain_text_splitters   import RecursiveCharacterTextSplitter
+"""
+Foundation, Shared Constants & Dependencies of Platypus
 
+Importing Foundation is cheap: heavy dependencies (numpy, faiss, torch backed
+models, langchain, pymongo, ...), the Environment & the Hugging Face login
+are resolved lazily, on first attribute access (e.g. Foundation.faiss), and
+then cached as plain module attributes.
+"""
 import xml.etree.ElementTree    as ET
-import numpy                    as np
-import streamlit                as st
 
-import pymupdf
+import importlib
 import os
-import requests
 import time
-import faiss
-import huggingface_hub
 import json
-import pymongo
-import fitz
-import bson.raw_bson
+
+# Foundation.<Name> -> module imported on first use
+_LAZY_MODULES = {
+    "np"                : "numpy",
+    "st"                : "streamlit",
+    "pymupdf"           : "pymupdf",
+    "fitz"              : "fitz",
+    "requests"          : "requests",
+    "faiss"             : "faiss",
+    "huggingface_hub"   : "huggingface_hub",
+    "pymongo"           : "pymongo",
+    "bson"              : "bson",
+    "torch"             : "torch",
+    "onnxruntime"       : "onnxruntime",
+}
+
+# Foundation.<Name> -> (module, attribute, needs Hugging Face login) imported on first use
+_LAZY_ATTRIBUTES = {
+    "SentenceTransformer"               : ("sentence_transformers",     "SentenceTransformer",              True),
+    "pipeline"                          : ("transformers",              "pipeline",                         True),
+    "AutoModelForCausalLM"              : ("transformers",              "AutoModelForCausalLM",             True),
+    "AutoTokenizer"                     : ("transformers",              "AutoTokenizer",                    True),
+    "TextIteratorStreamer"              : ("transformers",              "TextIteratorStreamer",             False),
+    "RecursiveCharacterTextSplitter"    : ("langchain_text_splitters",  "RecursiveCharacterTextSplitter",   False),
+    "quote"                             : ("urllib.parse",              "quote",                            False),
+    "EnvironmentLoader"                 : ("platypus.Utils.Environment","EnvironmentLoader",                False),
+    "ArxivEntriesIntoDict"              : ("platypus.Utils.Arxiv",      "ArxivEntriesIntoDict",             False),
+    "ParseArxivFeed"                    : ("platypus.Utils.Arxiv",      "ParseArxivFeed",                   False),
+    "SearchArxiv"                       : ("platypus.Utils.Arxiv",      "SearchArxiv",                      False),
+    "DownloadPDFArxiv"                  : ("platypus.Utils.Arxiv",      "DownloadPDFArxiv",                 False),
+}
 
 PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 PLATYPUS_DEFAULT_LANGUAGE_MODEL             = "TinyLlama/TinyLlama-1.1B-Chat-v1.0"
+PLATYPUS_LANGUAGE_MODEL_CACHE_DIRECTORY     = "Platypus_Cache"
+# Prompts padded into one generate call & the length of the generated Query
+PLATYPUS_GENERATION_BATCH_SIZE              = 8
+PLATYPUS_GENERATION_MAX_NEW_TOKENS          = 1024
 PLATYPUS_INTERMEDIATE_DIRECTORY             = "platypus_int"
 PLATYPUS_UTILS_DIRECTORY                    = "platypus_utils"
 
 PLATYPUS_TEMP_EXTRACTED_FILE                = "ExtractedText.temp"
+# PDFs with at least PLATYPUS_EXTRACT_PARALLEL_PAGES pages are extracted by a process pool,
+# starting one takes ~1s so smaller PDFs are faster serially unless a pool is passed in
+PLATYPUS_EXTRACT_PARALLEL_PAGES             = 256
+PLATYPUS_EXTRACT_PAGES_PER_TASK             = 16
 PLATYPUS_ARXIV_RECORD_FILE                  = "ArxivRecords.json"
 
 PLATYPUS_FAISS_INDEX_FILE                   = "FAISSIndex.index"
 PLATYPUS_METADATA_FILE                      = "IndexMetadata.npy"
+PLATYPUS_METADATA_STORE                     = "IndexMetadata"
+PLATYPUS_DELTA_DIRECTORY                    = "FAISSIndex.deltas"
+PLATYPUS_MAX_DELTA_FILES                    = 64
+
+# Named faiss.index_factory specs, {NList} & {PQM} are sized from the corpus at build time
+PLATYPUS_FAISS_INDEX_SPECS                  = {
+    "Flat"      : "Flat",
+    "IVFFlat"   : "IVF{NList},Flat",
+    "IVFPQ"     : "IVF{NList},PQ{PQM}",
+    "HNSW"      : "HNSW32",
+}
+PLATYPUS_DEFAULT_INDEX_SPEC                 = "Flat"
+PLATYPUS_INDEX_TRAIN_SAMPLE_SIZE            = 65536
+
+PLATYPUS_ENCODE_BATCH_SIZE                  = 256
+# Worker processes of the EncodingEngine, 1 encodes in the calling process
+PLATYPUS_ENCODE_WORKERS                     = 1
+# ChunkVectorizer: Chunks measured in characters (size & overlap below) or in tokens of the
+# Embedder's tokenizer, packed up to the model's max sequence length
+PLATYPUS_CHUNK_MODES                        = ("characters", "tokens")
+PLATYPUS_DEFAULT_CHUNK_MODE                 = "characters"
+PLATYPUS_CHUNK_SIZE                         = 128
+PLATYPUS_CHUNK_OVERLAP                      = 4
+PLATYPUS_TOKEN_CHUNK_OVERLAP                = 16
+PLATYPUS_BUILD_BLOCK_SIZE                   = 8192
+# Documents per round trip when streaming ArxivVectorized into an Index
+PLATYPUS_VECTORIZED_CURSOR_BATCH_SIZE       = 2048
+# Storage codecs of the ArxivVectorized chunk Embeddings, see platypus.Core.Codec
+PLATYPUS_EMBEDDING_CODECS                   = ("float32", "float16", "int8")
+PLATYPUS_DEFAULT_EMBEDDING_CODEC            = "float32"
+
+PLATYPUS_EMBEDDING_CACHE_FILE               = "EmbeddingCache.sqlite"
+PLATYPUS_EMBEDDING_CACHE_MAX_BYTES          = 4 * 2**30
+PLATYPUS_EMBEDDING_CACHE_BATCH_SIZE         = 512
+
+PLATYPUS_DOWNLOAD_TIMEOUT                   = 30
+PLATYPUS_PIPELINE_FETCHERS                  = 16
+PLATYPUS_PIPELINE_QUEUE_SIZE                = 256
+PLATYPUS_PIPELINE_EMBED_CHUNKS              = 4096
+PLATYPUS_PIPELINE_WRITE_BATCH_SIZE          = 64
+PLATYPUS_PIPELINE_MONITOR_INTERVAL          = 1.0
+# MongoDBManager: documents per bulk write, parallel bulk writes & connection pool size
+PLATYPUS_MONGO_WRITE_CHUNK_SIZE             = 1000
+PLATYPUS_MONGO_WRITERS                      = 1
+PLATYPUS_MONGO_MAX_POOL_SIZE                = 100
+# LiveIndexer: documents per Upsert, seconds between polls & between Index checkpoints, seconds a
+# write may take to become visible (newer writes wait for the next poll) & the watermark file
+PLATYPUS_LIVE_INDEX_BATCH_SIZE              = 256
+PLATYPUS_LIVE_INDEX_POLL_INTERVAL           = 2.0
+PLATYPUS_LIVE_INDEX_CHECKPOINT_INTERVAL     = 300.0
+PLATYPUS_LIVE_INDEX_SETTLE_SECONDS          = 1.0
+PLATYPUS_LIVE_INDEX_WATERMARK_FILE          = "LiveIndexWatermark.json"
+
+PLATYPUS_ARXIV_API_URL                      = "http://export.arxiv.org/api/query"
+PLATYPUS_ARXIV_CHECKPOINT_FILE              = "ArxivHarvest.checkpoint.json"
+PLATYPUS_ARXIV_RECORD_JSONL_FILE            = "ArxivRecords.jsonl"
+# arXiv asks for at most one request every 3 seconds
+PLATYPUS_ARXIV_REQUESTS_PER_SECOND          = 1.0 / 3.0
+PLATYPUS_ARXIV_PAGE_SIZE                    = 500
+PLATYPUS_ARXIV_MAX_RETRIES                  = 5
+# Local PDFs are named after their arXiv id, their records point at the arXiv PDF
+PLATYPUS_ARXIV_PDF_URL                      = "http://arxiv.org/pdf/{}"
+PLATYPUS_LOCAL_SUMMARY_MAX_CHARS            = 4096
+# Search Server, a micro-batch waits at most PLATYPUS_SEARCH_BATCH_WINDOW seconds for more queries
+PLATYPUS_SEARCH_SERVER_HOST                 = "127.0.0.1"
+PLATYPUS_SEARCH_SERVER_PORT                 = 8765
+PLATYPUS_SEARCH_BATCH_WINDOW                = 0.005
+PLATYPUS_SEARCH_MAX_BATCH                   = 64
+PLATYPUS_SEARCH_DEFAULT_K                   = 5
+PLATYPUS_SEARCH_MAX_K                       = 100
+PLATYPUS_SEARCH_LATENCY_WINDOW              = 10000
+# Similarity: nearest documents reported per abstract, abstracts searched per call & the
+# default cosine similarity above which an abstract is flagged
+PLATYPUS_SIMILARITY_DEFAULT_K               = 5
+PLATYPUS_SIMILARITY_BATCH_SIZE              = 4096
+PLATYPUS_SIMILARITY_THRESHOLD               = 0.9
+# Dedup: cosine similarity of near-duplicates, neighbours per vector, vectors self-searched per
+# call & the directory (under PLATYPUS_UTILS_DIRECTORY) of the deduplicated Index
+PLATYPUS_DEDUP_THRESHOLD                    = 0.95
+PLATYPUS_DEDUP_K                            = 10
+PLATYPUS_DEDUP_BATCH_SIZE                   = 16384
+PLATYPUS_DEDUP_DIRECTORY                    = "dedup"
+# In-memory LRU caches of FAISSIndexer, normalized query Embeddings & top-k results
+PLATYPUS_QUERY_CACHE_SIZE                   = 16384
+PLATYPUS_RESULT_CACHE_SIZE                  = 16384
+# Filtered search: ID selector bitmaps kept per Index version (one bit per vector each)
+PLATYPUS_SELECTOR_CACHE_SIZE                = 64
+# Embedder backends: PyTorch, dynamically int8 quantized PyTorch & ONNX Runtime (all CPU)
+PLATYPUS_EMBEDDER_BACKENDS                  = ("torch", "int8", "onnx")
+PLATYPUS_DEFAULT_EMBEDDER_BACKEND           = "torch"
+# Minimum mean cosine between a backend's Embeddings & the torch ones
+PLATYPUS_EMBEDDER_MIN_AGREEMENT             = 0.99
+# Upper bounds (seconds) of the buckets of Metrics timers
+PLATYPUS_METRICS_BUCKETS                    = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
 
 """
-Environment Loader, Loads Required Credentials, Variables, Tokens and API Keys
+Resolves the lazy attributes of Foundation (PEP 562), Env is the Environment
+loaded from Environment.json on first use
 """
-class EnvironmentLoader(object):
+def __getattr__(_Name: str):
 
-    def __init__(self):
-        with open("Environment.json", "r") as EnvFile:
-            EnvKeys = json.load(EnvFile)
+    if _Name in _LAZY_MODULES:
+        Value = importlib.import_module(_LAZY_MODULES[_Name])
 
-        self.DBUsername = EnvKeys["DB_USERNAME"]
-        self.DBName     = EnvKeys["DB_NAME"]
-        self.DBCluster  = EnvKeys["DB_CLUSTER"]
-        self.DBHost     = EnvKeys["DB_HOST"]
-        self.DBPort     = int(EnvKeys["DB_PORT"])
-        self.DBPassword = EnvKeys["DB_PASSWORD"]
-        self.HFToken    = EnvKeys["HF_TOKEN"]
+    elif _Name in _LAZY_ATTRIBUTES:
 
-# Environment Object
-Env = EnvironmentLoader()
-# Login to Hugging Face to use Models with Constraint
-huggingface_hub.login(token = Env.HFToken)
+        Module, Attribute, NeedsLogin = _LAZY_ATTRIBUTES[_Name]
 
-def ArxivEntriesIntoDict() -> list:
+        # Login to Hugging Face to use Models with Constraint
+        if NeedsLogin:
+            importlib.import_module("platypus.Utils.Environment").LoginHuggingFace()
 
-    Entries = []
+        Value = getattr(importlib.import_module(Module), Attribute)
 
-    with open(os.path.join(PLATYPUS_INTERMEDIATE_DIRECTORY, PLATYPUS_ARXIV_RECORD_FILE)) as File:
-        
-        Entries = json.load(File)
+    elif _Name == "Env":
+        Value = importlib.import_module("platypus.Utils.Environment").LoadEnvironment()
 
-    return Entries
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {_Name!r}")
 
-"""
-Searches Arxiv using the Query and Retreives _MaxResults number of Papers
-TODO: Parallalize each Batch
-"""
-def SearchArxiv(_Query: str, _Debug: bool, _MaxResults = 1024, _BatchSize = 1024, **kwargs):
-    
-    BaseURL = "http://export.arxiv.org/api/query?"
-    Start = 0
-    Entries = []
-
-    while Start < _MaxResults:
-
-        MaxRetreivable = min(_BatchSize, _MaxResults - Start)
-        QueryURL = f"search_query=all:{quote(_Query)}&start={Start}&max_results={MaxRetreivable}"
-
-        Response = None
-
-        # Send request to arxiv for papers
-        try:
-
-            Response = requests.get(BaseURL + QueryURL, timeout=10)
-            Response.raise_for_status()
-
-        except requests.exceptions.RequestException as e:
-
-            print(f"[Platypus][DB]: HTTP Request failed: {e}")
-            return []
-
-        # Parse the metadata
-        try:
-
-            BatchEntries = []
-            Root = ET.fromstring(Response.content)
-            for entry in Root.findall("{http://www.w3.org/2005/Atom}entry"):
-
-                Title = entry.find("{http://www.w3.org/2005/Atom}title").text.strip()
-                Summary = entry.find("{http://www.w3.org/2005/Atom}summary").text.strip()
-                Link = entry.find("{http://www.w3.org/2005/Atom}id").text.strip()
-                ArxivID = Link.split("/")[-1]
-                BatchEntries.append({
-                    "Title"     : Title,
-                    "Summary"   : Summary,
-                    "URL"       : Link.replace("/abs/", "/pdf/"),
-                    "PaperID"   : ArxivID
-                })
-            
-            Entries.extend(BatchEntries)
-
-        except ET.ParseError as e:
-
-            print(f"[Platypus][DB]: Failed to parse XML: {e}")
-
-        if _Debug:
-            print(f"[Platypus][DB]: Retreived Batch {(int)((Start / _BatchSize)+ 1)}")
-        
-        Start += _BatchSize
-        time.sleep(1.5)
-
-    with open(os.path.join(PLATYPUS_INTERMEDIATE_DIRECTORY, PLATYPUS_ARXIV_RECORD_FILE), "w+") as File:
-        json.dump(Entries, File)
-
-    if _Debug:
-        print(f"[Platypus][DB]: Successfully written ArxivEntries to {PLATYPUS_INTERMEDIATE_DIRECTORY}/{PLATYPUS_ARXIV_RECORD_FILE}")
-
-def DownloadPDFArxiv(_URL:str, _Debug: bool, **kwargs):
-    
-    try:
-        # Download Content (Stream Mode)
-        Response = requests.get(_URL, stream = True)
-        Response.raise_for_status()
-        # 
-        if not Response.content.startswith(b"%PDF"):
-            raise ValueError("[Platypus][Arxiv]: Invalid PDF header")
-
-    except Exception as e:
-        print(f"[Platypus][Arxiv]: Skipping {_URL} due to download/header issue: {e}")
-        return None
-
-    if _Debug:
-        print(f"[Platypus][Arxiv]: Downloaded {_URL}")
-
-    try:
-        # In-Memory PDF Processing using fitz
-        PDF     = fitz.open(stream=Response.content, filetype="pdf")
-        Text    = "\n".join([page.get_text() for page in PDF])
-        PDF.close()
-
-        if not Text.strip():
-            raise ValueError("[Platypus][DB]: Empty text extracted from PDF")
-
-    except Exception as e:
-        print(f"[Platypus][DB]: Skipping {_URL} due to PDF parsing failure: {e}")
-        return None
\ No newline at end of file
+    globals()[_Name] = Value
+
+    return Value
@@ -0,0 +1,366 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Utils.Arxiv  import ParseArxivFeed
+from platypus.Utils.Log    import GetLogger, ConfigureLogging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse       import quote
+
+import argparse
+import random
+import threading
+
+Log = GetLogger("Harvester")
+
+class TokenBucket(object):
+
+    """
+        Thread-safe Token Bucket Rate Limiter
+
+        Attributes:
+        self.Rate     =: Tokens added per second
+        self.Capacity =: Maximum burst of Tokens
+    """
+    def __init__(self, _Rate: float, _Capacity: float = 1.0):
+
+        self.Rate       = _Rate
+        self.Capacity   = _Capacity
+        self.Tokens     = _Capacity
+        self.Updated    = Foundation.time.monotonic()
+        self.Lock       = threading.Lock()
+
+    """
+        Blocks until a Token is available & takes it
+    """
+    def Acquire(self):
+
+        while True:
+
+            with self.Lock:
+
+                Now             = Foundation.time.monotonic()
+                self.Tokens     = min(self.Capacity, self.Tokens + (Now - self.Updated) * self.Rate)
+                self.Updated    = Now
+
+                if self.Tokens >= 1.0:
+                    self.Tokens -= 1.0
+                    return
+
+                Wait = (1.0 - self.Tokens) / self.Rate
+
+            Foundation.time.sleep(Wait)
+
+"""
+    Appends harvested Entries to a JSONL file as they arrive
+
+    A rerun resumes at the checkpoint, below which every page was written,
+    but the pages it had written above it are fetched again: Entries whose
+    PaperID is already in the file are skipped. A partial last line (left by
+    a crash mid write) is cut off first.
+"""
+class JSONLSink(object):
+
+    def __init__(self, _Path: str = Foundation.os.path.join(Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY, Foundation.PLATYPUS_ARXIV_RECORD_JSONL_FILE)):
+
+        if Foundation.os.path.dirname(_Path):
+            Foundation.os.makedirs(Foundation.os.path.dirname(_Path), exist_ok = True)
+
+        self.Path   = _Path
+        # PaperIDs already in the file
+        self.Seen   = set()
+
+        if Foundation.os.path.exists(_Path):
+
+            with open(_Path, "r+b") as File:
+
+                Lines = File.read().split(b"\n")
+
+                # Everything after the last newline is a partial line
+                if Lines[-1]:
+                    File.truncate(sum(len(Line) + 1 for Line in Lines[:-1]))
+
+                for Line in Lines[:-1]:
+                    try:
+                        self.Seen.add(Foundation.json.loads(Line)["PaperID"])
+                    except (ValueError, KeyError, TypeError):
+                        continue
+
+        self.File = open(_Path, "a", encoding = "utf8")
+
+    def Write(self, _Entries: list):
+
+        for Entry in _Entries:
+
+            if Entry["PaperID"] in self.Seen:
+                continue
+
+            self.Seen.add(Entry["PaperID"])
+            self.File.write(Foundation.json.dumps(Entry) + "\n")
+
+        self.File.flush()
+
+    def Close(self):
+
+        self.File.close()
+
+"""
+    Upserts harvested Entries into the Arxiv collection as they arrive
+"""
+class MongoSink(object):
+
+    def __init__(self, _DBManager):
+
+        self.DBManager = _DBManager
+
+    def Write(self, _Entries: list):
+
+        if not _Entries:
+            return
+
+        self.DBManager.InsertRecords([{
+                    "_id"       : Entry["PaperID"],
+                    "Title"     : Entry["Title"],
+                    "Summary"   : Entry["Summary"],
+                    "URL"       : Entry["URL"],
+                    "Categories": Entry.get("Categories", []),
+                    "Published" : Entry.get("Published", "")
+                } for Entry in _Entries], self.DBManager.CollectionArxiv)
+
+    def Close(self):
+        pass
+
+class ArxivHarvester(object):
+
+    """
+        Concurrent, rate-limited & resumable Arxiv API harvester
+
+        Pages of _PageSize results are fetched by _Workers threads sharing one
+        pooled HTTP session, every request first takes a Token from a bucket
+        refilled at _RequestsPerSecond. Failed requests (connection errors,
+        429/5xx, truncated/empty pages) are retried with exponential backoff.
+        Entries are written to _Sink as each page arrives & the offset below
+        which every page is done is checkpointed, so a rerun resumes there.
+
+        Args:
+            _Query              : Arxiv search query (searched in all fields).
+            _Sink               : JSONLSink, MongoSink or any object with Write(list) & Close().
+            _Debug              : Debug Flag.
+            _MaxResults         : Maximum number of results to harvest.
+            _BaseURL            : Arxiv API endpoint, point it at a stub server to test.
+            _CheckpointPath     : JSON file holding the resume offset of _Query.
+    """
+    def __init__(self,
+                 _Query: str,
+                 _Sink,
+                 _Debug: bool,
+                 _MaxResults: int = 1024,
+                 _PageSize: int = Foundation.PLATYPUS_ARXIV_PAGE_SIZE,
+                 _Workers: int = 4,
+                 _RequestsPerSecond: float = Foundation.PLATYPUS_ARXIV_REQUESTS_PER_SECOND,
+                 _MaxRetries: int = Foundation.PLATYPUS_ARXIV_MAX_RETRIES,
+                 _BaseURL: str = Foundation.PLATYPUS_ARXIV_API_URL,
+                 _CheckpointPath: str = Foundation.os.path.join(Foundation.PLATYPUS_INTERMEDIATE_DIRECTORY, Foundation.PLATYPUS_ARXIV_CHECKPOINT_FILE),
+                 **kwargs):
+
+        self.Query          = _Query
+        self.Sink           = _Sink
+        self.Debug          = _Debug
+        self.MaxResults     = _MaxResults
+        self.PageSize       = _PageSize
+        self.Workers        = _Workers
+        self.MaxRetries     = _MaxRetries
+        self.BaseURL        = _BaseURL
+        self.CheckpointPath = _CheckpointPath
+        self.Bucket         = TokenBucket(_RequestsPerSecond)
+        # Total results of the query, known after the first page
+        self.Total          = None
+
+        self.Session        = Foundation.requests.Session()
+        Adapter             = Foundation.requests.adapters.HTTPAdapter(pool_connections = 1, pool_maxsize = _Workers)
+        self.Session.mount("http://", Adapter)
+        self.Session.mount("https://", Adapter)
+
+    """
+        Harvests the query from its checkpoint (or the first result)
+
+        Returns:
+            Number of Entries written to the Sink
+    """
+    def Harvest(self):
+
+        Start       = self.__LoadCheckpoint()
+        Watermark   = Start
+        Completed   = set()
+        Written     = 0
+        Failed      = 0
+        Offsets     = self.__Offsets(Start)
+        StartTime   = Foundation.time.perf_counter()
+
+        if self.Debug:
+            Log.debug(f"Harvesting '{self.Query}' from offset {Start} with {self.Workers} workers")
+
+        with ThreadPoolExecutor(self.Workers) as Pool:
+
+            Pending = {}
+
+            while True:
+
+                # Keep a couple of pages queued per worker, the bucket paces them
+                while len(Pending) < 2 * self.Workers:
+                    Offset = next(Offsets, None)
+                    if Offset is None:
+                        break
+                    Pending[Pool.submit(self.__FetchPage, Offset)] = Offset
+
+                if not Pending:
+                    break
+
+                Done, _ = wait(Pending, return_when = FIRST_COMPLETED)
+
+                for Future in Done:
+
+                    Offset = Pending.pop(Future)
+
+                    try:
+                        Entries = Future.result()
+                    except Exception as e:
+                        # The watermark stays below this page, a rerun fetches it again
+                        Log.error(f"Page at offset {Offset} failed after {self.MaxRetries} retries: {e}")
+                        Failed += 1
+                        continue
+
+                    self.Sink.Write(Entries)
+                    Written += len(Entries)
+                    Completed.add(Offset)
+
+                    while Watermark in Completed:
+                        Completed.remove(Watermark)
+                        Watermark += self.PageSize
+
+                    self.__SaveCheckpoint(Watermark)
+
+                    if self.Debug:
+                        Log.debug(f"Retreived offset {Offset} ({len(Entries)} entries), checkpoint at {Watermark}")
+
+        ElapsedTime = Foundation.time.perf_counter() - StartTime
+
+        Log.info(f"Written {Written} entries in {ElapsedTime:.2f}s, {Failed} pages failed, resume offset {Watermark}")
+
+        return Written
+
+    """
+        Page offsets from _Start, bounded by MaxResults & the query's Total once known
+    """
+    def __Offsets(self, _Start: int):
+
+        Offset = _Start
+
+        while Offset < min(self.MaxResults, self.Total if self.Total is not None else self.MaxResults):
+            yield Offset
+            Offset += self.PageSize
+
+    """
+        Fetches & parses the page at _Offset, retrying with exponential backoff
+
+        Returns:
+            list of Entries of the page
+    """
+    def __FetchPage(self, _Offset: int):
+
+        URL = f"{self.BaseURL}?search_query=all:{quote(self.Query)}&start={_Offset}" \
+              f"&max_results={min(self.PageSize, self.MaxResults - _Offset)}"
+
+        for Attempt in range(self.MaxRetries + 1):
+
+            self.Bucket.Acquire()
+            RetryAfter = None
+
+            try:
+
+                Response = self.Session.get(URL, timeout = Foundation.PLATYPUS_DOWNLOAD_TIMEOUT)
+
+                # Client errors other than rate limiting won't get better by retrying
+                if 400 <= Response.status_code < 500 and Response.status_code != 429:
+                    Response.raise_for_status()
+
+                if Response.status_code == 429 or Response.status_code >= 500:
+                    RetryAfter = Response.headers.get("Retry-After")
+                    raise IOError(f"HTTP {Response.status_code}")
+
+                Entries, Total = ParseArxivFeed(Response.content)
+
+                if Total is not None:
+                    self.Total = Total
+
+                # arXiv intermittently answers with an empty page inside the results
+                if not Entries and Total is not None and _Offset < Total:
+                    raise IOError(f"Empty page below totalResults ({Total})")
+
+                return Entries
+
+            except Foundation.requests.exceptions.HTTPError:
+                raise
+
+            except (IOError, Foundation.ET.ParseError) as e:
+
+                if Attempt == self.MaxRetries:
+                    raise
+
+                Delay = float(RetryAfter) if RetryAfter is not None and RetryAfter.isdigit() \
+                        else min(60.0, 2.0 ** Attempt) * (0.5 + 0.5 * random.random())
+
+                if self.Debug:
+                    Log.debug(f"Offset {_Offset} attempt {Attempt + 1} failed ({e}), retrying in {Delay:.1f}s")
+
+                Foundation.time.sleep(Delay)
+
+    def __LoadCheckpoint(self) -> int:
+
+        if not Foundation.os.path.exists(self.CheckpointPath):
+            return 0
+
+        with open(self.CheckpointPath, "r") as File:
+            Checkpoint = Foundation.json.load(File)
+
+        if Checkpoint.get("Query") != self.Query:
+            return 0
+
+        self.Total = Checkpoint.get("Total")
+
+        return int(Checkpoint["Start"])
+
+    def __SaveCheckpoint(self, _Start: int):
+
+        if Foundation.os.path.dirname(self.CheckpointPath):
+            Foundation.os.makedirs(Foundation.os.path.dirname(self.CheckpointPath), exist_ok = True)
+
+        with open(self.CheckpointPath + ".tmp", "w") as File:
+            Foundation.json.dump({"Query": self.Query, "Start": _Start, "Total": self.Total}, File)
+
+        Foundation.os.replace(self.CheckpointPath + ".tmp", self.CheckpointPath)
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Harvest Arxiv search results into JSONL or MongoDB")
+    Parser.add_argument("query")
+    Parser.add_argument("--max-results", type = int, default = 1024)
+    Parser.add_argument("--page-size", type = int, default = Foundation.PLATYPUS_ARXIV_PAGE_SIZE)
+    Parser.add_argument("--workers", type = int, default = 4)
+    Parser.add_argument("--rate", type = float, default = Foundation.PLATYPUS_ARXIV_REQUESTS_PER_SECOND, help = "requests per second")
+    Parser.add_argument("--base-url", default = Foundation.PLATYPUS_ARXIV_API_URL)
+    Parser.add_argument("--sink", choices = ["jsonl", "mongo"], default = "jsonl")
+    Parser.add_argument("--debug", action = "store_true")
+    Args = Parser.parse_args()
+
+    if Args.sink == "mongo":
+        from platypus.Core.Database import MongoDBManager
+        Sink = MongoSink(MongoDBManager(Args.debug))
+    else:
+        Sink = JSONLSink()
+
+    try:
+        ArxivHarvester(Args.query, Sink, Args.debug, Args.max_results, Args.page_size, Args.workers, Args.rate,
+                       _BaseURL = Args.base_url).Harvest()
+    finally:
+        Sink.Close()
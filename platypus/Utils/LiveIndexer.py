@@ -0,0 +1,331 @@
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Core.Database     import MongoDBManager
+from platypus.Core.Indexer      import FAISSIndexer
+from platypus.Core.Vectorizer   import ChunkVectorizer, Embedder
+from platypus.Utils.Log         import GetLogger, ConfigureLogging
+
+import argparse
+import datetime
+import threading
+
+Log = GetLogger("LiveIndexer")
+
+# Watermark before any document
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo = datetime.timezone.utc)
+
+"""
+    _Value as an aware UTC datetime, pymongo returns naive UTC datetimes
+"""
+def AsUTC(_Value: datetime.datetime) -> datetime.datetime:
+
+    return _Value.replace(tzinfo = datetime.timezone.utc) if _Value.tzinfo is None else _Value
+
+class LiveIndexer(object):
+
+    """
+        Keeps a live FAISSIndexer up to date with the Arxiv collection
+
+        Every write of MongoDBManager.InsertRecords (& LocalIngest) stamps the
+        document with UpdatedAt. The LiveIndexer reads the documents past its
+        watermark, the (UpdatedAt, _id) of the last document it indexed, in
+        batches of _BatchSize sorted by (UpdatedAt, _id) & Upserts them into
+        the Indexer: only new or changed documents are Embedded, so the corpus
+        is never Embedded again. With _ChangeStreams (needs a replica set) it
+        follows a change stream of the collection instead of polling & falls
+        back to polling if the server has none.
+
+        Upsert persists every batch as a delta of the saved Index, after which
+        the watermark is written, so a restart resumes where it stopped. Every
+        _CheckpointInterval seconds the whole Index is saved, folding in the
+        deltas.
+
+        Freshness lag, the seconds between a document's UpdatedAt & it being
+        searchable, is recorded per document (Metrics "index_freshness_seconds"
+        & Stats()).
+
+        Args:
+            _Indexer            : FAISSIndexer (with a Vectorizer) to Upsert into, e.g. the one a SearchServer serves.
+            _DBManager          : MongoDBManager of the Arxiv collection.
+            _Debug              : Debug Flag.
+            _BatchSize          : Documents read & Upserted at once.
+            _PollInterval       : Seconds between polls once caught up.
+            _CheckpointInterval : Seconds between saves of the whole Index.
+            _SettleSeconds      : Documents stamped less than this long ago wait for the next poll, so writes
+                                  stamped earlier but committed later aren't passed by the watermark.
+            _ChangeStreams      : Follow a change stream instead of polling when the server supports it.
+            _WatermarkPath      : JSON file holding the watermark (& change stream resume token).
+    """
+    def __init__(self,
+                 _Indexer: FAISSIndexer,
+                 _DBManager: MongoDBManager,
+                 _Debug: bool,
+                 _BatchSize: int = Foundation.PLATYPUS_LIVE_INDEX_BATCH_SIZE,
+                 _PollInterval: float = Foundation.PLATYPUS_LIVE_INDEX_POLL_INTERVAL,
+                 _CheckpointInterval: float = Foundation.PLATYPUS_LIVE_INDEX_CHECKPOINT_INTERVAL,
+                 _SettleSeconds: float = Foundation.PLATYPUS_LIVE_INDEX_SETTLE_SECONDS,
+                 _ChangeStreams: bool = True,
+                 _WatermarkPath: str = Foundation.os.path.join(Foundation.PLATYPUS_UTILS_DIRECTORY, Foundation.PLATYPUS_LIVE_INDEX_WATERMARK_FILE),
+                 **kwargs):
+
+        self.Indexer            = _Indexer
+        self.DBManager          = _DBManager
+        self.Debug              = _Debug
+        self.BatchSize          = _BatchSize
+        self.PollInterval       = _PollInterval
+        self.CheckpointInterval = _CheckpointInterval
+        self.SettleSeconds      = _SettleSeconds
+        self.ChangeStreams      = _ChangeStreams
+        self.WatermarkPath      = _WatermarkPath
+        self.Collection         = _DBManager.DB[_DBManager.CollectionArxiv]
+        # (UpdatedAt, _id) of the last indexed document & the change stream position
+        self.Watermark          = (EPOCH, "")
+        self.ResumeToken        = None
+        # "poll" or "changestream"
+        self.Mode               = "poll"
+        self.StopEvent          = threading.Event()
+        self.Thread             = None
+        self.LastCheckpoint     = Foundation.time.monotonic()
+        self.Unsaved            = 0
+        self.StatsLock          = threading.Lock()
+        self.Read               = 0
+        self.Embedded           = 0
+        self.Batches            = 0
+        self.LastLagSeconds     = 0.0
+        self.MaxLagSeconds      = 0.0
+
+        self.__LoadWatermark()
+        # Polls are range scans of this index
+        self.Collection.create_index([("UpdatedAt", 1), ("_id", 1)])
+
+    """
+        Runs the LiveIndexer in a daemon thread
+    """
+    def Start(self):
+
+        self.StopEvent.clear()
+        self.Thread = threading.Thread(target = self.Run, name = "PlatypusLiveIndexer", daemon = True)
+        self.Thread.start()
+
+    """
+        Stops the thread started by Start & checkpoints
+    """
+    def Shutdown(self):
+
+        self.StopEvent.set()
+
+        if self.Thread is not None:
+            self.Thread.join()
+            self.Thread = None
+
+        self.Checkpoint()
+
+    """
+        Indexes new documents until Shutdown is called (from another thread)
+    """
+    def Run(self):
+
+        Log.info(f"Indexing {self.DBManager.CollectionArxiv} past {self.Watermark[0].isoformat()} ({self.Watermark[1]!r})")
+
+        if self.ChangeStreams:
+            try:
+                self.__Follow()
+            except Foundation.pymongo.errors.PyMongoError as e:
+                Log.warning(f"Change streams unavailable ({e}), polling every {self.PollInterval}s instead")
+
+        self.Mode = "poll"
+
+        while not self.StopEvent.is_set():
+
+            try:
+                Read = self.Poll()
+            except Foundation.pymongo.errors.PyMongoError as e:
+                Log.error(f"Polling {self.DBManager.CollectionArxiv} Failed! ({e})")
+                Read = 0
+
+            self.__MaybeCheckpoint()
+
+            # A full batch means there's more to read right away
+            if Read < self.BatchSize:
+                self.StopEvent.wait(self.PollInterval)
+
+    """
+        Indexes the next batch of documents past the watermark
+
+        Returns:
+            Number of documents read
+    """
+    def Poll(self) -> int:
+
+        UpdatedAt, ID   = self.Watermark
+        Settled         = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds = self.SettleSeconds)
+        Cursor          = self.Collection.find({"$or": [{"UpdatedAt": {"$gt": UpdatedAt, "$lte": Settled}},
+                                                        {"UpdatedAt": UpdatedAt, "_id": {"$gt": ID}}]},
+                                               sort = [("UpdatedAt", 1), ("_id", 1)], limit = self.BatchSize)
+        Documents       = list(Cursor)
+
+        if Documents:
+            self.__Index(Documents)
+
+        return len(Documents)
+
+    """
+        Saves the whole Index & the watermark, if anything was indexed since the last checkpoint
+    """
+    def Checkpoint(self):
+
+        self.LastCheckpoint = Foundation.time.monotonic()
+
+        if self.Unsaved == 0:
+            return
+
+        if self.Indexer.SaveIndices():
+            self.Unsaved = 0
+            self.__SaveWatermark()
+
+    """
+        Counters & freshness lag of the indexed documents
+    """
+    def Stats(self) -> dict:
+
+        with self.StatsLock:
+            return {"Mode"              : self.Mode,
+                    "Watermark"         : self.Watermark[0].isoformat(),
+                    "Read"              : self.Read,
+                    "Embedded"          : self.Embedded,
+                    "Batches"           : self.Batches,
+                    "LastLagSeconds"    : self.LastLagSeconds,
+                    "MaxLagSeconds"     : self.MaxLagSeconds}
+
+    """
+        Follows a change stream of the collection, catching up by polling once
+        it is open so nothing written before it opened is missed
+    """
+    def __Follow(self):
+
+        Pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+
+        with self.Collection.watch(Pipeline, full_document = "updateLookup", resume_after = self.ResumeToken,
+                                   max_await_time_ms = int(self.PollInterval * 1000)) as Stream:
+
+            self.Mode = "changestream"
+
+            while not self.StopEvent.is_set() and self.Poll() == self.BatchSize:
+                pass
+
+            while not self.StopEvent.is_set():
+
+                Documents = []
+
+                # try_next waits at most PollInterval for a change
+                while len(Documents) < self.BatchSize:
+
+                    Change = Stream.try_next()
+
+                    if Change is None:
+                        break
+
+                    if Change.get("fullDocument") is not None and "UpdatedAt" in Change["fullDocument"]:
+                        Documents.append(Change["fullDocument"])
+
+                self.ResumeToken = Stream.resume_token
+
+                if Documents:
+                    self.__Index(Documents)
+
+                self.__MaybeCheckpoint()
+
+    """
+        Upserts _Documents into the Indexer, records their freshness lag &
+        advances the watermark past them
+    """
+    def __Index(self, _Documents: list):
+
+        Embedded    = self.Indexer.Upsert(_Documents)
+        Now         = datetime.datetime.now(datetime.timezone.utc)
+        Lags        = [(Now - AsUTC(Document["UpdatedAt"])).total_seconds() for Document in _Documents]
+        Last        = max((AsUTC(Document["UpdatedAt"]), Document["_id"]) for Document in _Documents)
+
+        for Lag in Lags:
+            Metrics.Observe("index_freshness_seconds", Lag)
+
+        Metrics.Increment("live_index_read_total", len(_Documents))
+        Metrics.Increment("live_index_embedded_total", Embedded)
+
+        with self.StatsLock:
+            self.Watermark       = max(self.Watermark, Last)
+            self.Read           += len(_Documents)
+            self.Embedded       += Embedded
+            self.Batches        += 1
+            self.LastLagSeconds  = max(Lags)
+            self.MaxLagSeconds   = max(self.MaxLagSeconds, self.LastLagSeconds)
+
+        self.Unsaved += Embedded
+        # Upsert already persisted the batch as a delta
+        self.__SaveWatermark()
+
+        if self.Debug:
+            Log.debug(f"Indexed {len(_Documents)} documents ({Embedded} embedded), lag {self.LastLagSeconds:.2f}s, "
+                      f"watermark {self.Watermark[0].isoformat()}")
+
+    def __MaybeCheckpoint(self):
+
+        if Foundation.time.monotonic() - self.LastCheckpoint >= self.CheckpointInterval:
+            self.Checkpoint()
+
+    def __LoadWatermark(self):
+
+        if not Foundation.os.path.exists(self.WatermarkPath):
+            return
+
+        with open(self.WatermarkPath, "r") as File:
+            Watermark = Foundation.json.load(File)
+
+        self.Watermark      = (datetime.datetime.fromisoformat(Watermark["UpdatedAt"]), Watermark["_id"])
+        self.ResumeToken    = Watermark.get("ResumeToken")
+
+    def __SaveWatermark(self):
+
+        if Foundation.os.path.dirname(self.WatermarkPath):
+            Foundation.os.makedirs(Foundation.os.path.dirname(self.WatermarkPath), exist_ok = True)
+
+        with open(self.WatermarkPath + ".tmp", "w") as File:
+            Foundation.json.dump({"UpdatedAt"   : self.Watermark[0].isoformat(),
+                                  "_id"         : self.Watermark[1],
+                                  "ResumeToken" : self.ResumeToken}, File)
+
+        Foundation.os.replace(self.WatermarkPath + ".tmp", self.WatermarkPath)
+
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Keep the saved FAISS Index up to date with new Arxiv documents")
+    Parser.add_argument("--model", default = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL)
+    Parser.add_argument("--backend", choices = Foundation.PLATYPUS_EMBEDDER_BACKENDS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDER_BACKEND)
+    Parser.add_argument("--threads", type = int, default = None)
+    Parser.add_argument("--encode-workers", type = int, default = Foundation.PLATYPUS_ENCODE_WORKERS, help = "processes encoding the chunks")
+    Parser.add_argument("--chunking", choices = Foundation.PLATYPUS_CHUNK_MODES, default = Foundation.PLATYPUS_DEFAULT_CHUNK_MODE)
+    Parser.add_argument("--batch-size", type = int, default = Foundation.PLATYPUS_LIVE_INDEX_BATCH_SIZE)
+    Parser.add_argument("--poll-interval", type = float, default = Foundation.PLATYPUS_LIVE_INDEX_POLL_INTERVAL)
+    Parser.add_argument("--checkpoint-interval", type = float, default = Foundation.PLATYPUS_LIVE_INDEX_CHECKPOINT_INTERVAL)
+    Parser.add_argument("--no-change-streams", action = "store_true", help = "always poll")
+    Parser.add_argument("--debug", action = "store_true")
+    Args = Parser.parse_args()
+
+    Indexer = FAISSIndexer(ChunkVectorizer(Embedder(Args.model, Args.backend, Args.threads), Args.debug, _Mode = Args.chunking, _Workers = Args.encode_workers), Args.debug)
+
+    # Without a saved Index the first polls build it
+    Indexer.LoadIndices()
+
+    LiveIndex = LiveIndexer(Indexer, MongoDBManager(Args.debug), Args.debug, Args.batch_size, Args.poll_interval,
+                            Args.checkpoint_interval, _ChangeStreams = not Args.no_change_streams)
+
+    try:
+        LiveIndex.Run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        LiveIndex.Checkpoint()
+        Indexer.Vectorizer.Close()
@@ -0,0 +1,165 @@
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Core.Database     import MongoDBManager
+from platypus.Core.Vectorizer   import ChunkVectorizer, Embedder
+from platypus.Core.Cache        import EmbeddingCache
+from platypus.Core.Extractor    import FindAbstract
+from platypus.Utils.Pipeline    import IngestionPipeline
+from platypus.Utils.Log         import GetLogger, ConfigureLogging
+from pymongo                    import UpdateOne
+
+import argparse
+import datetime
+import io
+import tarfile
+
+Log = GetLogger("LocalIngest")
+
+"""
+    Yields a Document for every PDF under a directory (recursively, in sorted
+    order) or inside a tarball. The _id is the file name without ".pdf",
+    which for arXiv PDFs is the paper id.
+
+    Documents of a directory carry the "Path" to read, Documents of a tarball
+    carry the PDF bytes as "Content" (tar members can only be read in order).
+"""
+def ScanPDFs(_Source: str, _URLTemplate: str = Foundation.PLATYPUS_ARXIV_PDF_URL):
+
+    def MakeDocument(_Name: str, **_Fields):
+        ID = Foundation.os.path.basename(_Name)[:-len(".pdf")]
+        return {"_id": ID, "URL": _URLTemplate.format(ID), **_Fields}
+
+    if Foundation.os.path.isdir(_Source):
+
+        for Root, Directories, Files in Foundation.os.walk(_Source):
+
+            Directories.sort()
+
+            for Name in sorted(Files):
+                if Name.lower().endswith(".pdf"):
+                    yield MakeDocument(Name, Path = Foundation.os.path.join(Root, Name))
+
+    elif tarfile.is_tarfile(_Source):
+
+        with tarfile.open(_Source, "r:*") as Tar:
+
+            for Member in Tar:
+
+                if not Member.isfile() or not Member.name.lower().endswith(".pdf"):
+                    continue
+
+                try:
+                    Content = Tar.extractfile(Member).read()
+                except Exception as e:
+                    Log.warning(f"Skipping {Member.name}, can't read it from {_Source}: {e}")
+                    continue
+
+                yield MakeDocument(Member.name, Path = f"{_Source}:{Member.name}", Content = Content)
+
+    else:
+        raise ValueError(f"{_Source} is neither a directory nor a tarball")
+
+"""
+    Fetch of the IngestionPipeline for local PDFs, raises if it isn't a PDF
+"""
+def ReadLocalPDF(_Document: dict) -> bytes:
+
+    Content = _Document.pop("Content", None)
+
+    if Content is None:
+        with open(_Document["Path"], "rb") as File:
+            Content = File.read()
+
+    if not Content.startswith(b"%PDF"):
+        raise ValueError("Invalid PDF header")
+
+    return Content
+
+"""
+    The Arxiv record of a local PDF, built from its text: the first non empty
+    line as Title & the Abstract as Summary. Records that already exist (e.g.
+    from the Arxiv API) keep their Title, Summary & URL.
+"""
+def LocalRecordOperation(_Document: dict, _Text: str) -> UpdateOne:
+
+    Title   = next((Line.strip() for Line in io.StringIO(_Text) if Line.strip()), _Document["_id"])
+    Summary = FindAbstract(io.StringIO(_Text))[:Foundation.PLATYPUS_LOCAL_SUMMARY_MAX_CHARS]
+
+    return UpdateOne(
+                filter = {"_id" : _Document["_id"]},
+                update = {"$setOnInsert": {"Title": Title[:512], "Summary": Summary, "URL": _Document["URL"]},
+                          "$set"        : {"Path": _Document["Path"], "UpdatedAt": datetime.datetime.now(datetime.timezone.utc)}},
+                upsert = True)
+
+"""
+    Ingests every PDF of a directory or tarball without network access: text
+    is extracted by the parse process pool, chunks are encoded by one batched
+    Embed Stage & the Arxiv records and chunk Embeddings are upserted.
+    Unreadable or unparseable files are reported & skipped.
+
+    Args:
+        _DBManager  : MongoDBManager to write into.
+        _Source     : Directory or tarball (.tar, .tar.gz, ...) of PDFs.
+        _Vectorizer : ChunkVectorizer holding the (single) model.
+        _Debug      : Debug Flag.
+        **kwargs    : IngestionPipeline knobs (_NumParsers, _EmbedChunks, _Codec, ...).
+
+    Returns:
+        Per Stage throughput & queue depth report of the Pipeline
+"""
+def IngestLocal(_DBManager: MongoDBManager, _Source: str, _Vectorizer: ChunkVectorizer, _Debug: bool, **kwargs):
+
+    kwargs.setdefault("_Progress", True)
+    kwargs.setdefault("_RecordOperation", LocalRecordOperation)
+
+    Pipeline    = IngestionPipeline(_DBManager, _Vectorizer, _Debug, _Fetch = ReadLocalPDF, **kwargs)
+    Report      = Pipeline.Run(ScanPDFs(_Source))
+    Embedded    = Report["Stages"]["Embed"]["Processed"]
+    Failed      = sum(Stage["Failed"] for Stage in Report["Stages"].values())
+
+    Log.info(f"Ingested {Embedded} PDFs from {_Source} in {Report['Seconds']:.2f}s "
+             f"({Embedded / max(Report['Seconds'], 1e-9):.2f} docs/sec), {Failed} failures")
+
+    return Report
+
+# The parse workers are spawned & re-import this module
+if __name__ == "__main__":
+
+    ConfigureLogging()
+
+    Parser = argparse.ArgumentParser(description = "Ingest a directory or tarball of arXiv PDFs into MongoDB, offline")
+    Parser.add_argument("source", help = "directory or tarball of PDFs")
+    Parser.add_argument("--model", default = Foundation.PLATYPUS_SENTENCE_TRANSFORMER_DEFAULT_MODEL)
+    Parser.add_argument("--backend", choices = Foundation.PLATYPUS_EMBEDDER_BACKENDS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDER_BACKEND)
+    Parser.add_argument("--threads", type = int, default = None, help = "threads of the embedding model")
+    Parser.add_argument("--parsers", type = int, default = Foundation.os.cpu_count())
+    Parser.add_argument("--readers", type = int, default = 4, help = "threads reading files from disk")
+    Parser.add_argument("--encode-workers", type = int, default = Foundation.PLATYPUS_ENCODE_WORKERS, help = "processes encoding the chunks")
+    Parser.add_argument("--chunking", choices = Foundation.PLATYPUS_CHUNK_MODES, default = Foundation.PLATYPUS_DEFAULT_CHUNK_MODE)
+    Parser.add_argument("--codec", choices = Foundation.PLATYPUS_EMBEDDING_CODECS, default = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC)
+    Parser.add_argument("--no-cache", action = "store_true", help = "don't use the persistent Embedding cache")
+    Parser.add_argument("--metrics", default = None, help = "write a JSON snapshot of the stage timings to this file")
+    Parser.add_argument("--debug", action = "store_true")
+    Args = Parser.parse_args()
+
+    if Args.metrics:
+        Metrics.Enable()
+
+    # Only the locally cached model is used, nothing is downloaded
+    Foundation.os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    Foundation.os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    Vectorizer  = ChunkVectorizer(Embedder(Args.model, Args.backend, Args.threads), Args.debug,
+                                  _Cache = None if Args.no_cache else EmbeddingCache(), _Mode = Args.chunking, _Workers = Args.encode_workers)
+    DBManager   = MongoDBManager(Args.debug)
+
+    try:
+        IngestLocal(DBManager, Args.source, Vectorizer, Args.debug,
+                    _NumParsers = Args.parsers, _NumFetchers = Args.readers, _Codec = Args.codec)
+    finally:
+        DBManager.Client.close()
+        Vectorizer.Close()
+
+        if Args.metrics:
+            Metrics.WriteSnapshot(Args.metrics)
@@ -0,0 +1,54 @@
+import logging
+import os
+import sys
+
+class PlatypusFormatter(logging.Formatter):
+
+    """
+        Formats records as "[Platypus][<Component>]: <message>", warnings &
+        errors also carry their level, e.g. "[Platypus][SSIndexer][ERROR]: ..."
+    """
+    def format(self, _Record: logging.LogRecord) -> str:
+
+        Component   = _Record.name.split(".", 1)[-1]
+        Level       = f"[{_Record.levelname}]" if _Record.levelno >= logging.WARNING else ""
+
+        return f"[Platypus][{Component}]{Level}: {super().format(_Record)}"
+
+_Configured = False
+
+# As a library Platypus only logs, records propagate to the application's handlers
+logging.getLogger("platypus").addHandler(logging.NullHandler())
+
+"""
+    Attaches a PlatypusFormatter handler writing to stdout to the "platypus"
+    logger, once, called by the command line entry points. The level is
+    _Level, else the PLATYPUS_LOG_LEVEL environment variable, else DEBUG:
+    debug records are only emitted by components created with _Debug, so the
+    default prints what the components printed before. Set
+    PLATYPUS_LOG_LEVEL=WARNING to keep hot loops off the console.
+"""
+def ConfigureLogging(_Level = None):
+
+    global _Configured
+
+    Logger = logging.getLogger("platypus")
+    Level  = _Level or os.environ.get("PLATYPUS_LOG_LEVEL", "DEBUG")
+    Logger.setLevel(Level.upper() if isinstance(Level, str) else Level)
+
+    if not _Configured:
+
+        Handler = logging.StreamHandler(sys.stdout)
+        Handler.setFormatter(PlatypusFormatter())
+        Logger.addHandler(Handler)
+        # Records aren't repeated by handlers of the root logger
+        Logger.propagate = False
+        _Configured = True
+
+"""
+    Logger of a Platypus component, e.g. GetLogger("SSIndexer"), nothing is
+    configured until ConfigureLogging is called
+"""
+def GetLogger(_Component: str) -> logging.Logger:
+
+    return logging.getLogger(f"platypus.{_Component}")
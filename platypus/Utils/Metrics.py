@@ -0,0 +1,199 @@
+import platypus.Utils.Foundation as Foundation
+
+import bisect
+import threading
+
+"""
+    Process wide counters & histograms of the Platypus stages
+
+        Metrics.Increment("encoded_chunks_total", len(Chunks))
+        with Metrics.Timer("encode_seconds"):
+            ...
+
+    Nothing is recorded unless enabled, by Enable() or the PLATYPUS_METRICS=1
+    environment variable, a disabled Timer is a shared no-op. Snapshot() &
+    Prometheus() export everything recorded so far as JSON or Prometheus text.
+"""
+
+class Histogram(object):
+
+    """
+        Counts of observations per bucket (upper bounds _Bounds, plus +Inf)
+        with their sum, as Prometheus histograms
+    """
+    def __init__(self, _Bounds: tuple = Foundation.PLATYPUS_METRICS_BUCKETS):
+
+        self.Bounds = list(_Bounds)
+        self.Counts = [0] * (len(self.Bounds) + 1)
+        self.Count  = 0
+        self.Sum    = 0.0
+
+    def Observe(self, _Value: float):
+
+        self.Counts[bisect.bisect_left(self.Bounds, _Value)] += 1
+        self.Count  += 1
+        self.Sum    += _Value
+
+    """
+        Estimate of the _Quantile (0-1) interpolated within its bucket
+    """
+    def Quantile(self, _Quantile: float) -> float:
+
+        if self.Count == 0:
+            return 0.0
+
+        Rank        = _Quantile * self.Count
+        Cumulative  = 0
+
+        for i, Count in enumerate(self.Counts):
+
+            if Count and Cumulative + Count >= Rank:
+                Lower = self.Bounds[i - 1] if i > 0 else 0.0
+                # Observations above the last bound are reported at it
+                Upper = self.Bounds[i] if i < len(self.Bounds) else self.Bounds[-1]
+                return Lower + (Upper - Lower) * (Rank - Cumulative) / Count
+
+            Cumulative += Count
+
+        return self.Bounds[-1]
+
+    def ToDict(self) -> dict:
+
+        return {"Count" : self.Count,
+                "Sum"   : self.Sum,
+                "Mean"  : self.Sum / self.Count if self.Count else 0.0,
+                "P50"   : self.Quantile(0.50),
+                "P95"   : self.Quantile(0.95),
+                "P99"   : self.Quantile(0.99),
+                "Buckets": {str(Bound): Count for Bound, Count in zip(self.Bounds + ["+Inf"], self.Counts)}}
+
+class _Timer(object):
+
+    __slots__ = ("Name", "StartTime")
+
+    def __init__(self, _Name: str):
+
+        self.Name = _Name
+
+    def __enter__(self):
+
+        self.StartTime = Foundation.time.perf_counter()
+        return self
+
+    def __exit__(self, *_Exception):
+
+        Observe(self.Name, Foundation.time.perf_counter() - self.StartTime)
+        return False
+
+class _NoOpTimer(object):
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_Exception):
+        return False
+
+_NoOp       = _NoOpTimer()
+_Enabled    = Foundation.os.environ.get("PLATYPUS_METRICS", "0") not in ("", "0", "false", "False")
+_Lock       = threading.Lock()
+_Counters   = {}
+_Histograms = {}
+
+"""
+    Turns recording on (or off with _On = False)
+"""
+def Enable(_On: bool = True):
+
+    global _Enabled
+    _Enabled = _On
+
+def Enabled() -> bool:
+
+    return _Enabled
+
+"""
+    Adds _Value to the counter _Name
+"""
+def Increment(_Name: str, _Value: float = 1):
+
+    if not _Enabled:
+        return
+
+    with _Lock:
+        _Counters[_Name] = _Counters.get(_Name, 0) + _Value
+
+"""
+    Records _Value in the histogram _Name
+"""
+def Observe(_Name: str, _Value: float):
+
+    if not _Enabled:
+        return
+
+    with _Lock:
+
+        if _Name not in _Histograms:
+            _Histograms[_Name] = Histogram()
+
+        _Histograms[_Name].Observe(_Value)
+
+"""
+    Context manager recording the seconds spent in its block in the histogram _Name
+"""
+def Timer(_Name: str):
+
+    return _Timer(_Name) if _Enabled else _NoOp
+
+def Reset():
+
+    with _Lock:
+        _Counters.clear()
+        _Histograms.clear()
+
+"""
+    Everything recorded so far
+
+    Returns:
+        dict {Counters: {Name: Value}, Histograms: {Name: {Count, Sum, Mean, P50, P95, P99, Buckets}}}
+"""
+def Snapshot() -> dict:
+
+    with _Lock:
+        return {"Counters"  : dict(_Counters),
+                "Histograms": {Name: Values.ToDict() for Name, Values in _Histograms.items()}}
+
+"""
+    Writes a JSON Snapshot to _Path
+"""
+def WriteSnapshot(_Path: str):
+
+    with open(_Path, "w") as File:
+        Foundation.json.dump({"Time": Foundation.time.time(), **Snapshot()}, File, indent = 2)
+
+"""
+    Everything recorded so far in the Prometheus text exposition format, every
+    metric prefixed with "platypus_"
+"""
+def Prometheus() -> str:
+
+    Lines = []
+
+    with _Lock:
+
+        for Name, Value in sorted(_Counters.items()):
+            Lines += [f"# TYPE platypus_{Name} counter", f"platypus_{Name} {Value}"]
+
+        for Name, Values in sorted(_Histograms.items()):
+
+            Lines.append(f"# TYPE platypus_{Name} histogram")
+            Cumulative = 0
+
+            for Bound, Count in zip(Values.Bounds + ["+Inf"], Values.Counts):
+                Cumulative += Count
+                Lines.append(f'platypus_{Name}_bucket{{le="{Bound}"}} {Cumulative}')
+
+            Lines += [f"platypus_{Name}_sum {Values.Sum}", f"platypus_{Name}_count {Values.Count}"]
+
+    return "\n".join(Lines) + "\n"
@@ -0,0 +1,463 @@
+import platypus.Utils.Foundation as Foundation
+import platypus.Utils.Metrics as Metrics
+
+from platypus.Core.Vectorizer   import ChunkVectorizer
+from platypus.Core.Database     import MongoDBManager
+from platypus.Core.Codec        import EncodeEmbedding
+from platypus.Utils.Log         import GetLogger
+from pymongo                    import UpdateOne
+from pymongo.errors             import BulkWriteError
+from concurrent.futures         import ProcessPoolExecutor
+from multiprocessing            import cpu_count, get_context
+
+import bson
+import fitz
+import queue
+import threading
+
+Log = GetLogger("Pipeline")
+
+# Marks the end of a Stage's output
+_EndOfStream = object()
+
+# One pooled requests.Session per fetch thread
+_Sessions = threading.local()
+
+"""
+    Downloads the PDF of a Document, raises if it isn't a PDF
+"""
+def DownloadContent(_Document: dict) -> bytes:
+
+    Session = getattr(_Sessions, "Session", None)
+
+    if Session is None:
+        Session = _Sessions.Session = Foundation.requests.Session()
+        Session.mount("http://",  Foundation.requests.adapters.HTTPAdapter(pool_maxsize = 4))
+        Session.mount("https://", Foundation.requests.adapters.HTTPAdapter(pool_maxsize = 4))
+
+    with Metrics.Timer("download_seconds"):
+        Response = Session.get(_Document["URL"], timeout = Foundation.PLATYPUS_DOWNLOAD_TIMEOUT)
+        Response.raise_for_status()
+
+    if not Response.content.startswith(b"%PDF"):
+        raise ValueError("Invalid PDF header")
+
+    Metrics.Increment("downloaded_bytes_total", len(Response.content))
+
+    return Response.content
+
+"""
+    Extracts the text of every page of an in-memory PDF, runs in the parse
+    process pool
+
+    Returns:
+        (Text, Seconds spent)
+"""
+def ExtractPDFText(_Content: bytes):
+
+    StartTime = Foundation.time.perf_counter()
+
+    with fitz.open(stream = _Content, filetype = "pdf") as PDF:
+        Text = "\n".join([page.get_text() for page in PDF])
+
+    if not Text.strip():
+        raise ValueError("Empty text extracted from PDF")
+
+    return Text, Foundation.time.perf_counter() - StartTime
+
+"""
+    The ArxivVectorized upsert of a Document's chunk Embeddings, stored with _Codec
+"""
+def VectorizedOperation(_Document: dict, _Embeddings, _Codec: str = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC) -> UpdateOne:
+
+    Document                    = EncodeEmbedding(_Embeddings, _Codec)
+    Document["_id"]             = Foundation.os.path.basename(_Document["URL"])
+    Document["WholeEmbedding"]  = bson.Binary(Document["WholeEmbedding"])
+    Update                      = {"$set": Document}
+
+    # A Document re-ingested with another codec must not keep the scale of an earlier int8 one
+    if "scale" not in Document:
+        Update["$unset"] = {"scale": ""}
+
+    return UpdateOne(
+                filter = {"_id" : _Document["_id"]},
+                update = Update,
+                upsert = True)
+
+class StageStats(object):
+
+    """
+        Throughput counters of one Pipeline Stage
+
+        Attributes:
+        self.Processed   =: Number of items the Stage passed on
+        self.Failed      =: Number of items the Stage dropped
+        self.BusySeconds =: Time spent working on items, summed over workers
+    """
+    def __init__(self, _Name: str):
+
+        self.Name           = _Name
+        self.Processed      = 0
+        self.Failed         = 0
+        self.BusySeconds    = 0.0
+        self.Lock           = threading.Lock()
+
+    def Record(self, _Seconds: float, _Processed: int = 1, _Failed: int = 0):
+
+        with self.Lock:
+            self.Processed     += _Processed
+            self.Failed        += _Failed
+            self.BusySeconds   += _Seconds
+
+        Metrics.Increment(f"pipeline_{self.Name.lower()}_processed_total", _Processed)
+        Metrics.Increment(f"pipeline_{self.Name.lower()}_failed_total", _Failed)
+
+class IngestionPipeline(object):
+
+    """
+        Streaming fetch -> parse -> embed -> write Pipeline
+
+        Stages are connected by bounded queues, so a slow Stage applies back
+        pressure instead of buffering the corpus:
+
+            Fetch   =: _NumFetchers threads running _Fetch (I/O bound downloads)
+            Parse   =: process pool of _NumParsers extracting PDF text
+            Embed   =: the calling thread, the only one holding the model, encodes
+                       chunks of many Documents at once (~_EmbedChunks per call)
+            Write   =: a thread sending unordered bulk_writes of _WriteBatchSize
+
+        Args:
+            _DBManager      : MongoDBManager to write into.
+            _Vectorizer     : ChunkVectorizer used by the Embed Stage.
+            _Debug          : Debug Flag, prints queue depths while running.
+            _Fetch          : Callable(Document) -> PDF bytes.
+            _Codec          : Storage codec of the chunk Embeddings (float32, float16 or int8).
+            _RecordOperation: Callable(Document, Text) -> UpdateOne on the Arxiv collection (or None),
+                              written for every parsed Document, e.g. to create its record offline.
+            _Progress       : Print progress every few seconds even without _Debug.
+    """
+    def __init__(self,
+                 _DBManager: MongoDBManager,
+                 _Vectorizer: ChunkVectorizer,
+                 _Debug: bool,
+                 _Fetch = DownloadContent,
+                 _NumFetchers: int = Foundation.PLATYPUS_PIPELINE_FETCHERS,
+                 _NumParsers: int = cpu_count(),
+                 _EmbedChunks: int = Foundation.PLATYPUS_PIPELINE_EMBED_CHUNKS,
+                 _BatchSize: int = Foundation.PLATYPUS_ENCODE_BATCH_SIZE,
+                 _WriteBatchSize: int = Foundation.PLATYPUS_PIPELINE_WRITE_BATCH_SIZE,
+                 _QueueSize: int = Foundation.PLATYPUS_PIPELINE_QUEUE_SIZE,
+                 _Codec: str = Foundation.PLATYPUS_DEFAULT_EMBEDDING_CODEC,
+                 _RecordOperation = None,
+                 _Progress: bool = False, **kwargs):
+
+        self.DBManager      = _DBManager
+        self.Vectorizer     = _Vectorizer
+        self.Debug          = _Debug
+        self.Fetch          = _Fetch
+        self.NumFetchers    = _NumFetchers
+        self.NumParsers     = _NumParsers
+        self.EmbedChunks    = _EmbedChunks
+        self.BatchSize      = _BatchSize
+        self.WriteBatchSize = _WriteBatchSize
+        self.QueueSize      = _QueueSize
+        self.Codec          = _Codec
+        self.RecordOperation = _RecordOperation
+        self.Progress       = _Progress
+
+        self.Lock           = threading.Lock()
+        self.Stats          = {}
+        self.Queues         = {}
+        self.QueueDepths    = {}
+
+    """
+        Runs every Document through the Pipeline
+
+        Args:
+            _Documents: Iterable of dicts with "_id" & "URL".
+
+        Returns:
+            dict {"Seconds", "Stages": {Name: counters}, "Queues": {Name: depths}}
+    """
+    def Run(self, _Documents):
+
+        self.Stats          = {Name: StageStats(Name) for Name in ("Fetch", "Parse", "Embed", "Write")}
+        self.Queues         = {
+            "Inputs"    : queue.Queue(self.QueueSize),
+            "Fetched"   : queue.Queue(self.QueueSize),
+            # Futures submitted to the parse pool, bounds the work in flight
+            "Parsing"   : queue.Queue(2 * self.NumParsers),
+            "Parsed"    : queue.Queue(self.QueueSize),
+            "Writes"    : queue.Queue(self.QueueSize),
+        }
+        self.QueueDepths    = {Name: [] for Name in self.Queues}
+        self.ActiveFetchers = self.NumFetchers
+        Stopped             = threading.Event()
+        StartTime           = Foundation.time.perf_counter()
+
+        # Spawned, not forked, parse workers don't inherit the running threads
+        with ProcessPoolExecutor(self.NumParsers, mp_context = get_context("spawn")) as Parsers:
+
+            Threads = [threading.Thread(target = self.__Feed, args = (_Documents,), daemon = True),
+                       threading.Thread(target = self.__Dispatch, args = (Parsers,), daemon = True),
+                       threading.Thread(target = self.__Collect, daemon = True),
+                       threading.Thread(target = self.__Monitor, args = (Stopped,), daemon = True)]
+            Threads += [threading.Thread(target = self.__FetchWorker, daemon = True) for _ in range(self.NumFetchers)]
+            Writer  = threading.Thread(target = self.__Write, daemon = True)
+
+            for Thread in Threads + [Writer]:
+                Thread.start()
+
+            try:
+                self.__Embed()
+            finally:
+                self.Queues["Writes"].put(_EndOfStream)
+                Writer.join()
+                Stopped.set()
+
+        return self.__Report(Foundation.time.perf_counter() - StartTime)
+
+    def __Feed(self, _Documents):
+
+        for Document in _Documents:
+            self.Queues["Inputs"].put(Document)
+
+        for _ in range(self.NumFetchers):
+            self.Queues["Inputs"].put(_EndOfStream)
+
+    def __FetchWorker(self):
+
+        while True:
+
+            Document = self.Queues["Inputs"].get()
+
+            if Document is _EndOfStream:
+                break
+
+            StartTime = Foundation.time.perf_counter()
+
+            try:
+                Content = self.Fetch(Document)
+            except Exception as e:
+                Log.warning(f"Skipping {Document.get('URL')} due to download/header issue: {e}")
+                self.Stats["Fetch"].Record(Foundation.time.perf_counter() - StartTime, 0, 1)
+                continue
+
+            self.Stats["Fetch"].Record(Foundation.time.perf_counter() - StartTime)
+            self.Queues["Fetched"].put((Document, Content))
+
+        # The last fetcher to finish ends the Stage
+        with self.Lock:
+            self.ActiveFetchers -= 1
+            if self.ActiveFetchers == 0:
+                self.Queues["Fetched"].put(_EndOfStream)
+
+    def __Dispatch(self, _Parsers: ProcessPoolExecutor):
+
+        while True:
+
+            Item = self.Queues["Fetched"].get()
+
+            if Item is _EndOfStream:
+                self.Queues["Parsing"].put(_EndOfStream)
+                break
+
+            Document, Content = Item
+            self.Queues["Parsing"].put((Document, _Parsers.submit(ExtractPDFText, Content)))
+
+    def __Collect(self):
+
+        while True:
+
+            Item = self.Queues["Parsing"].get()
+
+            if Item is _EndOfStream:
+                self.Queues["Parsed"].put(_EndOfStream)
+                break
+
+            Document, Future = Item
+
+            try:
+                Text, Seconds = Future.result()
+            except Exception as e:
+                Log.warning(f"Skipping {Document.get('URL')} due to PDF parsing failure: {e}")
+                self.Stats["Parse"].Record(0.0, 0, 1)
+                continue
+
+            self.Stats["Parse"].Record(Seconds)
+            # Measured by the parse worker, whose own Metrics aren't collected
+            Metrics.Observe("parse_seconds", Seconds)
+
+            if self.RecordOperation is not None:
+                try:
+                    Operation = self.RecordOperation(Document, Text)
+                    if Operation is not None:
+                        self.Queues["Writes"].put((self.DBManager.CollectionArxiv, Operation))
+                except Exception as e:
+                    Log.warning(f"No {self.DBManager.CollectionArxiv} record for {Document.get('URL')}: {e}")
+
+            self.Queues["Parsed"].put((Document, Text))
+
+    """
+        Chunks parsed Documents as they arrive & encodes them once ~EmbedChunks
+        chunks are pending (or the Parse Stage has nothing ready)
+    """
+    def __Embed(self):
+
+        Block       = []
+        NumChunks   = 0
+        Finished    = False
+
+        while not Finished:
+
+            try:
+                Item = self.Queues["Parsed"].get(timeout = 0.1 if Block else None)
+            except queue.Empty:
+                Item = None
+
+            if Item is _EndOfStream:
+                Finished = True
+
+            elif Item is not None:
+
+                Document, Text  = Item
+
+                # A failing Document is dropped, the Stage keeps draining Parsed
+                try:
+                    Chunks = self.Vectorizer.Chunk(Text)
+                except Exception as e:
+                    Log.warning(f"Skipping {Document.get('URL')} due to chunking failure: {e}")
+                    self.Stats["Embed"].Record(0.0, 0, 1)
+                    continue
+
+                NumChunks      += len(Chunks)
+                Block.append((Document, Chunks))
+
+                if NumChunks < self.EmbedChunks:
+                    continue
+
+            if Block:
+                self.__EmbedBlock(Block)
+                Block       = []
+                NumChunks   = 0
+
+    def __EmbedBlock(self, _Block: list):
+
+        StartTime   = Foundation.time.perf_counter()
+        Chunks      = [Chunk for _, DocumentChunks in _Block for Chunk in DocumentChunks]
+
+        try:
+            Embeddings = self.Vectorizer.EncodeChunks(Chunks, self.BatchSize) if Chunks else None
+        except Exception as e:
+            Log.error(f"Skipping {len(_Block)} Documents due to encoding failure: {e}")
+            self.Stats["Embed"].Record(Foundation.time.perf_counter() - StartTime, 0, len(_Block))
+            return
+
+        Offset      = 0
+        Failed      = 0
+
+        for Document, DocumentChunks in _Block:
+
+            if not DocumentChunks:
+                Log.warning(f"Skipping {Document.get('URL')}, no chunks to embed")
+                Failed += 1
+                continue
+
+            Operation   = VectorizedOperation(Document, Embeddings[Offset:Offset + len(DocumentChunks)], self.Codec)
+            Offset     += len(DocumentChunks)
+            self.Queues["Writes"].put((self.DBManager.CollectionArxivPDFVectorized, Operation))
+
+        self.Stats["Embed"].Record(Foundation.time.perf_counter() - StartTime, len(_Block) - Failed, Failed)
+
+    def __Write(self):
+
+        Pending = []
+
+        while True:
+
+            Item        = self.Queues["Writes"].get()
+            Finished    = Item is _EndOfStream
+
+            if not Finished:
+                Pending.append(Item)
+
+            if Pending and (Finished or len(Pending) >= self.WriteBatchSize):
+                self.__BulkWrite(Pending)
+                Pending = []
+
+            if Finished:
+                break
+
+    def __BulkWrite(self, _Pending: list):
+
+        Operations = {}
+
+        for Collection, Operation in _Pending:
+            Operations.setdefault(Collection, []).append(Operation)
+
+        for Collection, CollectionOperations in Operations.items():
+
+            StartTime = Foundation.time.perf_counter()
+
+            try:
+                with Metrics.Timer("bulk_write_seconds"):
+                    Result = self.DBManager.DB[Collection].bulk_write(CollectionOperations, ordered = False)
+                Failed = 0
+                if self.Debug:
+                    Log.debug(f"Inserted {Result.upserted_count}, Modified {Result.modified_count} in {Collection}")
+            except BulkWriteError as e:
+                Failed = len(e.details.get("writeErrors", []))
+                Log.error(f"bulk_write into {Collection} had {Failed} failures: {e.details.get('writeErrors', [])[:1]}")
+            except Exception as e:
+                Failed = len(CollectionOperations)
+                Log.error(f"bulk_write into {Collection} Failed: {e}")
+
+            self.Stats["Write"].Record(Foundation.time.perf_counter() - StartTime, len(CollectionOperations) - Failed, Failed)
+            Metrics.Increment("bulk_write_operations_total", len(CollectionOperations))
+            Metrics.Increment("bulk_write_failures_total", Failed)
+
+    """
+        Samples the depth of every queue until _Stopped is set
+    """
+    def __Monitor(self, _Stopped: threading.Event):
+
+        Samples = 0
+
+        while not _Stopped.wait(Foundation.PLATYPUS_PIPELINE_MONITOR_INTERVAL):
+
+            for Name, Queue in self.Queues.items():
+                self.QueueDepths[Name].append(Queue.qsize())
+
+            Samples += 1
+
+            if (self.Debug or self.Progress) and Samples % 5 == 0:
+                Depths = ", ".join(f"{Name} {Depths[-1]}" for Name, Depths in self.QueueDepths.items())
+                Done   = ", ".join(f"{Name} {Stats.Processed}" for Name, Stats in self.Stats.items())
+                Failed = sum(Stats.Failed for Stats in self.Stats.values())
+                Log.info(f"Queues ({Depths}) | Done ({Done}) | Failed {Failed} | "
+                         f"{self.Stats['Embed'].Processed / (Samples * Foundation.PLATYPUS_PIPELINE_MONITOR_INTERVAL):.2f} docs/sec")
+
+    def __Report(self, _Seconds: float) -> dict:
+
+        Report = {"Seconds": _Seconds, "Stages": {}, "Queues": {}}
+
+        for Name, Stats in self.Stats.items():
+
+            Report["Stages"][Name] = {
+                "Processed"     : Stats.Processed,
+                "Failed"        : Stats.Failed,
+                "DocsPerSec"    : Stats.Processed / max(_Seconds, 1e-9),
+                "BusySeconds"   : Stats.BusySeconds,
+            }
+            Log.info(f"{Name:>5} | {Stats.Processed} done, {Stats.Failed} failed | "
+                     f"{Stats.Processed / max(_Seconds, 1e-9):.2f} docs/sec | busy {Stats.BusySeconds:.2f}s")
+
+        for Name, Depths in self.QueueDepths.items():
+
+            Report["Queues"][Name] = {
+                "MeanDepth" : sum(Depths) / len(Depths) if Depths else 0.0,
+                "MaxDepth"  : max(Depths, default = 0),
+            }
+            Log.info(f"Queue {Name:>7} | mean depth {Report['Queues'][Name]['MeanDepth']:.1f}, max {Report['Queues'][Name]['MaxDepth']}")
+
+        return Report
@@ -1,21 +1,30 @@
-from platypus.Core.Database.Database import DatabaseManager
-from platypus.Utils.Foundation import ArxivEntriesIntoDict, SearchArxiv
-from platypus.Scripts.BulkDownload import DownloadPDF
+from platypus.Core.Database         import MongoDBManager
+from platypus.Core.Vectorizer       import ChunkVectorizer, Embedder
+from platypus.Utils.Arxiv           import ArxivEntriesIntoDict, SearchArxiv
+from platypus.Utils.BulkDownload    import DownloadPDF
+from platypus.Utils.Log             import ConfigureLogging
 
-# SearchArxiv("Machine Learning", True, 2 * 1024)
+# The parse workers of DownloadPDF are spawned & re-import this module
+if __name__ == "__main__":
 
-Entries = ArxivEntriesIntoDict()
+    ConfigureLogging()
 
-Documents = [{
-            "_id"       : _PaperInfo["PaperID"],
-            "Title"     : _PaperInfo["Title"],
-            "Summary"   : _PaperInfo["Summary"],
-            "URL"       : _PaperInfo["URL"]
+    # SearchArxiv("Machine Learning", True, 2 * 1024)
 
-        }for _PaperInfo in Entries]
+    Entries = ArxivEntriesIntoDict()
 
-DBManager = DatabaseManager(True)
+    Documents = [{
+                "_id"       : _PaperInfo["PaperID"],
+                "Title"     : _PaperInfo["Title"],
+                "Summary"   : _PaperInfo["Summary"],
+                "URL"       : _PaperInfo["URL"],
+                "Categories": _PaperInfo.get("Categories", []),
+                "Published" : _PaperInfo.get("Published", "")
 
-DBManager.InsertRecords(Documents, DBManager.CollectionArxiv)
+            }for _PaperInfo in Entries]
 
-DownloadPDF(DBManager, Documents[0:25], True)
\ No newline at end of file
+    DBManager = MongoDBManager(True)
+
+    DBManager.InsertRecords(Documents, DBManager.CollectionArxiv)
+
+    DownloadPDF(DBManager, Documents[0:25], ChunkVectorizer(Embedder(), True), True)
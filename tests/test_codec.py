@@ -0,0 +1,22 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Codec        import DecodeEmbeddings
+from platypus.Utils.Pipeline    import VectorizedOperation
+
+import mongomock
+
+def test_codec_switch_drops_int8_scale():
+
+    Collection  = mongomock.MongoClient().db.ArxivVectorized
+    Embeddings  = Foundation.np.random.default_rng(0).standard_normal((4, 16)).astype(Foundation.np.float32)
+    Document    = {"_id": "2401.00001", "URL": "https://arxiv.org/pdf/2401.00001"}
+
+    for Codec in ("int8", "float16"):
+        Collection.bulk_write([VectorizedOperation(Document, Embeddings, Codec)])
+
+    Stored = Collection.find_one({"_id": "2401.00001"})
+
+    assert "scale" not in Stored
+    assert Foundation.np.abs(DecodeEmbeddings([Stored])[0] - Embeddings).max() < 1e-2
+    # A stray scale is ignored by every codec but int8
+    assert Foundation.np.abs(DecodeEmbeddings([dict(Stored, scale = 5.0)])[0] - Embeddings).max() < 1e-2
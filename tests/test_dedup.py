@@ -0,0 +1,48 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Core.Indexer          import FAISSIndexer, InvertedFileIndex
+from platypus.Utils.Dedup           import DedupJob
+from platypus.Benchmarks.Suite      import StandInEmbedder, SyntheticCorpus
+
+import pytest
+
+@pytest.mark.parametrize("_Spec", ["IVFFlat", "Flat", "HNSW"])
+def test_dedup_index_keeps_ids(tmp_path, _Spec):
+
+    Vectorizer  = ChunkVectorizer(StandInEmbedder(64), False)
+    Documents   = SyntheticCorpus(3000)
+    # Copies of 5 Documents at the front of the Index, under later _ids
+    Copies      = [dict(Document, _id = f"9999.{i:05d}") for i, Document in enumerate(Documents[:5])]
+    Indexer     = FAISSIndexer(Vectorizer, False, _Spec, {"nprobe": 4096}, _Directory = str(tmp_path / "index"))
+    Indexer.BuildIndices(Copies + Documents)
+
+    # Searched like the CLI does, memory-mapped
+    Indexer = FAISSIndexer(Vectorizer, False, _Spec, {"nprobe": 4096}, _Directory = str(tmp_path / "index"))
+    assert Indexer.LoadIndices(_MemoryMap = True)
+
+    Threads = Foundation.faiss.omp_get_max_threads()
+    Job     = DedupJob(Indexer, False, _Threshold = 0.999, _Threads = 1)
+    Job.Run()
+
+    # The Run's thread count & IVF direct map don't outlive it
+    assert Foundation.faiss.omp_get_max_threads() == Threads
+    IVF = InvertedFileIndex(Indexer.FAISSIndex)
+    assert IVF is None or IVF.direct_map.type == Foundation.faiss.DirectMap.NoMap
+
+    assert sorted(Group["Members"][1] for Group in Job.Groups) == [Copy["_id"] for Copy in Copies]
+
+    Deduped = Job.BuildDedupIndex(str(tmp_path / "dedup"))
+
+    assert Deduped.FAISSIndex.ntotal == 3000
+
+    for Document in Documents[::60]:
+
+        Means, _    = Vectorizer.VectorizeMeans([Document["Title"] + Document["Summary"]])
+        Vector      = Foundation.np.ascontiguousarray(Means, dtype = Foundation.np.float32)
+        Foundation.faiss.normalize_L2(Vector)
+
+        Found = Deduped.SearchVectors(Vector, 1)[0]
+
+        assert Found[0]["_id"] == Document["_id"]
+        assert Found[0]["Distance"] < 1e-4
@@ -0,0 +1,138 @@
+from platypus.Utils.Harvester   import ArxivHarvester, JSONLSink
+from http.server                import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse               import urlparse, parse_qs
+
+import json
+import threading
+
+import pytest
+
+TOTAL = 100
+
+"""
+    Atom feed of the results [_Start, _Start + _Count) of a query with TOTAL results
+"""
+def Feed(_Start: int, _Count: int) -> bytes:
+
+    Entries = "".join(f"""
+        <entry>
+            <id>http://arxiv.org/abs/2401.{i:05d}v1</id>
+            <title>Paper {i}</title>
+            <summary>Summary of paper {i}</summary>
+            <published>2024-01-01T00:00:00Z</published>
+            <category term="cs.LG"/>
+        </entry>""" for i in range(_Start, min(_Start + _Count, TOTAL)))
+
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+        <feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">
+            <opensearch:totalResults>{TOTAL}</opensearch:totalResults>{Entries}
+        </feed>""".encode("utf8")
+
+class StubArxiv(object):
+
+    """
+        Local stand-in of the Arxiv API, Failures maps a page offset onto the
+        responses ("503", "429" or "empty") served before the real page, or
+        "always" to fail it every time
+    """
+    def __init__(self):
+
+        self.Failures   = {}
+        self.Requests   = {}
+        self.Lock       = threading.Lock()
+        Stub            = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+
+                Query   = parse_qs(urlparse(self.path).query)
+                Start   = int(Query["start"][0])
+
+                with Stub.Lock:
+                    Stub.Requests[Start] = Stub.Requests.get(Start, 0) + 1
+                    Planned = Stub.Failures.get(Start, [])
+                    Failure = "503" if Planned == "always" else (Planned.pop(0) if Planned else None)
+
+                if Failure == "503":
+                    return self.__Reply(503, b"unavailable")
+                if Failure == "429":
+                    return self.__Reply(429, b"slow down", {"Retry-After": "0"})
+
+                self.__Reply(200, Feed(Start, 0 if Failure == "empty" else int(Query["max_results"][0])))
+
+            def __Reply(self, _Status: int, _Body: bytes, _Headers: dict = None):
+
+                self.send_response(_Status)
+                for Name, Value in (_Headers or {}).items():
+                    self.send_header(Name, Value)
+                self.send_header("Content-Length", str(len(_Body)))
+                self.end_headers()
+                self.wfile.write(_Body)
+
+            def log_message(self, *_Args):
+                pass
+
+        self.Server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.URL    = f"http://127.0.0.1:{self.Server.server_address[1]}/api/query"
+        self.Thread = threading.Thread(target = self.Server.serve_forever, daemon = True)
+        self.Thread.start()
+
+    def Close(self):
+
+        self.Server.shutdown()
+        self.Server.server_close()
+
+@pytest.fixture
+def Stub():
+
+    Stub = StubArxiv()
+    yield Stub
+    Stub.Close()
+
+def Harvest(_Stub: StubArxiv, _Directory, _MaxRetries: int) -> int:
+
+    Sink = JSONLSink(str(_Directory / "ArxivRecords.jsonl"))
+
+    try:
+        return ArxivHarvester("graph", Sink, False, _MaxResults = TOTAL, _PageSize = 20, _Workers = 2, _RequestsPerSecond = 1000.0,
+                              _MaxRetries = _MaxRetries, _BaseURL = _Stub.URL,
+                              _CheckpointPath = str(_Directory / "Checkpoint.json")).Harvest()
+    finally:
+        Sink.Close()
+
+def Records(_Directory) -> list:
+
+    with open(_Directory / "ArxivRecords.jsonl", encoding = "utf8") as File:
+        return [json.loads(Line)["PaperID"] for Line in File]
+
+def test_retries_with_backoff(Stub, tmp_path):
+
+    Stub.Failures = {20: ["503"], 40: ["429", "429"], 60: ["empty"]}
+
+    assert Harvest(Stub, tmp_path, _MaxRetries = 3) == TOTAL
+    assert sorted(Records(tmp_path)) == [f"2401.{i:05d}v1" for i in range(TOTAL)]
+    assert Stub.Requests == {0: 1, 20: 2, 40: 3, 60: 2, 80: 1}
+
+def test_resumes_from_checkpoint_without_duplicates(Stub, tmp_path):
+
+    # The page at 40 fails for good, the pages above it are still written
+    Stub.Failures = {40: "always"}
+
+    assert Harvest(Stub, tmp_path, _MaxRetries = 1) == TOTAL - 20
+
+    with open(tmp_path / "Checkpoint.json") as File:
+        assert json.load(File)["Start"] == 40
+
+    # A crash left half a line behind
+    with open(tmp_path / "ArxivRecords.jsonl", "a", encoding = "utf8") as File:
+        File.write('{"PaperID": "2401.000')
+
+    Stub.Failures = {}
+    Stub.Requests = {}
+
+    Harvest(Stub, tmp_path, _MaxRetries = 1)
+
+    # Only the pages from the checkpoint on are fetched again, & written once
+    assert sorted(Stub.Requests) == [40, 60, 80]
+    assert sorted(Records(tmp_path)) == [f"2401.{i:05d}v1" for i in range(TOTAL)]
@@ -0,0 +1,60 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Core.Indexer          import FAISSIndexer, IsKeyed
+from platypus.Benchmarks.Suite      import StandInEmbedder, SyntheticCorpus
+
+import pytest
+
+"""
+    Normalized vector a Document is indexed under
+"""
+def DocumentVector(_Vectorizer: ChunkVectorizer, _Document: dict):
+
+    Means, _ = _Vectorizer.VectorizeMeans([_Document["Title"] + _Document["Summary"]])
+    Vector   = Foundation.np.ascontiguousarray(Means, dtype = Foundation.np.float32)
+    Foundation.faiss.normalize_L2(Vector)
+
+    return Vector
+
+@pytest.mark.parametrize("_Spec", ["IVFFlat", "IVFPQ", "Flat"])
+def test_remove_then_search_keeps_ids(tmp_path, _Spec):
+
+    Vectorizer  = ChunkVectorizer(StandInEmbedder(64), False)
+    Documents   = SyntheticCorpus(3000)
+    # Every inverted list is probed, so the nearest vector is always found
+    Indexer     = FAISSIndexer(Vectorizer, False, _Spec, {"nprobe": 4096}, _Directory = str(tmp_path))
+    Indexer.BuildIndices(Documents)
+
+    assert IsKeyed(Indexer.FAISSIndex)
+    assert Indexer.Remove([Document["_id"] for Document in Documents[:100]]) == 100
+
+    # A changed Document is replaced, through a remove & an add
+    Changed             = dict(Documents[2001])
+    Changed["Summary"] += " retrieval"
+    assert Indexer.Upsert([Changed]) == 1
+    assert Indexer.FAISSIndex.ntotal == 2900
+
+    for Document in (Documents[2000], Documents[2999], Changed):
+
+        Vector  = DocumentVector(Vectorizer, Document)
+        Found   = Indexer.SearchVectors(Vector, 10)[0]
+
+        assert Found[0]["_id"] == Document["_id"]
+        assert len(Found) == 10
+
+        Filtered = Indexer.SearchVectors(Vector, 10, {"Categories": Document["Categories"][:1]})[0]
+
+        assert Filtered[0]["_id"] == Document["_id"]
+
+    # Removed Documents are never returned
+    Removed = {Document["_id"] for Document in Documents[:100]}
+    Found   = Indexer.SearchVectors(DocumentVector(Vectorizer, Documents[50]), 50)[0]
+
+    assert not Removed & {Match["_id"] for Match in Found}
+
+    # The deltas replay onto the saved Index
+    Loaded = FAISSIndexer(Vectorizer, False, _Spec, {"nprobe": 4096}, _Directory = str(tmp_path))
+
+    assert Loaded.LoadIndices()
+    assert Loaded.SearchVectors(DocumentVector(Vectorizer, Documents[2000]), 1)[0][0]["_id"] == Documents[2000]["_id"]
@@ -0,0 +1,56 @@
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Core.Indexer          import FAISSIndexer
+from platypus.Core.Database         import MongoDBManager
+from platypus.Utils.LiveIndexer     import LiveIndexer
+from platypus.Benchmarks.Suite      import StandInEmbedder, SyntheticCorpus
+
+import collections
+import datetime
+
+import mongomock
+
+class RecordingIndexer(FAISSIndexer):
+
+    """
+        FAISSIndexer counting the _ids passed to Upsert
+    """
+    def __init__(self, *_Args, **_Kwargs):
+
+        super().__init__(*_Args, **_Kwargs)
+        self.Upserted = collections.Counter()
+
+    def Upsert(self, _Documents, *_Args):
+
+        self.Upserted.update(Document["_id"] for Document in _Documents)
+
+        return super().Upsert(_Documents, *_Args)
+
+def test_watermark_upserts_every_document_once(tmp_path):
+
+    DBManager   = MongoDBManager(False, _Client = mongomock.MongoClient(), _DBName = "platypus")
+    Collection  = DBManager.DB[DBManager.CollectionArxiv]
+    Indexer     = RecordingIndexer(ChunkVectorizer(StandInEmbedder(64), False), False, "Flat", _Directory = str(tmp_path))
+    Documents   = SyntheticCorpus(12)
+    Stamps      = [datetime.datetime(2024, 1, 1, tzinfo = datetime.timezone.utc) + datetime.timedelta(minutes = Minute)
+                   for Minute in (0, 1, 1, 1, 2, 2)]
+
+    def Start() -> LiveIndexer:
+        return LiveIndexer(Indexer, DBManager, False, _BatchSize = 3, _SettleSeconds = 0.0, _ChangeStreams = False,
+                           _WatermarkPath = str(tmp_path / "Watermark.json"))
+
+    # The first poll stops within the documents stamped at minute 1
+    Collection.insert_many([dict(Document, UpdatedAt = Stamp) for Document, Stamp in zip(Documents[:6], Stamps)])
+    assert Start().Poll() == 3
+
+    # More documents at the watermark's own UpdatedAt & later ones, read after a restart
+    Collection.insert_many([dict(Document, UpdatedAt = Stamps[3]) for Document in Documents[6:9]])
+    Collection.insert_many([dict(Document, UpdatedAt = Stamps[5] + datetime.timedelta(minutes = 1)) for Document in Documents[9:]])
+
+    Restarted = Start()
+    # Bounded, a watermark that doesn't advance would poll forever
+    Polls     = [Restarted.Poll() for _ in range(5)]
+
+    assert Polls[-1] == 0
+
+    assert Indexer.Upserted == collections.Counter(Document["_id"] for Document in Documents)
+    assert Indexer.FAISSIndex.ntotal == len(Documents)
@@ -0,0 +1,76 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.MetadataStore    import MetadataStore, FilterColumns
+from platypus.Core.Indexer          import DocumentID, FilterMetadata
+from platypus.Benchmarks.Suite      import SyntheticCorpus
+
+import pytest
+
+"""
+    Metadata of the synthetic corpus as FAISSIndexer keeps it, plus records
+    with a non-ascii Title, no Categories & no / a malformed Published date
+"""
+def CorpusMetadata() -> dict:
+
+    Documents = SyntheticCorpus(300) + [{"_id": "9999.00000", "Title": "Théorie des graphes ∑", "URL": "", "Categories": [], "Published": ""},
+                                        {"_id": "9999.00001", "Title": "", "URL": "u", "Categories": ["cs.LG"], "Published": "2021-13-40"}]
+
+    return {DocumentID(Document["_id"]): {"Title": Document["Title"], "URL": Document["URL"], "_id": Document["_id"],
+                                          **FilterMetadata(Document)}
+            for Document in Documents}
+
+"""
+    Whether _Value (a Metadata record) matches _Filter, evaluated record by record
+"""
+def Matches(_Value: dict, _Filter: dict) -> bool:
+
+    Published = _Value["Published"]
+
+    try:
+        Day = Foundation.np.datetime64(Published, "D") if len(Published) == 10 else None
+    except ValueError:
+        Day = None
+
+    if _Filter.get("Categories") and not set(_Filter["Categories"]) & set(_Value["Categories"].split()):
+        return False
+
+    if _Filter.get("PublishedAfter") and (Day is None or Day < Foundation.np.datetime64(_Filter["PublishedAfter"], "D")):
+        return False
+
+    if _Filter.get("PublishedBefore") and (Day is None or Day >= Foundation.np.datetime64(_Filter["PublishedBefore"], "D")):
+        return False
+
+    return True
+
+def test_store_round_trips_and_masks(tmp_path):
+
+    Metadata = CorpusMetadata()
+    MetadataStore.Write(str(tmp_path / "Metadata"), Metadata)
+    Store    = MetadataStore(str(tmp_path / "Metadata"))
+
+    assert Store.ToDict() == Metadata
+    assert isinstance(Store.IDs, Foundation.np.memmap)
+
+    Columns = Store.FilterColumns()
+    IDs     = sorted(Metadata)
+
+    assert Columns.IDs.tolist() == IDs
+
+    for Filter in ({},
+                   {"Categories": ["cs.LG"]},
+                   {"Categories": ["cs.CL", "stat.ML", "not.a.category"]},
+                   {"PublishedAfter": "2020-01-01"},
+                   {"PublishedBefore": "2017-06-30"},
+                   {"Categories": ["cs.LG", "cs.CV"], "PublishedAfter": "2016-01-01", "PublishedBefore": "2022-01-01"}):
+
+        Expected = [Matches(Metadata[ID], Filter) for ID in IDs]
+
+        assert Columns.Mask(Filter).tolist() == Expected
+        assert FilterColumns.FromMetadata(Metadata).Mask(Filter).tolist() == Expected
+
+@pytest.mark.parametrize("_Filter", [["cs.LG"], {"Category": ["cs.LG"]}, {"Categories": "cs.LG"}, {"Categories": [1]},
+                                     {"PublishedAfter": "2020"}, {"PublishedBefore": 20200101}, {"PublishedAfter": "2020-02-30"}])
+def test_validate_rejects_bad_filters(_Filter):
+
+    with pytest.raises(ValueError):
+        FilterColumns.Validate(_Filter)
@@ -0,0 +1,51 @@
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Core.Database         import MongoDBManager
+from platypus.Utils.Pipeline        import IngestionPipeline
+from platypus.Benchmarks.Suite      import StandInEmbedder, SyntheticCorpus, SyntheticPDF
+
+import mongomock
+
+class FailingVectorizer(ChunkVectorizer):
+
+    """
+        ChunkVectorizer failing to chunk texts containing _ChunkFailure & to
+        encode blocks containing _EncodeFailure
+    """
+    def __init__(self, _ChunkFailure: str, _EncodeFailure: str):
+
+        super().__init__(StandInEmbedder(64), False)
+        self.ChunkFailure   = _ChunkFailure
+        self.EncodeFailure  = _EncodeFailure
+
+    def Chunk(self, _Text: str) -> list:
+
+        if self.ChunkFailure in _Text:
+            raise RuntimeError("chunking failed")
+
+        return super().Chunk(_Text)
+
+    def EncodeChunks(self, _Chunks: list, _BatchSize: int):
+
+        if any(self.EncodeFailure in Chunk for Chunk in _Chunks):
+            raise RuntimeError("encoding failed")
+
+        return super().EncodeChunks(_Chunks, _BatchSize)
+
+def test_embed_failures_skip_only_their_documents():
+
+    Documents   = SyntheticCorpus(6)
+    PDFs        = {Document["URL"]: SyntheticPDF(Document, 1) for Document in Documents}
+    DBManager   = MongoDBManager(False, _Client = mongomock.MongoClient(), _DBName = "platypus")
+    Vectorizer  = FailingVectorizer(Documents[1]["Title"], Documents[4]["Title"])
+    # One Document per embedded block, the encoding failure drops Documents[4] alone
+    Pipeline    = IngestionPipeline(DBManager, Vectorizer, False, _Fetch = lambda _Document: PDFs[_Document["URL"]],
+                                    _NumFetchers = 1, _NumParsers = 1, _EmbedChunks = 1)
+
+    Report = Pipeline.Run(Documents)
+
+    assert Report["Stages"]["Embed"]["Processed"] == 4
+    assert Report["Stages"]["Embed"]["Failed"] == 2
+
+    Stored = {Record["_id"] for Record in DBManager.DB[DBManager.CollectionArxivPDFVectorized].find()}
+
+    assert Stored == {Documents[i]["_id"] for i in (0, 2, 3, 5)}
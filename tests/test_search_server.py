@@ -0,0 +1,74 @@
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Core.Indexer          import FAISSIndexer
+from platypus.Core.SearchServer     import SearchServer, SearchRequest
+from platypus.Benchmarks.Suite      import StandInEmbedder, SyntheticCorpus
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+@pytest.fixture
+def Server(tmp_path):
+
+    Indexer = FAISSIndexer(ChunkVectorizer(StandInEmbedder(64), False), False, _Directory = str(tmp_path))
+    Indexer.BuildIndices(SyntheticCorpus(200))
+
+    Server  = SearchServer(Indexer, False, _Host = "127.0.0.1", _Port = 0, _BatchWindow = 0.0)
+    Thread  = threading.Thread(target = Server.Serve, daemon = True)
+    Thread.start()
+
+    yield Server
+
+    Server.Shutdown()
+    Thread.join()
+
+"""
+    (status, JSON reply) of POSTing _Body to /search
+"""
+def Post(_Server: SearchServer, _Body) -> tuple:
+
+    Request = urllib.request.Request(f"http://127.0.0.1:{_Server.Address[1]}/search", data = json.dumps(_Body).encode("utf8"), method = "POST")
+
+    try:
+        with urllib.request.urlopen(Request, timeout = 10) as Response:
+            return Response.status, json.loads(Response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+@pytest.mark.parametrize("_Body", [["graph"], "graph", 3, {"Queries": "abc"}, {"Queries": [1, 2]}, {"Query": 7},
+                                   {"Queries": ["graph"], "Filter": ["cs.LG"]}])
+def test_post_rejects_malformed_bodies(Server, _Body):
+
+    Status, Reply = Post(Server, _Body)
+
+    assert Status == 400
+    assert "Error" in Reply
+
+def test_post_searches_queries(Server):
+
+    Status, Reply = Post(Server, {"Queries": ["graph neural network", "regret bound"], "K": 3})
+
+    assert Status == 200
+    assert [len(Results) for Results in Reply["Results"]] == [3, 3]
+
+def test_batch_failure_reaches_only_the_failing_request(Server, monkeypatch):
+
+    Search = Server.Indexer.Search
+
+    def FailingSearch(_Queries, *_Args):
+        if "poison" in _Queries:
+            raise ValueError("poisoned query")
+        return Search(_Queries, *_Args)
+
+    monkeypatch.setattr(Server.Indexer, "Search", FailingSearch)
+
+    Requests = [SearchRequest(["graph neural network"], 3), SearchRequest(["poison"], 3), SearchRequest(["regret bound"], 2)]
+    Server._SearchServer__SearchBatch(Requests)
+
+    assert [len(Results) for Results in Requests[0].Results] == [3]
+    assert [len(Results) for Results in Requests[2].Results] == [2]
+    assert isinstance(Requests[1].Error, ValueError) and Requests[0].Error is None and Requests[2].Error is None
+    assert Server.Stats.Snapshot()["Errors"] == 1
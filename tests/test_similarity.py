@@ -0,0 +1,21 @@
+import platypus.Utils.Foundation as Foundation
+
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Core.Indexer          import FAISSIndexer
+from platypus.Core.Similarity       import BatchAbstractDetector
+from platypus.Benchmarks.Suite      import StandInEmbedder, SyntheticCorpus
+
+def test_nearest_matches_are_flagged_without_a_threshold(tmp_path):
+
+    Vectorizer  = ChunkVectorizer(StandInEmbedder(64), False)
+    Documents   = SyntheticCorpus(200)
+    Indexer     = FAISSIndexer(Vectorizer, False, _Directory = str(tmp_path))
+    Indexer.BuildIndices(Documents)
+
+    Means, _    = Vectorizer.VectorizeMeans([Document["Title"] + Document["Summary"] for Document in Documents[:3]])
+    Unrelated   = Foundation.np.random.default_rng(0).standard_normal((1, 64))
+    Reports     = BatchAbstractDetector(Indexer, False, _K = 3).Detect(Foundation.np.vstack([Means, Unrelated]))
+
+    assert [Report["Flagged"] for Report in Reports] == [True, True, True, False]
+    assert [Report["Matches"][0]["_id"] for Report in Reports[:3]] == [Document["_id"] for Document in Documents[:3]]
+    assert all(len(Report["Matches"]) == 3 for Report in Reports)
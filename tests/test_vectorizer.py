@@ -0,0 +1,19 @@
+from platypus.Core.Cache            import EmbeddingCache
+from platypus.Core.Vectorizer       import ChunkVectorizer
+from platypus.Benchmarks.Suite      import StandInEmbedder
+
+def test_vectorize_goes_through_the_cache(tmp_path):
+
+    Cache       = EmbeddingCache(str(tmp_path / "EmbeddingCache.sqlite"))
+    Vectorizer  = ChunkVectorizer(StandInEmbedder(64), False, _Cache = Cache)
+    Text        = "attention transformer network graph neural vector quantization retrieval index embedding " * 20
+
+    First   = Vectorizer.Vectorize(Text)
+    Misses  = Cache.Misses
+
+    assert Misses > 0 and Cache.Hits == 0
+
+    Second  = Vectorizer.Vectorize(Text)
+
+    assert Cache.Misses == Misses and Cache.Hits > 0
+    assert (First == Second).all()